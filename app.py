@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 import click
@@ -13,8 +14,13 @@ def main():
 
 
 if __name__ == "__main__":
+    # Exports are loaded on several cores, in the frozen executables on Windows and macOS every worker process
+    # starts this entry point again and has to be sent to its work instead of running the CLI
+    multiprocessing.freeze_support()
     main.add_command(commands.auth.auth)
     main.add_command(commands.configure.configure)
+    main.add_command(commands.convert.convert)
+    main.add_command(commands.export.export)
     main.add_command(commands.playlist.playlist)
     main.add_command(commands.user_top.user_top)
     main.add_command(commands.validate.validate)
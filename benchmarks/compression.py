@@ -0,0 +1,49 @@
+import os
+import tempfile
+import time
+import click
+import export
+from benchmarks.serializers import build_library
+
+
+@click.command(help="Measure the size of a playlists export of synthetic songs and how long writing and reading it "
+                    "takes with each compression. Run from the repository root with: python -m benchmarks.compression")
+@click.option("--songs", "num_songs", default=100_000, type=int, help="Number of songs in the export")
+@click.option("--playlist-size", default=1000, type=int, help="Number of songs per playlist")
+@click.option("--repeat", default=3, type=int, help="Number of times each file is written and read, the fastest run "
+                                                     "is kept")
+def main(num_songs: int, playlist_size: int, repeat: int) -> None:
+    playlists = build_library(num_songs, playlist_size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'extension':>10} {'version':>8} {'size_mb':>9} {'ratio':>7} {'write_s':>8} {'write_mb_s':>11} "
+              f"{'read_s':>7} {'read_mb_s':>10}")
+        for export_version in export.EXPORT_VERSIONS:
+            uncompressed_size = None
+            for extension in export.get_export_extensions():
+                filename = os.path.join(directory, f"playlists{extension}")
+                write_durations = []
+                read_durations = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    export.write_playlists(filename, playlists, export_version)
+                    write_durations.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    with export.open_export_reader(filename) as file:
+                        file.read()
+                    read_durations.append(time.perf_counter() - start)
+
+                size = os.path.getsize(filename)
+                if uncompressed_size is None:
+                    uncompressed_size = size
+                # Throughput is measured on the uncompressed JSON
+                megabytes = uncompressed_size / 1024 / 1024
+                print(f"{extension:>10} {export_version:>8} {round(size / 1024 / 1024, 1):>9} "
+                      f"{round(uncompressed_size / size, 1):>7} {round(min(write_durations), 3):>8} "
+                      f"{round(megabytes / min(write_durations), 1):>11} {round(min(read_durations), 3):>7} "
+                      f"{round(megabytes / min(read_durations), 1):>10}")
+
+
+if __name__ == "__main__":
+    main()
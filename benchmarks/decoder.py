@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import time
+import click
+from typing import Callable, Dict, List
+import export
+from benchmarks.serializers import build_library
+from helpers import write_json_array
+from sptfy import PlaylistWithSongs, PlaylistNoSongs, Song, Album, AlbumImage, ExternalIds
+
+
+# How exports were read before the shared decoder, one key at a time after the whole document had been parsed
+def load_playlists_by_keys(filename: str) -> List[PlaylistWithSongs]:
+    with open(filename, "r") as f:
+        data = json.load(f)
+
+    playlists = []
+    for item in data:
+        playlist_id = item["id"]
+        playlist_name = item["name"]
+        playlist_total = item["total"]
+        spotify_playlist_url = item["spotify_playlist_url"]
+        playlist_owner_id = item["owner_spotify_id"]
+        playlist_snapshot_id = item.get("snapshot_id")
+        playlist_description = ""
+        if "description" in item:
+            playlist_description = item["description"]
+        songs = []
+
+        for item_song in item["songs"]:
+            album_name = ""
+            album_artists = []
+            album_release_date = ""
+            album_images = []
+            if "album" in item_song:
+                item_album = item_song["album"]
+
+                if "name" in item_album:
+                    album_name = item_album["name"]
+                if "artists" in item_album:
+                    album_artists = item_album["artists"]
+                if "release_date" in item_album:
+                    album_release_date = item_album["release_date"]
+                if "images" in item_album:
+                    for image in item_album["images"]:
+                        album_images.append(AlbumImage(
+                            url=image["url"],
+                            height=image["height"],
+                            width=image["width"])
+                        )
+            
+            external_ids = None
+            if "external_ids" in item_song:
+                isrc = item_song["external_ids"]["isrc"] if "isrc" in item_song["external_ids"] else None
+                ean = item_song["external_ids"]["ean"] if "ean" in item_song["external_ids"] else None
+                upc = item_song["external_ids"]["upc"] if "upc" in item_song["external_ids"] else None
+                external_ids = ExternalIds(
+                    isrc=isrc,
+                    ean=ean,
+                    upc=upc
+                )
+            
+            song_name = item_song["name"]
+            song_artists = item_song["artists"]
+            album = Album(name=album_name, artists=album_artists, release_date=album_release_date, images=album_images)
+            track_number = item_song["track_number"]
+            disc_number = item_song["disc_number"]
+            duration_ms = item_song["duration_ms"]
+            song_spotify_url = item_song["spotify_url"]
+            song_youtube_url = item_song["youtube_url"]
+            song_youtube_url_validated = item_song["youtube_url_validated"]
+            youtube_url_permanently_skip = item_song.get("youtube_url_permanently_skip", False)
+            added_at = item_song.get("added_at")
+
+            songs.append(Song(
+                name=song_name,
+                artists=song_artists,
+                album=album,
+                track_number=track_number,
+                disc_number=disc_number,
+                duration_ms=duration_ms,
+                external_ids=external_ids,
+                spotify_url=song_spotify_url,
+                youtube_url=song_youtube_url,
+                youtube_url_validated=song_youtube_url_validated,
+                youtube_url_permanently_skip=youtube_url_permanently_skip,
+                added_at=added_at,
+            ))
+
+        playlists.append(PlaylistWithSongs(PlaylistNoSongs(
+            id=playlist_id,
+            name=playlist_name,
+            description=playlist_description,
+            total=playlist_total,
+            spotify_playlist_url=spotify_playlist_url,
+            owner_spotify_id=playlist_owner_id,
+            snapshot_id=playlist_snapshot_id
+        ), songs))
+
+    return playlists
+
+
+def load_youtube_url_cache_by_keys(filename: str) -> List[tuple]:
+    return [(song.spotify_url, song.youtube_url, song.youtube_url_validated, song.youtube_url_permanently_skip)
+            for playlist in load_playlists_by_keys(filename) for song in playlist.songs]
+
+
+def get_loaders() -> Dict[str, Callable[[str], List]]:
+    return {
+        "keys": load_playlists_by_keys,
+        "decoder": export.load_playlists,
+        "keys cache": load_youtube_url_cache_by_keys,
+        "decoder cache": export.load_youtube_url_cache_entries,
+    }
+
+
+@click.command(help="Measure how long reading a playlists export of synthetic songs takes with each loader. "
+                    "Run from the repository root with: python -m benchmarks.decoder")
+@click.option("--songs", "num_songs", default=100_000, type=int, help="Number of songs in the export")
+@click.option("--playlist-size", default=1000, type=int, help="Number of songs per playlist")
+@click.option("--repeat", default=3, type=int, help="Number of times each loader is run, the fastest run is kept")
+def main(num_songs: int, playlist_size: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "playlists.json")
+        write_json_array(filename, build_library(num_songs, playlist_size))
+
+        print(f"{'loader':>14} {'seconds':>9}")
+        for name, load in get_loaders().items():
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                load(filename)
+                durations.append(time.perf_counter() - start)
+            print(f"{name:>14} {round(min(durations), 3):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import json
+import resource
+import subprocess
+import sys
+import time
+import click
+from dataclasses import dataclass
+from typing import List, Optional, Dict
+import sptfy
+
+
+# The models as they were before they used __slots__, kept to compare against
+@dataclass
+class DictAlbumImage:
+    url: str
+    height: int
+    width: int
+
+
+@dataclass
+class DictAlbum:
+    name: str
+    artists: List[str]
+    release_date: str
+    images: List[DictAlbumImage]
+
+
+@dataclass
+class DictExternalIds:
+    isrc: str
+    ean: str
+    upc: str
+
+
+@dataclass
+class DictSong:
+    name: str
+    artists: List[str]
+    album: Optional[DictAlbum]
+    track_number: Optional[int]
+    disc_number: Optional[int]
+    duration_ms: Optional[int]
+    external_ids: Optional[DictExternalIds]
+    spotify_url: str
+    youtube_url: Optional[str] = None
+    youtube_url_validated: bool = False
+    youtube_url_permanently_skip: bool = False
+    added_at: Optional[str] = None
+
+
+MODELS = {
+    "dict": (DictSong, DictAlbum, DictAlbumImage, DictExternalIds),
+    "slots": (sptfy.Song, sptfy.Album, sptfy.AlbumImage, sptfy.ExternalIds),
+}
+DEFAULT_COUNTS = [10_000, 100_000, 1_000_000]
+
+
+def build_songs(variant: str, count: int) -> List:
+    song_cls, album_cls, album_image_cls, external_ids_cls = MODELS[variant]
+    songs = []
+    for index in range(count):
+        album = album_cls(
+            name=f"Album {index}",
+            artists=[f"Artist {index}"],
+            release_date="2001-01-01",
+            images=[album_image_cls(url=f"https://i.scdn.co/image/{index}/{size}", height=size, width=size)
+                    for size in (640, 300, 64)]
+        )
+        songs.append(song_cls(
+            name=f"Song {index}",
+            artists=[f"Artist {index}"],
+            album=album,
+            track_number=1,
+            disc_number=1,
+            duration_ms=200000,
+            external_ids=external_ids_cls(isrc=f"ISRC{index:08}", ean=None, upc=None),
+            spotify_url=f"https://open.spotify.com/track/{index}"
+        ))
+    return songs
+
+
+def get_rss_kb() -> int:
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    # Peak RSS, in kilobytes on linux and bytes on macos
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(variant: str, count: int) -> Dict:
+    rss_before = get_rss_kb()
+    start = time.perf_counter()
+    songs = build_songs(variant, count)
+    duration = time.perf_counter() - start
+    rss_after = get_rss_kb()
+    return {
+        "variant": variant,
+        "count": len(songs),
+        "construction_seconds": round(duration, 3),
+        "rss_mb": round((rss_after - rss_before) / 1024, 1),
+    }
+
+
+@click.command(help="Measure RSS and construction time of synthetic songs with and without __slots__. "
+                    "Run from the repository root with: python -m benchmarks.models")
+@click.option("--count", "counts", multiple=True, type=int, default=DEFAULT_COUNTS,
+              help="Number of songs to build, can be given multiple times")
+@click.option("--variant", default=None, type=click.Choice(list(MODELS.keys())),
+              help="Only measure one variant in the current process and print the result as JSON")
+def main(counts: List[int], variant: Optional[str]) -> None:
+    if variant is not None:
+        for count in counts:
+            print(json.dumps(measure(variant, count)))
+        return
+
+    # Every measurement runs in its own process so the RSS of one doesn't leak into the next
+    print(f"{'count':>10} {'variant':>8} {'seconds':>9} {'rss_mb':>9}")
+    for count in counts:
+        for model_variant in MODELS.keys():
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.models", "--variant", model_variant, "--count", str(count)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output)
+            print(f"{result['count']:>10} {result['variant']:>8} {result['construction_seconds']:>9} "
+                  f"{result['rss_mb']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+import click
+from typing import Optional
+import export
+from benchmarks.serializers import build_library
+
+
+def time_load(filename: str, max_workers: int, min_parallel_bytes: int, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        export.load_export(filename, max_workers=max_workers, min_parallel_bytes=min_parallel_bytes)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+@click.command(help="Measure how long loading playlists exports of increasing sizes takes on one core and on several "
+                    "cores, to find the size from which loading in parallel is faster. Run from the repository root "
+                    "with: python -m benchmarks.parallel_load")
+@click.option("--songs", "songs_list", default=[10_000, 25_000, 50_000, 100_000, 200_000], type=int, multiple=True,
+              help="Number of songs in each export, can be given several times")
+@click.option("--playlist-size", default=1000, type=int, help="Number of songs per playlist")
+@click.option("--workers", default=None, type=int, help="Number of worker processes, defaults to the number of cores")
+@click.option("--repeat", default=3, type=int, help="Number of times each file is loaded, the fastest run is kept")
+def main(songs_list: list, playlist_size: int, workers: Optional[int], repeat: int) -> None:
+    workers = max(export.get_max_workers(workers), 2)
+    crossover = None
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'songs':>8} {'size_mb':>8} {'one_core_s':>11} {f'{workers}_workers_s':>12} {'speedup':>8}")
+        for num_songs in songs_list:
+            filename = os.path.join(directory, "playlists.json")
+            export.write_playlists(filename, build_library(num_songs, playlist_size))
+            size = os.path.getsize(filename)
+
+            sequential = time_load(filename, 1, size + 1, repeat)
+            parallel = time_load(filename, workers, 0, repeat)
+            if crossover is None and parallel < sequential:
+                crossover = size
+            print(f"{num_songs:>8} {round(size / 1024 / 1024, 1):>8} {round(sequential, 3):>11} "
+                  f"{round(parallel, 3):>12} {round(sequential / parallel, 2):>8}")
+
+    if crossover is None:
+        print(f"Loading in parallel was never faster with {workers} workers on {os.cpu_count()} cores")
+    else:
+        print(f"Loading in parallel is faster from about {round(crossover / 1024 / 1024, 1)} MB, "
+              f"PARALLEL_LOAD_MIN_BYTES is {export.PARALLEL_LOAD_MIN_BYTES // 1024 // 1024} MB")
+
+
+if __name__ == "__main__":
+    main()
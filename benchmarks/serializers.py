@@ -0,0 +1,67 @@
+import json
+import time
+import click
+from typing import Callable, Dict, List
+import serializer
+import sptfy
+from benchmarks.models import build_songs
+
+
+def get_obj_dict_by_attributes(obj) -> Dict:
+    # How objects were converted before the per-class converters, walking the slots of every object
+    if hasattr(obj, "__dict__"):
+        return obj.__dict__
+    return {name: getattr(obj, name) for cls in reversed(type(obj).__mro__) for name in getattr(cls, "__slots__", ())}
+
+
+def build_library(num_songs: int, playlist_size: int) -> List[sptfy.PlaylistWithSongs]:
+    songs = build_songs("slots", num_songs)
+    playlists = []
+    for index, start in enumerate(range(0, num_songs, playlist_size)):
+        playlist = sptfy.PlaylistNoSongs(
+            id=f"playlist{index}",
+            name=f"Playlist {index}",
+            description="",
+            total=len(songs[start:start + playlist_size]),
+            spotify_playlist_url=f"https://open.spotify.com/playlist/{index}",
+            owner_spotify_id="user",
+            snapshot_id="snapshot"
+        )
+        playlists.append(sptfy.PlaylistWithSongs(playlist, songs[start:start + playlist_size]))
+    return playlists
+
+
+def get_encoders() -> Dict[str, Callable[[List, bool], str]]:
+    encoders = {
+        "attributes": lambda playlists, compact: json.dumps(playlists, default=get_obj_dict_by_attributes,
+                                                            **({"separators": (",", ":")} if compact
+                                                               else {"indent": 4})),
+        serializer.JSON_BACKEND: serializer.BACKENDS[serializer.JSON_BACKEND].dumps,
+    }
+    if serializer.serializer.orjson is not None:
+        encoders[serializer.ORJSON_BACKEND] = serializer.BACKENDS[serializer.ORJSON_BACKEND].dumps
+    return encoders
+
+
+@click.command(help="Measure how long encoding a library of synthetic songs takes with each serializer. "
+                    "Run from the repository root with: python -m benchmarks.serializers")
+@click.option("--songs", "num_songs", default=100_000, type=int, help="Number of songs in the library")
+@click.option("--playlist-size", default=1000, type=int, help="Number of songs per playlist")
+@click.option("--repeat", default=3, type=int, help="Number of times each encoder is run, the fastest run is kept")
+def main(num_songs: int, playlist_size: int, repeat: int) -> None:
+    playlists = build_library(num_songs, playlist_size)
+
+    print(f"{'encoder':>12} {'compact':>8} {'seconds':>9} {'size_mb':>9}")
+    for name, encode in get_encoders().items():
+        for compact in [False, True]:
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = encode(playlists, compact)
+                durations.append(time.perf_counter() - start)
+            print(f"{name:>12} {str(compact):>8} {round(min(durations), 3):>9} "
+                  f"{round(len(output.encode('utf-8')) / 1024 / 1024, 1):>9}")
+
+
+if __name__ == "__main__":
+    main()
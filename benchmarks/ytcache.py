@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+import click
+import export
+from benchmarks.serializers import build_library
+from helpers import gc_paused
+from ytmusic.ytmusic import YTMusicCache
+
+
+def preload(filename: str) -> dict:
+    # What `--with-youtube-url-cache-from` does with the entries, without creating a Youtube Music client
+    cache = {}
+    entries = export.load_youtube_url_cache_entries(filename)
+    with gc_paused():
+        for entry in entries:
+            if entry.youtube_url is not None:
+                cache[entry.spotify_url] = YTMusicCache(entry.youtube_url, entry.youtube_url_validated,
+                                                        entry.youtube_url_permanently_skip)
+    return cache
+
+
+@click.command(help="Measure how long preloading the Youtube URL cache takes from an export and from its sidecar. "
+                    "Run from the repository root with: python -m benchmarks.ytcache")
+@click.option("--songs", "num_songs", default=120_000, type=int, help="Number of songs in the export")
+@click.option("--playlist-size", default=1000, type=int, help="Number of songs per playlist")
+@click.option("--repeat", default=3, type=int, help="Number of times each file is preloaded, the fastest run is kept")
+def main(num_songs: int, playlist_size: int, repeat: int) -> None:
+    playlists = build_library(num_songs, playlist_size)
+    for playlist in playlists:
+        for index, song in enumerate(playlist.songs):
+            song.youtube_url = f"https://music.youtube.com/watch?v={playlist.id}-{index}"
+            song.youtube_url_validated = index % 2 == 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "playlists.json")
+        export.write_playlists(filename, playlists)
+        export.write_ytcache(export.get_ytcache_filename(filename), playlists)
+
+        print(f"{'source':>8} {'size_mb':>9} {'seconds':>9}")
+        for name, path in (("export", filename), ("sidecar", export.get_ytcache_filename(filename))):
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                preload(path)
+                durations.append(time.perf_counter() - start)
+            print(f"{name:>8} {round(os.path.getsize(path) / 1024 / 1024, 1):>9} {round(min(durations), 3):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import commands.auth
 import commands.configure
+import commands.convert
+import commands.export
 import commands.playlist
 import commands.user_top
 import commands.validate
@@ -0,0 +1,32 @@
+import click
+import sys
+from export import (load_export, write_playlists, is_export_filename, get_export_filename_error, EXPORT_VERSION_1,
+                    EXPORT_VERSION_2)
+from log import logger
+
+
+@click.command(help="Convert a file generated by the playlist download command to another export version")
+@click.option("--input-filename", required=True, type=click.Path(exists=True, readable=True, file_okay=True,
+              dir_okay=False), help="The filename of the file to convert")
+@click.option("--output-filename", required=True, help="The filename where the converted file will be stored")
+@click.option("--export-version", required=True, type=click.IntRange(EXPORT_VERSION_1, EXPORT_VERSION_2),
+              help=f"The version to convert to. Version {EXPORT_VERSION_1} repeats every song in each playlist, "
+                   f"version {EXPORT_VERSION_2} stores every song once in a `tracks` table.")
+def convert(input_filename: str, output_filename: str, export_version: int):
+    logger.debug("'convert' command invoked")
+    if output_filename.strip() == "":
+        print(f"ERROR: Output filename cannot be blank or null!")
+        sys.exit(1)
+    elif not is_export_filename(output_filename.strip()):
+        print(f"ERROR: Output filename {get_export_filename_error(output_filename.strip())}")
+        sys.exit(1)
+
+    try:
+        playlists, input_export_version = load_export(input_filename)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    logger.info(f"Converting '{input_filename}' from version {input_export_version} to version {export_version}")
+    write_playlists(output_filename, playlists, export_version)
+    print(f"Converted {len(playlists)} playlists to version {export_version} in {output_filename}")
@@ -0,0 +1,36 @@
+import click
+import os
+import sys
+from export import (load_playlists_from_store, write_playlists, get_store_path, is_export_filename,
+                    get_export_filename_error, EXPORT_VERSION_1, EXPORT_VERSION_2)
+from log import logger
+
+
+@click.command(help="Write the playlists of a SQLite database written by the playlist download command to a file in "
+                    "the same format as the playlist download command")
+@click.option("--store", required=True, help="The database to read from, e.g. `sqlite:///library.db`")
+@click.option("--filename", required=True, help="The filename where the playlists will be stored")
+@click.option("--export-version", default=EXPORT_VERSION_1, type=click.IntRange(EXPORT_VERSION_1, EXPORT_VERSION_2),
+              help=f"The format of the file. Version {EXPORT_VERSION_2} stores every song once in a `tracks` table.")
+@click.option("--compact", default=False, is_flag=True, help="Write the file without indentation")
+def export(store: str, filename: str, export_version: int, compact: bool):
+    logger.debug("'export' command invoked")
+    try:
+        store_path = get_store_path(store)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if not os.path.isfile(store_path):
+        print(f"ERROR: Store '{store_path}' does not exist!")
+        sys.exit(1)
+
+    if filename.strip() == "":
+        print(f"ERROR: Filename cannot be blank or null!")
+        sys.exit(1)
+    elif not is_export_filename(filename.strip()):
+        print(f"ERROR: Filename {get_export_filename_error(filename.strip())}")
+        sys.exit(1)
+
+    playlists = load_playlists_from_store(store)
+    write_playlists(filename, playlists, export_version, compact=compact)
+    print(f"Exported {len(playlists)} playlists from {store} to {filename}")
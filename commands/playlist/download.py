@@ -1,52 +1,103 @@
 import concurrent.futures
-import json
+import heapq
 import signal
 import sys
 import threading
+import time
 import click
-from itertools import repeat
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator, Iterable
 from commands.playlist.shared import filter_playlists
-from helpers import time_taken, get_obj_dict
+from export import (load_playlists, load_youtube_url_cache_entries, write_playlists, write_playlists_to_store,
+                    get_store_path, is_export_filename, get_export_filename_error, EXPORT_VERSION_1, EXPORT_VERSION_2,
+                    EXPORT_FORMATS, JSON_FORMAT, NDJSON_FORMAT, get_ytcache_filename, write_ytcache)
+from helpers import gc_paused, get_youtube_url_cache_file_path, time_taken
 from log import logger
-from sptfy import Sptfy, get_sptfy, PlaylistWithSongs, PlaylistNoSongs, Song, Album, AlbumImage, ExternalIds
+from serializer import BACKENDS, JSON_BACKEND, ORJSON_BACKEND
+from sptfy import Sptfy, get_sptfy, FIELDS_PROFILE_FULL, LIKED_SONGS_PLAYLIST_ID, PlaylistWithSongs, PlaylistNoSongs, Song
 from datetime import datetime
 
-from ytmusic import YTM
+from ytmusic import YTM, YTMusicCache, YoutubeUrlCache, get_isrc, YOUTUBE_URL_CACHE_TTL_SECONDS
+
+PLAYLIST_DOWNLOAD_WORKERS = 3
+YOUTUBE_URL_WORKERS = 6
+# Songs are searched one at a time, progress is only printed every so many of them
+YOUTUBE_URL_PROGRESS_INTERVAL = 100
 
 
 @click.command()
-@click.option("--filename", default=None, help="The filename desired")
+@click.option("--filename", default=None,
+              help="The filename desired. Ending it with '.json.gz' or '.json.zst' compresses the file while it is "
+                   "written, '.json.zst' requires the 'zstandard' module.")
 @click.option("--show-progress", default=False, is_flag=True,
               help="Show how many have been completed out of the total amount")
 @click.option("--with-youtube-url", default=False, is_flag=True, help="Find and search for the Youtube Music URL")
 @click.option("--with-youtube-url-cache-from", default=None,
-              help="Preload the cache with Youtube URLs from a previously generated file. Null entries will be "
-                   "skipped and not loaded. Only takes effect when the `--with-youtube-url` flag is used.")
+              help="Preload the cache with Youtube URLs from a previously generated file, its '.ytcache' sidecar or a "
+                   "directory of sidecars. Sidecars are merged with the newest entries winning, but a validated URL is "
+                   "never replaced by an unvalidated one. Null entries will be skipped and not loaded. Only takes "
+                   "effect when the `--with-youtube-url` flag is used.")
 @click.option("--with-youtube-url-cache-unvalidated", default=False, is_flag=True,
               help="Use unvalidated Youtube URLs from previously generated file. Only takes effect when the "
                    "`--with-youtube-url-cache-from` flag is used.")
+@click.option("--youtube-url-workers", default=YOUTUBE_URL_WORKERS, type=click.IntRange(min=1),
+              help="Number of songs searched on Youtube Music at once, each with its own Youtube Music client.")
+@click.option("--no-youtube-url-cache", default=False, is_flag=True,
+              help=f"Don't use the Youtube URLs found by previous runs and don't keep the ones found by this run. "
+                   f"They are kept in a SQLite database in the configuration directory, Youtube URLs that haven't "
+                   f"been validated and songs that couldn't be found are searched again after "
+                   f"{YOUTUBE_URL_CACHE_TTL_SECONDS // (24 * 60 * 60)} days.")
 @click.option("--filter-owned", default=False, is_flag=True,
               help="Grab playlists that are owned. Filters are evaluated as `OR` conditions.")
+@click.option("--incremental-from", default=None,
+              type=click.Path(exists=True, readable=True, file_okay=True, dir_okay=False),
+              help="A previously generated file. Playlists whose snapshot id has not changed since that file was "
+                   "generated reuse its songs instead of being downloaded again.")
+@click.option("--compact", default=False, is_flag=True, help="Write the file without indentation")
+@click.option("--serializer", default=JSON_BACKEND, type=click.Choice(list(BACKENDS.keys())),
+              help=f"The JSON library used to write the file. '{ORJSON_BACKEND}' is faster but has to be installed "
+                   f"separately and indents with 2 spaces instead of 4.")
+@click.option("--export-version", default=EXPORT_VERSION_1, type=click.IntRange(EXPORT_VERSION_1, EXPORT_VERSION_2),
+              help=f"The format of the file. Version {EXPORT_VERSION_2} stores every song once in a `tracks` table "
+                   f"and playlists only refer to them, which makes the file a lot smaller.")
+@click.option("--format", "export_format", default=JSON_FORMAT, type=click.Choice(EXPORT_FORMATS),
+              help=f"'{NDJSON_FORMAT}' writes one record per line, a line for each playlist followed by a line for each "
+                   f"of its songs, instead of a single JSON array. The filename has to end with '.{NDJSON_FORMAT}'.")
+@click.option("--store", default=None,
+              help="Write the playlists into a SQLite database instead of a file, e.g. `sqlite:///library.db`. "
+                   "Playlists that are no longer downloaded are removed from the database.")
 @time_taken
 def download(filename: str, show_progress: bool, with_youtube_url: bool, with_youtube_url_cache_from: str,
-             with_youtube_url_cache_unvalidated: bool, filter_owned: bool) -> None:
+             with_youtube_url_cache_unvalidated: bool, youtube_url_workers: int, no_youtube_url_cache: bool,
+             filter_owned: bool, incremental_from: Optional[str],
+             compact: bool, serializer: str, export_version: int, export_format: str, store: Optional[str]) -> None:
     logger.debug(f"'playlist' 'download' subcommand invoked")
 
     sptfy = get_sptfy()
     logger.debug(f"Retrieve or validate filename")
-    if filename is None:
-        filename = get_filename(sptfy)
+    if store is not None:
+        if filename is not None:
+            print(f"ERROR: `--filename` and `--store` cannot be used together!")
+            sys.exit(1)
+        try:
+            get_store_path(store)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+    elif export_format == NDJSON_FORMAT and export_version != EXPORT_VERSION_1:
+        print(f"ERROR: `--export-version` cannot be used with `--format {NDJSON_FORMAT}`!")
+        sys.exit(1)
+    elif filename is None:
+        filename = get_filename(sptfy, export_format)
     elif filename.strip() == "":
         print(f"ERROR: Filename cannot be blank or null!")
         sys.exit(1)
-    elif not filename.strip().endswith('.json'):
-        print(f"ERROR: Filename must end with '.json'")
+    elif not is_export_filename(filename.strip(), export_format):
+        print(f"ERROR: Filename {get_export_filename_error(filename.strip(), export_format)}")
         sys.exit(1)
     else:
         filename = filename
 
-    print(f"The filename will be {filename}")
+    print(f"The store will be {store}" if store is not None else f"The filename will be {filename}")
 
     logger.debug(f"Retrieve list of playlists without songs")
     playlists_no_songs = sptfy.get_all_playlists_no_songs()
@@ -55,60 +106,154 @@ def download(filename: str, show_progress: bool, with_youtube_url: bool, with_yo
     current_user_id = sptfy.get_user_id()
     playlists_no_songs = filter_playlists(current_user_id, playlists_no_songs, filter_owned)
 
+    previous_playlists = {}
+    if incremental_from is not None:
+        logger.info(f"Loading previously generated file '{incremental_from}'")
+        previous_playlists = {playlist.id: playlist for playlist in load_playlists(incremental_from)}
+
     num_playlists = len(playlists_no_songs) + 1  # There is a +1 for liked songs
-    playlists = get_playlists_with_songs(
+    playlists: Iterable[PlaylistWithSongs] = iter_playlists_with_songs(
         num_playlists=num_playlists,
         playlists_no_songs=playlists_no_songs,
         sptfy=sptfy,
-        show_progress=show_progress
+        show_progress=show_progress,
+        previous_playlists=previous_playlists
     )
 
     if with_youtube_url:
+        playlists = list(playlists)
         modify_playlists_with_songs_youtube_url(playlists, show_progress,
                                                 with_youtube_url_cache_from,
-                                                with_youtube_url_cache_unvalidated)
-
-    with open(filename, 'w') as file:
+                                                with_youtube_url_cache_unvalidated,
+                                                None if no_youtube_url_cache else get_youtube_url_cache_file_path(),
+                                                youtube_url_workers)
+
+    # Without Youtube URLs every playlist is written as soon as it has been downloaded
+    if store is not None:
+        logger.info(f"Writing to store '{store}'")
+        write_playlists_to_store(store, playlists)
+    else:
         logger.info(f"Writing to file '{filename}' in the local directory")
-        file.write(json.dumps(playlists, indent=4, default=get_obj_dict))
-        logger.info(f"Number of playlists processed: {num_playlists} (There is a +1 for liked songs)")
+        write_playlists(filename, playlists, export_version=export_version, compact=compact,
+                        serializer_backend=serializer)
+        if with_youtube_url:
+            # Only the Youtube URLs of the songs, so a later download can preload its cache without reading the export
+            ytcache_filename = get_ytcache_filename(filename)
+            logger.info(f"Writing youtube url cache to '{ytcache_filename}'")
+            write_ytcache(ytcache_filename, playlists)
+    logger.info(f"Number of playlists processed: {num_playlists} (There is a +1 for liked songs)")
+    sptfy.track_registry.log_dedup_ratios()
 
     print("Finished!")
 
 
-def get_filename(sptfy: Sptfy) -> str:
+def get_filename(sptfy: Sptfy, export_format: str = JSON_FORMAT) -> str:
     date = datetime.now()
     user_id = sptfy.get_user_id()
-    filename = f"playlists-{user_id}-{date.strftime('%Y_%m_%dT%H_%M_%S')}.json"
+    filename = f"playlists-{user_id}-{date.strftime('%Y_%m_%dT%H_%M_%S')}.{export_format}"
     return filename
 
 
 def get_playlists_with_songs(num_playlists: int, playlists_no_songs: List[PlaylistNoSongs], sptfy: Sptfy,
-                             show_progress: True) -> List[PlaylistWithSongs]:
+                             show_progress: True,
+                             previous_playlists: Optional[Dict[str, PlaylistWithSongs]] = None
+                             ) -> List[PlaylistWithSongs]:
+    return list(iter_playlists_with_songs(num_playlists, playlists_no_songs, sptfy, show_progress, previous_playlists))
+
+
+def iter_playlists_with_songs(num_playlists: int, playlists_no_songs: List[PlaylistNoSongs], sptfy: Sptfy,
+                              show_progress: True,
+                              previous_playlists: Optional[Dict[str, PlaylistWithSongs]] = None
+                              ) -> Iterator[PlaylistWithSongs]:
     count = 0
-    playlists = []
+    if previous_playlists is None:
+        previous_playlists = {}
+
+    # Largest playlists are handed out first so a large playlist isn't left running on its own at the end,
+    # the results are put back in their original order. One of the workers is busy with liked songs.
+    costs = [get_playlist_download_cost(playlist, previous_playlists) for playlist in playlists_no_songs]
+    schedule = sorted(range(len(playlists_no_songs)), key=lambda index: costs[index], reverse=True)
+    logger.debug(f"Predicted makespan: {get_predicted_makespan(costs, PLAYLIST_DOWNLOAD_WORKERS - 1)} songs on the "
+                 f"busiest worker, {sum(costs)} songs in total")
+    start = time.time()
+    # Songs downloaded by every worker and when the last playlist was downloaded, recorded by the workers themselves so
+    # the time spent by the caller on the playlists handed back isn't counted
+    worker_costs: Dict[int, int] = {}
+    finished_at = [start]
+    finished_lock = threading.Lock()
+
+    def download_playlist(index: int) -> PlaylistWithSongs:
+        playlist = get_or_reuse_playlist_with_songs(playlists_no_songs[index], sptfy, previous_playlists)
+        worker = threading.get_ident()
+        with finished_lock:
+            worker_costs[worker] = worker_costs.get(worker, 0) + costs[index]
+            finished_at[0] = max(finished_at[0], time.time())
+        return playlist
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=PLAYLIST_DOWNLOAD_WORKERS) as executor:
+        # Liked songs are retrieved alongside the playlists but are still added last
+        logger.debug(f"Retrieve liked songs")
+        liked_songs_task = executor.submit(
+            sptfy.get_saved_tracks_as_playlist,
+            previous_liked_songs=previous_playlists.get(LIKED_SONGS_PLAYLIST_ID)
+        )
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
         logger.debug(f"Retrieve playlists with their songs")
-        tasks = executor.map(get_playlist_with_songs, playlists_no_songs, repeat(sptfy))
-        for task in tasks:
-            playlists.append(task)
+        tasks: List[Optional[concurrent.futures.Future]] = [None] * len(playlists_no_songs)
+        for index in schedule:
+            tasks[index] = executor.submit(download_playlist, index)
+
+        # Handed back in their original order as soon as they are done, and not kept here afterwards
+        for index in range(len(tasks)):
+            playlist = tasks[index].result()
+            tasks[index] = None
             count += 1
             if show_progress:
                 print(f"Downloaded playlists: {count}/{num_playlists} completed")
+            yield playlist
+        logger.debug(f"Actual makespan: {max(worker_costs.values(), default=0)} songs on the busiest worker, "
+                     f"the playlists were downloaded in {round(finished_at[0] - start, 2)} seconds")
+
+        liked_songs = liked_songs_task.result()
+        count += 1
+        print(f"Downloaded playlists: {count}/{num_playlists} completed")
+        yield liked_songs
+
+
+def get_playlist_download_cost(playlist: PlaylistNoSongs, previous_playlists: Dict[str, PlaylistWithSongs]) -> int:
+    if is_playlist_unchanged(playlist, previous_playlists):
+        return 0
+    return playlist.total
 
-    logger.debug(f"Retrieve liked songs")
-    liked_songs = sptfy.get_saved_tracks_as_playlist()
-    playlists.append(liked_songs)
-    count += 1
-    print(f"Downloaded playlists: {count}/{num_playlists} completed")
 
-    return playlists
+def get_predicted_makespan(costs: List[int], num_workers: int) -> int:
+    # Longest processing time first, every playlist goes to the worker with the least work so far
+    workers = [0] * max(num_workers, 1)
+    for cost in sorted(costs, reverse=True):
+        heapq.heappush(workers, heapq.heappop(workers) + cost)
+    return max(workers)
+
+
+def is_playlist_unchanged(playlist: PlaylistNoSongs, previous_playlists: Dict[str, PlaylistWithSongs]) -> bool:
+    previous_playlist = previous_playlists.get(playlist.id)
+    return (previous_playlist is not None and playlist.snapshot_id is not None and
+            previous_playlist.snapshot_id == playlist.snapshot_id)
+
+
+def get_or_reuse_playlist_with_songs(playlist: PlaylistNoSongs, sptfy: Sptfy,
+                                     previous_playlists: Dict[str, PlaylistWithSongs]) -> PlaylistWithSongs:
+    if is_playlist_unchanged(playlist, previous_playlists):
+        logger.debug(f"Playlist '{playlist.id}' is unchanged since the previous file, reusing its songs")
+        return PlaylistWithSongs(
+            playlist=playlist,
+            songs=previous_playlists[playlist.id].songs
+        )
+    return get_playlist_with_songs(playlist, sptfy)
 
 
 def get_playlist_with_songs(playlist: PlaylistNoSongs, sptfy: Sptfy) -> PlaylistWithSongs:
     logger.debug(f"Retrieve song for playlist")
-    songs: List[Song] = sptfy.get_playlist_content(playlist_id=playlist.id)
+    songs: List[Song] = sptfy.get_playlist_content(playlist_id=playlist.id, fields_profile=FIELDS_PROFILE_FULL)
     playlist_with_songs = PlaylistWithSongs(
         playlist=playlist,
         songs=songs
@@ -118,11 +263,19 @@ def get_playlist_with_songs(playlist: PlaylistNoSongs, sptfy: Sptfy) -> Playlist
 
 def modify_playlists_with_songs_youtube_url(playlists: List[PlaylistWithSongs], show_progress: bool,
                                             youtube_url_cache_file: Optional[str],
-                                            use_unvalidated_url_from_youtube_url_cache: bool):
+                                            use_unvalidated_url_from_youtube_url_cache: bool,
+                                            persistent_cache_file: Optional[str] = None,
+                                            num_workers: int = YOUTUBE_URL_WORKERS):
     logger.debug("Adding youtube urls to songs")
-    ytm = YTM()
+    youtube_url_cache = None
+    if persistent_cache_file is not None:
+        logger.debug(f"Using youtube url cache '{persistent_cache_file}'")
+        youtube_url_cache = YoutubeUrlCache(persistent_cache_file)
+    # Every worker gets a Youtube Music client of its own
+    ytm = YTM(youtube_url_cache, num_clients=num_workers)
     if youtube_url_cache_file is not None:
         preload_youtube_url_cache(ytm, youtube_url_cache_file, use_unvalidated_url_from_youtube_url_cache)
+    seed_youtube_url_cache(ytm, playlists, use_unvalidated_url_from_youtube_url_cache)
 
     interrupt_event = threading.Event()
 
@@ -133,101 +286,125 @@ def modify_playlists_with_songs_youtube_url(playlists: List[PlaylistWithSongs],
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
+    # Every track is searched once on its own, however large its playlists are and however many it is in, and the
+    # result is written to all of its songs
+    tracks = group_songs_by_track(playlists)
+    num_tracks = len(tracks)
+    logger.info(f"Number of unique songs to add a Youtube URL to: {num_tracks} "
+                f"({sum(len(songs) for songs in tracks.values())} songs in total)")
+    # Tracks of the same recording are looked up one after the other by the same worker, so only the first one is
+    # searched and the others are found by their ISRC
+    recordings = group_tracks_by_isrc(tracks.values())
     count = 0
-    num_playlists = len(playlists)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
-        logger.debug(f"Retrieve playlists with their songs")
-        tasks = executor.map(add_youtube_url_to_songs, playlists, repeat(ytm), repeat(interrupt_event))
-        try:
-            for task in tasks:
-                count += 1
-                if show_progress:
-                    print(f"Added Youtube URL for playlists' songs: {count}/{num_playlists} completed")
-        except KeyboardInterrupt:
-            interrupt_event.set()
-
-
-def add_youtube_url_to_songs(playlist: PlaylistWithSongs, ytm: YTM, interrupt_event: threading.Event):
-    logger.debug(f"add youtube urls for playlist '{playlist.id}'")
-    for song in playlist.songs:
-        if interrupt_event.is_set():
-            logger.warning(f"interrupted playlist '{playlist.name}")
-            return playlist
-        cache_value = ytm.get_youtube_url(song)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+            logger.debug(f"Search the Youtube URL of every unique song")
+            tasks = {executor.submit(get_recording_youtube_urls, recording, ytm, interrupt_event): recording
+                     for recording in recordings}
+            try:
+                for task in concurrent.futures.as_completed(tasks):
+                    for songs, cache_value in zip(tasks[task], task.result()):
+                        if cache_value is not None:
+                            set_songs_youtube_url(songs, cache_value)
+                    previous_count = count
+                    count += len(tasks[task])
+                    if show_progress and (count // YOUTUBE_URL_PROGRESS_INTERVAL >
+                                          previous_count // YOUTUBE_URL_PROGRESS_INTERVAL or count == num_tracks):
+                        print(f"Added Youtube URL for songs: {count}/{num_tracks} completed")
+            except KeyboardInterrupt:
+                interrupt_event.set()
+            if interrupt_event.is_set():
+                logger.warning(f"interrupted after {count}/{num_tracks} songs, the remaining songs have no Youtube URL")
+    finally:
+        # Searches done before an error are still kept for the next run
+        if youtube_url_cache is not None:
+            youtube_url_cache.close()
+
+    logger.info(f"Number of duplicate Youtube Music lookups waiting on a lookup in flight: {ytm.suppressed_lookups}")
+    logger.info(f"Number of songs matched by the ISRC of another song: {ytm.isrc_hits}")
+    for stats in ytm.client_pool.get_stats():
+        logger.info(f"Youtube Music client {stats.client}: {stats.searches} searches, "
+                    f"{round(stats.get_average_seconds() * 1000)} ms on average, "
+                    f"{round(stats.slowest_seconds * 1000)} ms for the slowest")
+    if youtube_url_cache is not None:
+        print(f"Youtube URL cache: {youtube_url_cache.hits} hits, {youtube_url_cache.misses} misses "
+              f"({youtube_url_cache.expired} expired)")
+
+
+def group_songs_by_track(playlists: Iterable[PlaylistWithSongs]) -> Dict[Optional[str], List[Song]]:
+    # Grouped by the key of the Youtube URL cache, in the order the tracks are first found
+    tracks: Dict[Optional[str], List[Song]] = {}
+    for playlist in playlists:
+        for song in playlist.songs:
+            tracks.setdefault(song.spotify_url, []).append(song)
+    return tracks
+
+
+def group_tracks_by_isrc(tracks: Iterable[List[Song]]) -> List[List[List[Song]]]:
+    # Tracks without an ISRC are a recording of their own
+    recordings: Dict[str, List[List[Song]]] = {}
+    grouped = []
+    for songs in tracks:
+        isrc = get_isrc(songs[0])
+        if isrc is None:
+            grouped.append([songs])
+        elif isrc in recordings:
+            recordings[isrc].append(songs)
+        else:
+            recordings[isrc] = [songs]
+            grouped.append(recordings[isrc])
+    return grouped
+
+
+def get_recording_youtube_urls(recording: List[List[Song]], ytm: YTM,
+                               interrupt_event: threading.Event) -> List[Optional[YTMusicCache]]:
+    return [get_track_youtube_url(songs[0], ytm, interrupt_event) for songs in recording]
+
+
+def get_track_youtube_url(song: Song, ytm: YTM, interrupt_event: threading.Event) -> Optional[YTMusicCache]:
+    if interrupt_event.is_set():
+        return None
+    return ytm.get_youtube_url(song)
+
+
+def set_songs_youtube_url(songs: Iterable[Song], cache_value: YTMusicCache) -> None:
+    for song in songs:
         song.youtube_url = cache_value.youtube_url
         song.youtube_url_validated = cache_value.youtube_url_validated
         song.youtube_url_permanently_skip = cache_value.youtube_url_permanently_skip
 
 
+def seed_youtube_url_cache(ytm: YTM, playlists: Iterable[PlaylistWithSongs], use_unvalidated_url: bool) -> None:
+    # Songs reused from the previous file still have their Youtube URL, they are kept the same way the URLs of a
+    # youtube url cache file are so they aren't replaced by a new search. An unvalidated URL doesn't replace a
+    # preloaded one
+    with gc_paused():
+        for playlist in playlists:
+            for song in playlist.songs:
+                if song.spotify_url is None or song.youtube_url is None:
+                    continue
+                if song.youtube_url_validated or (use_unvalidated_url and song.spotify_url not in ytm.cache):
+                    ytm.add_to_cache(song.spotify_url, song.youtube_url, song.youtube_url_validated,
+                                     song.youtube_url_permanently_skip, get_isrc(song))
+
+
 def preload_youtube_url_cache(ytm: YTM, filename: str, use_unvalidated_url: bool):
     print("Preloading youtube url cache")
     if use_unvalidated_url:
         print("`--with-youtube-url-cache-unvalidated` flag used, adding unvalidated URLs to cache")
     try:
-        with open(filename, "r") as f:
-            data = json.load(f)
-        songs = []
-        for item in data:
-            item_songs = item["songs"]
-            for item_song in item_songs:
-                album = None
-                if "album" in item_song:
-                    album_name = item_song["album"]["name"]
-                    album_artists = item_song["album"]["artists"]
-                    album_release_date = item_song["album"]["release_date"]
-                    album_images = [AlbumImage(url=image["url"], height=image["height"], width=image["width"]) for image in item_song["album"]["images"]]
-                    album = Album(name=album_name, artists=album_artists, release_date=album_release_date, images=album_images)
-                
-                track_number = None
-                if "track_number" in item_song:
-                    track_number = item_song["track_number"]
-                
-                disc_number = None
-                if "disc_number" in item_song:
-                    disc_number = item_song["disc_number"]
-
-                duration_ms = None
-                if "duration_ms" in item_song:
-                    duration_ms = item_song["duration_ms"]
-
-                external_ids = None
-                if "external_ids" in item_song:
-                    isrc = item_song["external_ids"]["isrc"] if "isrc" in item_song["external_ids"] else None
-                    ean = item_song["external_ids"]["ean"] if "ean" in item_song["external_ids"] else None
-                    upc = item_song["external_ids"]["upc"] if "upc" in item_song["external_ids"] else None
-                    external_ids = ExternalIds(
-                        isrc=isrc,
-                        ean=ean,
-                        upc=upc
-                    )
-
-                song_name = item_song["name"]
-                song_artists = item_song["artists"]
-                song_spotify_url = item_song["spotify_url"]
-                song_youtube_url = item_song["youtube_url"]
-                song_youtube_url_validated = item_song["youtube_url_validated"]
-                song_youtube_url_permanently_skip = item_song.get("youtube_url_permanently_skip", False)
-
-                songs.append(Song(
-                    name=song_name,
-                    artists=song_artists,
-                    album=album,
-                    track_number=track_number,
-                    disc_number=disc_number,
-                    duration_ms=duration_ms,
-                    external_ids=external_ids,
-                    spotify_url=song_spotify_url,
-                    youtube_url=song_youtube_url,
-                    youtube_url_validated=song_youtube_url_validated,
-                    youtube_url_permanently_skip=song_youtube_url_permanently_skip
-                ))
-
-        for song in songs:
-            if song.youtube_url is None:
-                continue
-            if song.youtube_url_validated or use_unvalidated_url:
-                ytm.add_to_cache(song.spotify_url, song.youtube_url, song.youtube_url_validated, song.youtube_url_permanently_skip)
+        entries = load_youtube_url_cache_entries(filename)
+        with gc_paused():
+            for entry in entries:
+                if entry.youtube_url is None:
+                    continue
+                if entry.youtube_url_validated or use_unvalidated_url:
+                    ytm.add_to_cache(entry.spotify_url, entry.youtube_url, entry.youtube_url_validated,
+                                     entry.youtube_url_permanently_skip, entry.isrc)
 
     except FileNotFoundError:
         logger.error(f"file: {filename} could not be found")
         sys.exit(1)
+    except ValueError as e:
+        logger.error(f"file: {filename} could not be read, {e}")
+        sys.exit(1)
@@ -1,6 +1,6 @@
 import click
 
-from commands.playlist.shared import filter_playlists
+from commands.playlist.shared import iter_filter_playlists
 from helpers import time_taken, get_longest_string
 from log import logger
 from sptfy import get_sptfy
@@ -16,18 +16,23 @@ def list(show_id: bool, filter_owned) -> None:
 
     sptfy = get_sptfy()
 
-    playlists_no_songs = sptfy.get_all_playlists_no_songs()
     current_user_id = sptfy.get_user_id()
-    playlists_no_songs = filter_playlists(current_user_id, playlists_no_songs, filter_owned)
+    playlists_no_songs = iter_filter_playlists(current_user_id, sptfy.iter_all_playlists_no_songs(), filter_owned)
 
+    if not show_id:
+        # Nothing to align, so playlists are printed as soon as their page arrives
+        logger.debug(f"Showing playlist names")
+        for playlist in playlists_no_songs:
+            print(playlist.name)
+        return
+
+    playlists_no_songs = [playlist for playlist in playlists_no_songs]
     longest_playlist_name = get_longest_string([playlist.name for playlist in playlists_no_songs])
     longest_playlist_id = get_longest_string([playlist.id for playlist in playlists_no_songs])
 
     logger.debug(f"Showing playlist names")
-    if show_id:
-        logger.debug(f"Showing playlist Ids")
+    logger.debug(f"Showing playlist Ids")
     for playlist in playlists_no_songs:
         print(f"{playlist.name:<{longest_playlist_name}}", end="")
-        if show_id:
-            print(f"\t{playlist.id:<{longest_playlist_id}}", end="")
+        print(f"\t{playlist.id:<{longest_playlist_id}}", end="")
         print()
@@ -1,18 +1,19 @@
-from typing import List
+from typing import List, Iterable, Iterator
 from log import logger
 from sptfy import PlaylistNoSongs
 
 
 def filter_playlists(user_id: str, playlists: List[PlaylistNoSongs], filter_owned: bool) -> List[PlaylistNoSongs]:
     logger.debug("Filtering playlists")
-    if not any([filter_owned]):
-        return playlists
+    return list(iter_filter_playlists(user_id, playlists, filter_owned))
 
-    filtered_playlists = []
 
-    owned_playlists = []
-    if filter_owned:
-        owned_playlists = [playlist for playlist in playlists if playlist.owner_spotify_id == user_id]
-    filtered_playlists.extend(owned_playlists)
+def iter_filter_playlists(user_id: str, playlists: Iterable[PlaylistNoSongs],
+                          filter_owned: bool) -> Iterator[PlaylistNoSongs]:
+    if not any([filter_owned]):
+        yield from playlists
+        return
 
-    return filtered_playlists
+    for playlist in playlists:
+        if filter_owned and playlist.owner_spotify_id == user_id:
+            yield playlist
@@ -1,32 +1,61 @@
 import sys
 import click
+from typing import Optional
+from export import load_indexed_playlist
 from helpers import time_taken, get_longest_string
 from log import logger
-from sptfy import get_sptfy
+from sptfy import get_sptfy, FIELDS_PROFILE_MINIMAL
 
 
 @click.command()
 @click.option("--playlist-id", required=True, help="The Id of the playlist to show")
 @click.option("--show-url", default=False, is_flag=True, help="If the song urls should be shown when listing")
 @click.option("--show-artists", default=False, is_flag=True, help="If the artists should be shown when listing")
+@click.option("--from-file", default=None,
+              type=click.Path(exists=True, readable=True, file_okay=True, dir_okay=False),
+              help="Show the playlist from a file generated by the playlist download command instead of Spotify. "
+                   "An index of the playlists is written next to the file the first time, so that only the requested "
+                   "playlist is read afterwards.")
 @time_taken
-def show(playlist_id: str, show_url: bool, show_artists: bool):
+def show(playlist_id: str, show_url: bool, show_artists: bool, from_file: Optional[str]):
     if playlist_id is None or playlist_id.strip() == "":
         print("ERROR: Invalid playlist id, cannot be None or empty!")
 
-    sptfy = get_sptfy()
-
-    logger.debug(f"Validate playlist id")
     playlist_id = playlist_id.strip()
-    if not sptfy.playlist_exists(playlist_id):
-        print(f"ERROR: Playlist Id could not be found!")
-        sys.exit(1)
+    if from_file is not None:
+        logger.debug(f"Retrieve playlist from file '{from_file}'")
+        try:
+            playlist = load_indexed_playlist(from_file, playlist_id)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        if playlist is None:
+            print(f"ERROR: Playlist Id could not be found!")
+            sys.exit(1)
+        songs = playlist.songs
+    else:
+        sptfy = get_sptfy()
+
+        logger.debug(f"Validate playlist id")
+        if not sptfy.playlist_exists(playlist_id):
+            print(f"ERROR: Playlist Id could not be found!")
+            sys.exit(1)
+
+        logger.debug(f"Retrieve playlist")
+        songs = sptfy.iter_playlist_content(playlist_id, fields_profile=FIELDS_PROFILE_MINIMAL)
+
+    if not show_url and not show_artists:
+        # Nothing to align, so songs are printed as soon as their page arrives
+        logger.debug(f"Showing playlist contents")
+        for song in songs:
+            print(song.name)
+        return
 
-    logger.debug(f"Retrieve playlist")
-    songs = sptfy.get_playlist_content(playlist_id)
+    songs = list(songs)
     longest_song_name = get_longest_string([song.name for song in songs])
     longest_artists = get_longest_string([','.join(song.artists) for song in songs])
-    longest_url = get_longest_string([song.spotify_url for song in songs])
+    # Songs read from a file can have no url
+    longest_url = get_longest_string([str(song.spotify_url) for song in songs])
 
     logger.debug(f"Showing playlist contents")
     if show_artists:
@@ -39,6 +68,6 @@ def show(playlist_id: str, show_url: bool, show_artists: bool):
         if show_artists:
             print(f"\t{','.join(song.artists):<{longest_artists}}", end="")
         if show_url:
-            print(f"\t{song.spotify_url:<{longest_url}}", end="")
+            print(f"\t{str(song.spotify_url):<{longest_url}}", end="")
 
         print()
\ No newline at end of file
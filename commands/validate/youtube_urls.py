@@ -1,10 +1,9 @@
-import json
 import os
 import sys
 from urllib.parse import urlparse
 
 import click
-from typing import List, Dict, Iterator
+from typing import List, Dict, Iterator, Optional
 from PySide6 import QtCore
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, \
     QLineEdit, QDialogButtonBox, QDialog
@@ -12,8 +11,9 @@ from PySide6.QtGui import QScreen, QFont, QPalette, QCursor
 from PySide6.QtCore import QUrl, QMargins, Qt
 from PySide6.QtWebEngineWidgets import QWebEngineView
 
-from helpers import get_obj_dict
-from sptfy import PlaylistWithSongs, Song, PlaylistNoSongs, Album, AlbumImage, ExternalIds
+from export import (load_export, write_playlists, is_export_filename, get_export_filename_error, get_store_path,
+                    LibraryStore, EXPORT_VERSION_1)
+from sptfy import PlaylistWithSongs, Song
 from log import logger
 
 
@@ -45,12 +45,14 @@ class OverwriteYoutubeUrlErrorDialog(QDialog):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, original_playlists: List[PlaylistWithSongs], songs_to_validate_iterator: Iterator[Song], output_filename: str, include_permanently_skipped: bool):
+    def __init__(self, original_playlists: List[PlaylistWithSongs], songs_to_validate_iterator: Iterator[Song], output_filename: str, include_permanently_skipped: bool, export_version: int = EXPORT_VERSION_1, store: Optional[LibraryStore] = None):
         super().__init__()
         self.setWindowTitle("Validate Youtube URLs")
         self.original_playlists = original_playlists
         self.songs_to_validate_iterator = songs_to_validate_iterator
         self.output_filename = output_filename
+        self.export_version = export_version
+        self.store = store
         self.include_permanently_skipped = include_permanently_skipped
 
         self.spotify_page = QWebEngineView()
@@ -119,7 +121,7 @@ class MainWindow(QMainWindow):
         self.next_song() # Call this here to get the first value from the iterator
 
     def is_valid_button_clicked(self):
-        self.original_playlists = update_validated_song(self.original_playlists, self.current_song_spotify_url, self.current_song_youtube_url, self.output_filename)
+        self.original_playlists = update_validated_song(self.original_playlists, self.current_song_spotify_url, self.current_song_youtube_url, self.output_filename, self.export_version, self.store)
         self.next_song()
 
     def skip_button_clicked(self):
@@ -127,7 +129,7 @@ class MainWindow(QMainWindow):
         self.next_song()
 
     def permanently_skip_button_clicked(self):
-        self.original_playlists = update_permanently_skipped_song(self.original_playlists, self.current_song_spotify_url, self.output_filename)
+        self.original_playlists = update_permanently_skipped_song(self.original_playlists, self.current_song_spotify_url, self.output_filename, self.export_version, self.store)
         self.next_song()
 
 
@@ -198,7 +200,7 @@ class MainWindow(QMainWindow):
 
         youtube_url = youtube_url.strip()
         self.original_playlists = overwrite_youtube_url(self.original_playlists, self.current_song_spotify_url, youtube_url)
-        self.original_playlists = update_validated_song(self.original_playlists, self.current_song_spotify_url, youtube_url, self.output_filename)
+        self.original_playlists = update_validated_song(self.original_playlists, self.current_song_spotify_url, youtube_url, self.output_filename, self.export_version, self.store)
         self.overwrite_entry_input.clear()
         self.next_song()
 
@@ -206,9 +208,12 @@ class MainWindow(QMainWindow):
 
 @click.command(help="Validate the Youtube URLs generated by the playlist download command and make sure it is the "
                     "same song as the one from spotify")
-@click.option("--input-filename", required=True, default=None, type=click.Path(exists=True, readable=True,
+@click.option("--input-filename", required=False, default=None, type=click.Path(exists=True, readable=True,
               file_okay=True, dir_okay=False),
               help="The filename of with the Youtube URLs to be validated")
+@click.option("--store", required=False, default=None,
+              help="Validate the songs of a SQLite database written by the playlist download command instead of a "
+                   "file, e.g. `sqlite:///library.db`. Every validation is saved to the database directly.")
 @click.option("--output-filename", required=False, default=None, type=click.Path(),
               help="The filename where the results will be stored. This can be the same as the original file, "
                    "but make sure to keep a copy of your original file in case of errors. If an output filename is not "
@@ -216,7 +221,14 @@ class MainWindow(QMainWindow):
                    "format of `validated_youtube_urls_<input-filename>`.")
 @click.option("--include-permanently-skipped", required=False, default=False, is_flag=True,
               help="Include the youtube urls that have been permenently skipped")
-def youtube_urls(input_filename: str, output_filename: str, include_permanently_skipped: bool):
+def youtube_urls(input_filename: str, store: Optional[str], output_filename: str, include_permanently_skipped: bool):
+    if (input_filename is None) == (store is None):
+        print(f"ERROR: Exactly one of `--input-filename` or `--store` is required!")
+        sys.exit(1)
+    elif store is not None:
+        validate_store(store, include_permanently_skipped)
+        return
+
     if output_filename is None:
         prefix = "validated_youtube_urls_"
         if os.path.basename(input_filename).startswith(prefix):
@@ -226,104 +238,48 @@ def youtube_urls(input_filename: str, output_filename: str, include_permanently_
     elif output_filename.strip() == "":
         print(f"ERROR: Output filename cannot be blank or null!")
         sys.exit(1)
-    elif not output_filename.strip().endswith('.json'):
-        print(f"ERROR: Output filename must end with '.json'")
+    elif not is_export_filename(output_filename.strip()):
+        print(f"ERROR: Output filename {get_export_filename_error(output_filename.strip())}")
         sys.exit(1)
 
-    original_playlists = load_playlists_file(input_filename)
+    # The validated file is written in the same format as the one it was read from
+    try:
+        original_playlists, export_version = load_export(input_filename)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
     songs_to_validate = get_songs_to_validate(original_playlists, include_permanently_skipped)
     iterator = get_songs_to_validate_iterator(songs_to_validate)
 
     app = QApplication()
-    window = MainWindow(original_playlists, iterator, output_filename, include_permanently_skipped)
+    window = MainWindow(original_playlists, iterator, output_filename, include_permanently_skipped, export_version)
     window.show()
     app.exec()
 
 
+def validate_store(store: str, include_permanently_skipped: bool):
+    try:
+        store_path = get_store_path(store)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if not os.path.isfile(store_path):
+        print(f"ERROR: Store '{store_path}' does not exist!")
+        sys.exit(1)
+
+    # Only the songs to validate are read, every validation updates their rows in the store directly
+    with LibraryStore(store_path) as library_store:
+        songs_to_validate = library_store.get_songs_to_validate(include_permanently_skipped)
+        iterator = get_songs_to_validate_iterator(songs_to_validate)
+
+        app = QApplication()
+        window = MainWindow([], iterator, None, include_permanently_skipped, store=library_store)
+        window.show()
+        app.exec()
+
+
 def load_playlists_file(filename: str) -> List[PlaylistWithSongs]:
-    with open(filename, "r") as f:
-        data = json.load(f)
-
-    playlists = []
-    for item in data:
-        playlist_id = item["id"]
-        playlist_name = item["name"]
-        playlist_total = item["total"]
-        spotify_playlist_url = item["spotify_playlist_url"]
-        playlist_owner_id = item["owner_spotify_id"]
-        playlist_description = ""
-        if "description" in item:
-            playlist_description = item["description"]
-        songs = []
-
-        for item_song in item["songs"]:
-            album_name = ""
-            album_artists = []
-            album_release_date = ""
-            album_images = []
-            if "album" in item_song:
-                item_album = item_song["album"]
-
-                if "name" in item_album:
-                    album_name = item_album["name"]
-                if "artists" in item_album:
-                    album_artists = item_album["artists"]
-                if "release_date" in item_album:
-                    album_release_date = item_album["release_date"]
-                if "images" in item_album:
-                    for image in item_album["images"]:
-                        album_images.append(AlbumImage(
-                            url=image["url"],
-                            height=image["height"],
-                            width=image["width"])
-                        )
-            
-            external_ids = None
-            if "external_ids" in item_song:
-                isrc = item_song["external_ids"]["isrc"] if "isrc" in item_song["external_ids"] else None
-                ean = item_song["external_ids"]["ean"] if "ean" in item_song["external_ids"] else None
-                upc = item_song["external_ids"]["upc"] if "upc" in item_song["external_ids"] else None
-                external_ids = ExternalIds(
-                    isrc=isrc,
-                    ean=ean,
-                    upc=upc
-                )
-            
-            song_name = item_song["name"]
-            song_artists = item_song["artists"]
-            album = Album(name=album_name, artists=album_artists, release_date=album_release_date, images=album_images)
-            track_number = item_song["track_number"]
-            disc_number = item_song["disc_number"]
-            duration_ms = item_song["duration_ms"]
-            song_spotify_url = item_song["spotify_url"]
-            song_youtube_url = item_song["youtube_url"]
-            song_youtube_url_validated = item_song["youtube_url_validated"]
-            youtube_url_permanently_skip = item_song.get("youtube_url_permanently_skip", False)
-
-            songs.append(Song(
-                name=song_name,
-                artists=song_artists,
-                album=album,
-                track_number=track_number,
-                disc_number=disc_number,
-                duration_ms=duration_ms,
-                external_ids=external_ids,
-                spotify_url=song_spotify_url,
-                youtube_url=song_youtube_url,
-                youtube_url_validated=song_youtube_url_validated,
-                youtube_url_permanently_skip=youtube_url_permanently_skip,
-            ))
-
-        playlists.append(PlaylistWithSongs(PlaylistNoSongs(
-            id=playlist_id,
-            name=playlist_name,
-            description=playlist_description,
-            total=playlist_total,
-            spotify_playlist_url=spotify_playlist_url,
-            owner_spotify_id=playlist_owner_id
-        ), songs))
-
-    return playlists
+    return load_export(filename)[0]
 
 
 def get_songs_to_validate(playlists: List[PlaylistWithSongs], include_permanently_skipped) -> Dict[str, Song]:
@@ -344,28 +300,33 @@ def get_songs_to_validate_iterator(songs: Dict[str, Song]):
         yield song
 
 
-def update_validated_song(original_playlists: List[PlaylistWithSongs], spotify_url: str, youtube_url: str, filename: str) -> List[PlaylistWithSongs]:
+def update_validated_song(original_playlists: List[PlaylistWithSongs], spotify_url: str, youtube_url: str, filename: str, export_version: int = EXPORT_VERSION_1, store: Optional[LibraryStore] = None) -> List[PlaylistWithSongs]:
     for playlist in original_playlists:
         for song in playlist.songs:
             if song.spotify_url == spotify_url:
                 song.youtube_url_validated = True
                 song.youtube_url = youtube_url
 
-    with open(filename, "w") as file:
-        file.write(json.dumps(original_playlists, indent=4, default=get_obj_dict))
+    # A store only updates the rows of the song instead of rewriting the whole file
+    if store is not None:
+        store.update_validated_song(spotify_url, youtube_url)
+    else:
+        write_playlists(filename, original_playlists, export_version)
 
     logger.info(f"Validated song `{spotify_url}`")
     return original_playlists
 
-def update_permanently_skipped_song(original_playlists: List[PlaylistWithSongs], spotify_url: str, filename: str) -> List[PlaylistWithSongs]:
+def update_permanently_skipped_song(original_playlists: List[PlaylistWithSongs], spotify_url: str, filename: str, export_version: int = EXPORT_VERSION_1, store: Optional[LibraryStore] = None) -> List[PlaylistWithSongs]:
     for playlist in original_playlists:
         for song in playlist.songs:
             if song.spotify_url == spotify_url and (song.youtube_url is not None and song.youtube_url.strip() != ""):
                 song.youtube_url_permanently_skip = True
                 print(song.youtube_url_permanently_skip)
 
-    with open(filename, "w") as file:
-        file.write(json.dumps(original_playlists, indent=4, default=get_obj_dict))
+    if store is not None:
+        store.update_permanently_skipped_song(spotify_url)
+    else:
+        write_playlists(filename, original_playlists, export_version)
 
     logger.info(f"Permanently skipped song `{spotify_url}")
     return original_playlists
@@ -0,0 +1,9 @@
+from .compression import *
+from .decoder import *
+from .files import *
+from .index import *
+from .ndjson import *
+from .normalized import *
+from .parallel import *
+from .store import *
+from .ytcache import *
@@ -0,0 +1,93 @@
+import gzip
+import io
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, TextIO
+from helpers import open_atomic
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+JSON_FORMAT = "json"
+NDJSON_FORMAT = "ndjson"
+EXPORT_FORMATS = [JSON_FORMAT, NDJSON_FORMAT]
+
+JSON_EXTENSION = ".json"
+NDJSON_EXTENSION = ".ndjson"
+GZIP_EXTENSION = ".gz"
+ZSTD_EXTENSION = ".zst"
+
+GZIP_COMPRESSION_LEVEL = 6
+ZSTD_COMPRESSION_LEVEL = 3
+
+
+def get_compression(filename: str) -> Optional[str]:
+    if filename.endswith(GZIP_EXTENSION):
+        return GZIP_EXTENSION
+    if filename.endswith(ZSTD_EXTENSION):
+        if zstandard is None:
+            raise ValueError(f"'{filename}' is compressed with zstd, which requires the 'zstandard' module")
+        return ZSTD_EXTENSION
+    return None
+
+
+def get_export_extensions(export_format: Optional[str] = None) -> List[str]:
+    export_formats = EXPORT_FORMATS if export_format is None else [export_format]
+    compressions = ["", GZIP_EXTENSION]
+    if zstandard is not None:
+        compressions.append(ZSTD_EXTENSION)
+    return [f".{export_format}{compression}" for export_format in export_formats for compression in compressions]
+
+
+def get_export_format(filename: str) -> str:
+    for compression in [GZIP_EXTENSION, ZSTD_EXTENSION]:
+        if filename.endswith(compression):
+            filename = filename[:-len(compression)]
+    return NDJSON_FORMAT if filename.endswith(NDJSON_EXTENSION) else JSON_FORMAT
+
+
+def is_export_filename(filename: str, export_format: Optional[str] = None) -> bool:
+    return filename.endswith(tuple(get_export_extensions(export_format)))
+
+
+def get_export_filename_error(filename: str, export_format: Optional[str] = None) -> str:
+    extensions = ", ".join(f"'{extension}'" for extension in get_export_extensions(export_format))
+    if zstandard is None and filename.endswith(ZSTD_EXTENSION):
+        return f"must end with one of {extensions}, '{ZSTD_EXTENSION}' files require the 'zstandard' module"
+    return f"must end with one of {extensions}"
+
+
+@contextmanager
+def open_export_writer(filename: str) -> Iterator[TextIO]:
+    # Compresses while writing by the extension of the filename, the compressed stream is finished before the
+    # temporary file is renamed
+    compression = get_compression(filename)
+    if compression is None:
+        with open_atomic(filename) as file:
+            yield file
+        return
+
+    with open_atomic(filename, binary=True) as raw:
+        if compression == GZIP_EXTENSION:
+            compressed = gzip.GzipFile(filename=os.path.basename(filename)[:-len(GZIP_EXTENSION)], mode="wb",
+                                       fileobj=raw, compresslevel=GZIP_COMPRESSION_LEVEL)
+        else:
+            compressed = zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).stream_writer(raw, closefd=False)
+        with io.TextIOWrapper(compressed, encoding="utf-8") as file:
+            yield file
+
+
+@contextmanager
+def open_export_reader(filename: str) -> Iterator[BinaryIO]:
+    compression = get_compression(filename)
+    if compression == GZIP_EXTENSION:
+        file = gzip.open(filename, "rb")
+    elif compression == ZSTD_EXTENSION:
+        file = zstandard.ZstdDecompressor().stream_reader(open(filename, "rb"), closefd=True)
+    else:
+        file = open(filename, "rb")
+    with file:
+        yield file
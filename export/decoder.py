@@ -0,0 +1,128 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from export.normalized import denormalize, get_export_version, EXPORT_VERSION_2
+from sptfy import PlaylistNoSongs, PlaylistWithSongs, Song, Album, AlbumImage, ExternalIds
+
+
+@dataclass(slots=True)
+class YoutubeUrlCacheEntry:
+    spotify_url: str
+    youtube_url: Optional[str]
+    youtube_url_validated: bool
+    youtube_url_permanently_skip: bool
+    isrc: Optional[str] = None
+
+
+def decode_playlist(item: Dict) -> PlaylistWithSongs:
+    songs = item.get("songs", [])
+    return PlaylistWithSongs(PlaylistNoSongs(
+        id=item.get("id"),
+        name=item.get("name"),
+        description=item.get("description", ""),
+        total=item.get("total", len(songs)),
+        spotify_playlist_url=item.get("spotify_playlist_url"),
+        owner_spotify_id=item.get("owner_spotify_id"),
+        snapshot_id=item.get("snapshot_id")
+    ), songs)
+
+
+def decode_song(item: Dict) -> Song:
+    # Older exports always carried an album, a missing one is read back as an empty album like before
+    album = item.get("album", {})
+    if isinstance(album, dict):
+        album = decode_album(album)
+    external_ids = item.get("external_ids")
+    if isinstance(external_ids, dict):
+        external_ids = decode_external_ids(external_ids)
+
+    return Song(
+        name=item.get("name"),
+        artists=item.get("artists", []),
+        album=album,
+        track_number=item.get("track_number"),
+        disc_number=item.get("disc_number"),
+        duration_ms=item.get("duration_ms"),
+        external_ids=external_ids,
+        spotify_url=item.get("spotify_url"),
+        youtube_url=item.get("youtube_url"),
+        youtube_url_validated=item.get("youtube_url_validated", False),
+        youtube_url_permanently_skip=item.get("youtube_url_permanently_skip", False),
+        added_at=item.get("added_at")
+    )
+
+
+def decode_album(item: Dict) -> Album:
+    return Album(
+        name=item.get("name", ""),
+        artists=item.get("artists", []),
+        release_date=item.get("release_date", ""),
+        images=item.get("images", [])
+    )
+
+
+def decode_external_ids(item: Dict) -> ExternalIds:
+    return ExternalIds(
+        isrc=item.get("isrc"),
+        ean=item.get("ean"),
+        upc=item.get("upc")
+    )
+
+
+def decode_album_image(item: Dict) -> AlbumImage:
+    return AlbumImage(
+        url=item.get("url"),
+        height=item.get("height"),
+        width=item.get("width")
+    )
+
+
+def decode_object(item: Dict) -> Any:
+    # Called by the json parser for every object once its children have been decoded, the kind of object is told
+    # apart by the keys only it has
+    if "songs" in item or "spotify_playlist_url" in item:
+        return decode_playlist(item)
+    if "spotify_url" in item:
+        return decode_song(item)
+    if "url" in item:
+        return decode_album_image(item)
+    if "release_date" in item or "images" in item:
+        return decode_album(item)
+    if "isrc" in item or "ean" in item or "upc" in item:
+        return decode_external_ids(item)
+    return item
+
+
+def decode_youtube_url_cache_object(item: Dict) -> Any:
+    # Songs are replaced by their cache entry as soon as they have been parsed, which drops everything below them
+    if "spotify_url" in item:
+        external_ids = item.get("external_ids")
+        return YoutubeUrlCacheEntry(
+            spotify_url=item["spotify_url"],
+            youtube_url=item.get("youtube_url"),
+            youtube_url_validated=item.get("youtube_url_validated", False),
+            youtube_url_permanently_skip=item.get("youtube_url_permanently_skip", False),
+            isrc=external_ids.get("isrc") if external_ids is not None else None
+        )
+    if "songs" in item:
+        return item["songs"]
+    return item
+
+
+def decode_export(data: bytes) -> Tuple[List[PlaylistWithSongs], int]:
+    document = json.loads(data, object_hook=decode_object)
+    export_version = get_export_version(document)
+    if export_version == EXPORT_VERSION_2:
+        return denormalize(document), export_version
+    return document, export_version
+
+
+def decode_playlists(data: bytes) -> List[PlaylistWithSongs]:
+    return decode_export(data)[0]
+
+
+def decode_youtube_url_cache_entries(data: bytes) -> List[YoutubeUrlCacheEntry]:
+    document = json.loads(data, object_hook=decode_youtube_url_cache_object)
+    if get_export_version(document) == EXPORT_VERSION_2:
+        return list(document["tracks"].values())
+    return [entry for songs in document for entry in songs]
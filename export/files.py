@@ -0,0 +1,54 @@
+from typing import Iterable, List, Optional, Tuple
+from export.compression import (get_compression, get_export_format, open_export_reader, open_export_writer,
+                                NDJSON_FORMAT)
+from export.decoder import decode_export, decode_youtube_url_cache_entries, YoutubeUrlCacheEntry
+from export.ndjson import load_ndjson_playlists, load_ndjson_youtube_url_cache_entries, write_ndjson_playlists
+from export.normalized import write_normalized_playlists, EXPORT_VERSION_1, EXPORT_VERSION_2
+from export.parallel import (get_max_workers, load_playlists_in_parallel, should_load_in_parallel,
+                             PARALLEL_LOAD_MIN_BYTES)
+from export.ytcache import is_ytcache_path, load_ytcache_entries
+from helpers import write_json_items
+from serializer import get_backend, JSON_BACKEND
+from sptfy import PlaylistWithSongs
+
+
+def load_export(filename: str, max_workers: Optional[int] = None,
+                min_parallel_bytes: int = PARALLEL_LOAD_MIN_BYTES) -> Tuple[List[PlaylistWithSongs], int]:
+    # The format and compression are told by the extension of the filename, the version by the content. Large
+    # uncompressed files are loaded on several cores
+    if get_export_format(filename) == NDJSON_FORMAT:
+        return load_ndjson_playlists(filename, max_workers, min_parallel_bytes), EXPORT_VERSION_1
+
+    max_workers = get_max_workers(max_workers)
+    if get_compression(filename) is None and should_load_in_parallel(filename, max_workers, min_parallel_bytes):
+        playlists = load_playlists_in_parallel(filename, max_workers)
+        if playlists is not None:
+            return playlists, EXPORT_VERSION_1
+
+    with open_export_reader(filename) as file:
+        return decode_export(file.read())
+
+
+def load_playlists(filename: str) -> List[PlaylistWithSongs]:
+    return load_export(filename)[0]
+
+
+def load_youtube_url_cache_entries(filename: str) -> List[YoutubeUrlCacheEntry]:
+    # A sidecar, or a directory of them, only holds the cache fields so there is no export to decode
+    if is_ytcache_path(filename):
+        return load_ytcache_entries(filename)
+    if get_export_format(filename) == NDJSON_FORMAT:
+        return load_ndjson_youtube_url_cache_entries(filename)
+    with open_export_reader(filename) as file:
+        return decode_youtube_url_cache_entries(file.read())
+
+
+def write_playlists(filename: str, playlists: Iterable[PlaylistWithSongs], export_version: int = EXPORT_VERSION_1,
+                    compact: bool = False, serializer_backend: str = JSON_BACKEND) -> int:
+    # NDJSON files have one record per line whatever the version or compact option
+    if get_export_format(filename) == NDJSON_FORMAT:
+        return write_ndjson_playlists(filename, playlists, serializer_backend=serializer_backend)
+    if export_version == EXPORT_VERSION_2:
+        return write_normalized_playlists(filename, playlists, compact=compact, serializer_backend=serializer_backend)
+    with open_export_writer(filename) as file:
+        return write_json_items(file, playlists, get_backend(serializer_backend), compact)
@@ -0,0 +1,107 @@
+import json
+import mmap
+import os
+import re
+from typing import List, Optional, Tuple
+from export.compression import get_compression, get_export_format, NDJSON_FORMAT
+from export.decoder import decode_object
+from export.files import load_playlists
+from export.ndjson import decode_ndjson_lines, NDJSON_PLAYLIST_RECORD
+from export.parallel import find_playlist_offsets, get_array_indent
+from helpers import open_atomic
+from log import logger
+from sptfy import PlaylistWithSongs
+
+INDEX_EXTENSION = ".index.json"
+
+NDJSON_PLAYLIST_RECORD_START = f'{{"type":"{NDJSON_PLAYLIST_RECORD}"'.encode("utf-8")
+
+
+def get_index_filename(filename: str) -> str:
+    return f"{filename}{INDEX_EXTENSION}"
+
+
+def find_json_playlist_ids(data: mmap.mmap) -> Optional[List[Tuple[Optional[str], int, int]]]:
+    # The id of a playlist is the only `"id"` key indented twice as deep as the array, ids of songs and albums are
+    # indented deeper
+    found = find_playlist_offsets(data)
+    if found is None:
+        return None
+    offsets, end = found
+    id_pattern = re.compile(rb"\n" + re.escape(get_array_indent(data) * 2) + rb'"id": ("(?:[^"\\]|\\.)*"|null)')
+
+    playlists = []
+    for start, playlist_end in zip(offsets, offsets[1:] + [end]):
+        match = id_pattern.search(data, start, playlist_end)
+        playlists.append((json.loads(match.group(1)) if match is not None else None, start, playlist_end))
+    return playlists
+
+
+def find_ndjson_playlist_ids(data: mmap.mmap) -> List[Tuple[Optional[str], int, int]]:
+    # Every playlist record starts a line, its songs follow it until the next playlist record
+    separator = b"\n" + NDJSON_PLAYLIST_RECORD_START
+    offsets = [0] if data[:len(NDJSON_PLAYLIST_RECORD_START)] == NDJSON_PLAYLIST_RECORD_START else []
+    position = data.find(separator)
+    while position != -1:
+        offsets.append(position + 1)
+        position = data.find(separator, position + 1)
+
+    playlists = []
+    for start, end in zip(offsets, offsets[1:] + [len(data)]):
+        header_end = data.find(b"\n", start, end)
+        header = json.loads(data[start:header_end if header_end != -1 else end])
+        playlists.append((header.get("id"), start, end))
+    return playlists
+
+
+def build_playlist_index(filename: str) -> Optional[List[Tuple[Optional[str], int, int]]]:
+    if os.path.getsize(filename) == 0:
+        return None
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if get_export_format(filename) == NDJSON_FORMAT:
+            return find_ndjson_playlist_ids(data)
+        return find_json_playlist_ids(data)
+
+
+def load_playlist_index(filename: str) -> Optional[List[Tuple[Optional[str], int, int]]]:
+    # The index is kept next to the export and rebuilt when the export has changed since it was written
+    index_filename = get_index_filename(filename)
+    stat = os.stat(filename)
+    try:
+        with open(index_filename, "r") as file:
+            index = json.load(file)
+        if index["size"] == stat.st_size and index["mtime_ns"] == stat.st_mtime_ns:
+            return [tuple(playlist) for playlist in index["playlists"]]
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        pass
+
+    logger.info(f"Building playlist index '{index_filename}'")
+    playlists = build_playlist_index(filename)
+    if playlists is None:
+        return None
+    try:
+        with open_atomic(index_filename) as file:
+            json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "playlists": playlists}, file)
+    except OSError as e:
+        logger.warning(f"Could not write playlist index '{index_filename}': {e}")
+    return playlists
+
+
+def decode_playlist_byte_range(filename: str, start: int, end: int) -> PlaylistWithSongs:
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if get_export_format(filename) == NDJSON_FORMAT:
+            return decode_ndjson_lines(data[start:end].splitlines()).playlists[0]
+        return json.loads(data[start:end].rstrip().rstrip(b","), object_hook=decode_object)
+
+
+def load_indexed_playlist(filename: str, playlist_id: str) -> Optional[PlaylistWithSongs]:
+    # Only the requested playlist is decoded, exports that can't be indexed, like compressed, compact or version 2
+    # files, are loaded in full
+    index = load_playlist_index(filename) if get_compression(filename) is None else None
+    if index is None:
+        return next((playlist for playlist in load_playlists(filename) if playlist.id == playlist_id), None)
+
+    for indexed_playlist_id, start, end in index:
+        if indexed_playlist_id == playlist_id:
+            return decode_playlist_byte_range(filename, start, end)
+    return None
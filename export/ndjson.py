@@ -0,0 +1,145 @@
+import concurrent.futures
+import json
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from export.compression import get_compression, open_export_reader, open_export_writer
+from export.decoder import decode_object, decode_youtube_url_cache_object, YoutubeUrlCacheEntry
+from export.parallel import get_max_workers, should_load_in_parallel, PARALLEL_LOAD_MIN_BYTES
+from serializer import get_backend, to_dict, JSON_BACKEND
+from sptfy import PlaylistWithSongs, Song
+
+NDJSON_PLAYLIST_RECORD = "playlist"
+NDJSON_SONG_RECORD = "song"
+
+
+@dataclass(slots=True)
+class NdjsonChunk:
+    # Songs at the start of a chunk belong to the last playlist of the chunk before it
+    leading_songs: List[Song]
+    playlists: List[PlaylistWithSongs]
+
+
+def get_playlist_record(playlist: PlaylistWithSongs) -> Dict:
+    record = {"type": NDJSON_PLAYLIST_RECORD}
+    record.update(to_dict(playlist))
+    record.pop("songs")
+    return record
+
+
+def get_song_record(playlist: PlaylistWithSongs, song: Song) -> Dict:
+    record = {"type": NDJSON_SONG_RECORD, "playlist_id": playlist.id}
+    record.update(to_dict(song))
+    return record
+
+
+def write_ndjson_playlists(filename: str, playlists: Iterable[PlaylistWithSongs],
+                           serializer_backend: str = JSON_BACKEND) -> int:
+    # One record per line, a playlist line followed by a line for each of its songs
+    backend = get_backend(serializer_backend)
+    count = 0
+    with open_export_writer(filename) as file:
+        for playlist in playlists:
+            file.write(backend.dumps(get_playlist_record(playlist), True))
+            file.write("\n")
+            for song in playlist.songs:
+                file.write(backend.dumps(get_song_record(playlist, song), True))
+                file.write("\n")
+            count += 1
+    return count
+
+
+def decode_ndjson_lines(lines: Iterable[bytes]) -> NdjsonChunk:
+    chunk = NdjsonChunk(leading_songs=[], playlists=[])
+    for line in lines:
+        if line.strip() == b"":
+            continue
+        record = json.loads(line, object_hook=decode_object)
+        if isinstance(record, PlaylistWithSongs):
+            chunk.playlists.append(record)
+        elif len(chunk.playlists) > 0:
+            chunk.playlists[-1].songs.append(record)
+        else:
+            chunk.leading_songs.append(record)
+    return chunk
+
+
+def iter_byte_range_lines(file: BinaryIO, start: int, end: int) -> Iterator[bytes]:
+    # A range owns every line that starts inside it, the partial line at its start belongs to the range before it
+    if start > 0:
+        file.seek(start - 1)
+        file.readline()
+    while file.tell() < end:
+        line = file.readline()
+        if not line:
+            break
+        yield line
+
+
+def decode_ndjson_byte_range(filename: str, start: int, end: int) -> NdjsonChunk:
+    with open(filename, "rb") as file:
+        return decode_ndjson_lines(iter_byte_range_lines(file, start, end))
+
+
+def get_byte_ranges(size: int, num_ranges: int) -> List[Tuple[int, int]]:
+    range_size = -(-size // num_ranges)
+    return [(start, min(start + range_size, size)) for start in range(0, size, range_size)]
+
+
+def merge_ndjson_chunks(chunks: Iterable[NdjsonChunk]) -> List[PlaylistWithSongs]:
+    playlists = []
+    for chunk in chunks:
+        if len(chunk.leading_songs) > 0:
+            if len(playlists) == 0:
+                raise ValueError("NDJSON export starts with a song instead of a playlist")
+            playlists[-1].songs.extend(chunk.leading_songs)
+        playlists.extend(chunk.playlists)
+    return playlists
+
+
+def load_ndjson_playlists(filename: str, max_workers: Optional[int] = None,
+                          min_parallel_bytes: int = PARALLEL_LOAD_MIN_BYTES) -> List[PlaylistWithSongs]:
+    # Large uncompressed files are split into byte ranges that are parsed on several cores, compressed files can only
+    # be read from the start
+    max_workers = get_max_workers(max_workers)
+    if get_compression(filename) is not None or not should_load_in_parallel(filename, max_workers, min_parallel_bytes):
+        with open_export_reader(filename) as file:
+            return merge_ndjson_chunks([decode_ndjson_lines(file)])
+
+    byte_ranges = get_byte_ranges(os.path.getsize(filename), max_workers)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunks = executor.map(decode_ndjson_byte_range, [filename] * len(byte_ranges),
+                              [start for start, _ in byte_ranges], [end for _, end in byte_ranges])
+        return merge_ndjson_chunks(chunks)
+
+
+def iter_ndjson_playlists(filename: str) -> Iterator[PlaylistWithSongs]:
+    # Only one playlist is in memory at a time
+    playlist = None
+    with open_export_reader(filename) as file:
+        for line in file:
+            if line.strip() == b"":
+                continue
+            record = json.loads(line, object_hook=decode_object)
+            if isinstance(record, PlaylistWithSongs):
+                if playlist is not None:
+                    yield playlist
+                playlist = record
+            elif playlist is None:
+                raise ValueError("NDJSON export starts with a song instead of a playlist")
+            else:
+                playlist.songs.append(record)
+    if playlist is not None:
+        yield playlist
+
+
+def load_ndjson_youtube_url_cache_entries(filename: str) -> List[YoutubeUrlCacheEntry]:
+    entries = []
+    with open_export_reader(filename) as file:
+        for line in file:
+            if line.strip() == b"":
+                continue
+            record = json.loads(line, object_hook=decode_youtube_url_cache_object)
+            if isinstance(record, YoutubeUrlCacheEntry):
+                entries.append(record)
+    return entries
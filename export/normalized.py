@@ -0,0 +1,107 @@
+import json
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Optional
+from export.compression import open_export_writer
+from helpers import write_json_items
+from serializer import get_backend, to_dict, JSON_BACKEND
+from sptfy import PlaylistWithSongs, Song
+
+EXPORT_VERSION_1 = 1
+EXPORT_VERSION_2 = 2
+EXPORT_VERSIONS = [EXPORT_VERSION_1, EXPORT_VERSION_2]
+
+SPOTIFY_TRACK_URL_PREFIX = "https://open.spotify.com/track/"
+
+
+def get_track_id(song: Song) -> str:
+    # Spotify track URLs end with the track id, local files only have the `name---artists` fallback
+    spotify_url = str(song.spotify_url)
+    if spotify_url.startswith(SPOTIFY_TRACK_URL_PREFIX):
+        return spotify_url[len(SPOTIFY_TRACK_URL_PREFIX):].split("?")[0]
+    return spotify_url
+
+
+class TrackTable:
+    def __init__(self):
+        self.tracks: Dict[str, Dict] = {}
+
+    def add_song(self, song: Song) -> str:
+        track = dict(to_dict(song))
+        track.pop("added_at")
+
+        # Different songs can share a track id, e.g. local files with the same name and artists, those are kept
+        # apart with a suffix
+        base_id = get_track_id(song)
+        track_id = base_id
+        suffix = 1
+        while track_id in self.tracks and self.tracks[track_id] != track:
+            suffix += 1
+            track_id = f"{base_id}#{suffix}"
+        self.tracks[track_id] = track
+        return track_id
+
+    def add_playlist(self, playlist: PlaylistWithSongs) -> Dict:
+        normalized = dict(to_dict(playlist))
+        entries = []
+        for song in playlist.songs:
+            entry = {"track": self.add_song(song)}
+            if song.added_at is not None:
+                entry["added_at"] = song.added_at
+            entries.append(entry)
+        normalized["songs"] = entries
+        return normalized
+
+
+def get_export_version(document: Any) -> int:
+    if isinstance(document, list):
+        return EXPORT_VERSION_1
+    version = document.get("version") if isinstance(document, dict) else None
+    if version not in EXPORT_VERSIONS:
+        raise ValueError(f"Unsupported playlists export version: {version}")
+    return version
+
+
+def get_entry_song(track: Song, added_at: Optional[str]) -> Song:
+    if added_at is None:
+        return track
+    return replace(track, added_at=added_at)
+
+
+def denormalize(document: Dict) -> List[PlaylistWithSongs]:
+    # Songs without per-entry data share the Song object of their track, so updating it updates every playlist
+    tracks = document["tracks"]
+    playlists = document["playlists"]
+    for playlist in playlists:
+        playlist.songs = [get_entry_song(tracks[entry["track"]], entry.get("added_at")) for entry in playlist.songs]
+    return playlists
+
+
+def write_normalized_playlists(filename: str, playlists: Iterable[PlaylistWithSongs], compact: bool = False,
+                               serializer_backend: str = JSON_BACKEND) -> int:
+    # Playlists are written as soon as they are available, the track table is only complete once all of them have
+    # been written so it comes last
+    backend = get_backend(serializer_backend)
+    table = TrackTable()
+    indent = " " * backend.indent
+    with open_export_writer(filename) as file:
+        if compact:
+            file.write(f'{{"version":{EXPORT_VERSION_2},"playlists":')
+        else:
+            file.write(f'{{\n{indent}"version": {EXPORT_VERSION_2},\n{indent}"playlists": ')
+        count = write_json_items(file, (table.add_playlist(playlist) for playlist in playlists), backend, compact,
+                                 level=1)
+
+        file.write(',"tracks":{' if compact else f',\n{indent}"tracks": {{')
+        for index, (track_id, track) in enumerate(table.tracks.items()):
+            if compact:
+                file.write(f'{"," if index > 0 else ""}{json.dumps(track_id)}:{backend.dumps(track, True)}')
+            else:
+                track_json = backend.dumps(track, False).replace("\n", f"\n{indent}{indent}")
+                file.write(f'{"," if index > 0 else ""}\n{indent}{indent}{json.dumps(track_id)}: {track_json}')
+        if compact:
+            file.write("}}")
+        elif len(table.tracks) == 0:
+            file.write("}\n}")
+        else:
+            file.write(f"\n{indent}}}\n}}")
+    return count
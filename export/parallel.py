@@ -0,0 +1,82 @@
+import concurrent.futures
+import json
+import mmap
+import os
+import re
+from typing import List, Optional, Tuple
+from export.decoder import decode_object
+from sptfy import PlaylistWithSongs
+
+# Files smaller than this are loaded on one core, starting worker processes and sending the playlists back costs more
+# than it saves. See `python -m benchmarks.parallel_load` for the crossover point
+PARALLEL_LOAD_MIN_BYTES = 64 * 1024 * 1024
+
+INDENTED_ARRAY_START = re.compile(rb"\[\r?\n( +)\{")
+
+
+def get_max_workers(max_workers: Optional[int] = None) -> int:
+    return max_workers if max_workers is not None else os.cpu_count() or 1
+
+
+def should_load_in_parallel(filename: str, max_workers: int, min_parallel_bytes: int = PARALLEL_LOAD_MIN_BYTES) -> bool:
+    return max_workers > 1 and os.path.getsize(filename) >= min_parallel_bytes
+
+
+def get_array_indent(data: mmap.mmap) -> Optional[bytes]:
+    match = INDENTED_ARRAY_START.match(data, 0, 64)
+    return match.group(1) if match is not None else None
+
+
+def find_playlist_offsets(data: mmap.mmap) -> Optional[Tuple[List[int], int]]:
+    # Indented version 1 exports start every playlist on a new line at the same indentation, which can't be found
+    # anywhere else as strings never hold a raw newline. Any other layout returns None
+    indent = get_array_indent(data)
+    if indent is None:
+        return None
+    separator = b"\n" + indent + b"{"
+
+    offsets = []
+    position = data.find(separator)
+    while position != -1:
+        offsets.append(position + 1)
+        position = data.find(separator, position + len(separator))
+    return offsets, data.rfind(b"]")
+
+
+def group_offsets(offsets: List[int], end: int, num_groups: int) -> List[Tuple[int, int]]:
+    # Consecutive playlists are grouped into byte ranges of about the same size
+    target_size = (end - offsets[0]) / num_groups
+    ranges = []
+    start = offsets[0]
+    for offset in offsets[1:]:
+        if offset - start >= target_size:
+            ranges.append((start, offset))
+            start = offset
+    ranges.append((start, end))
+    return ranges
+
+
+def decode_playlists_byte_range(filename: str, start: int, end: int) -> List[PlaylistWithSongs]:
+    with open(filename, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    return json.loads(b"[" + data.rstrip().rstrip(b",") + b"]", object_hook=decode_object)
+
+
+def load_playlists_in_parallel(filename: str, max_workers: Optional[int] = None) -> Optional[List[PlaylistWithSongs]]:
+    # Playlists are split between worker processes that each read and decode their own byte range of the file.
+    # Returns None when the file does not have a layout that can be split
+    max_workers = get_max_workers(max_workers)
+    if os.path.getsize(filename) == 0:
+        return None
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        found = find_playlist_offsets(data)
+    if found is None or len(found[0]) == 0:
+        return None
+
+    offsets, end = found
+    byte_ranges = group_offsets(offsets, end, max_workers)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(max_workers, len(byte_ranges))) as executor:
+        chunks = executor.map(decode_playlists_byte_range, [filename] * len(byte_ranges),
+                              [start for start, _ in byte_ranges], [end for _, end in byte_ranges])
+        return [playlist for chunk in chunks for playlist in chunk]
@@ -0,0 +1,304 @@
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from export.normalized import get_entry_song, get_track_id
+from serializer import dumps_sorted
+from sptfy import PlaylistWithSongs, PlaylistNoSongs, Song, Album, AlbumImage, ExternalIds
+
+SQLITE_STORE_PREFIX = "sqlite:///"
+
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS albums (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT,
+    artists TEXT NOT NULL,
+    release_date TEXT,
+    images TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    artists TEXT NOT NULL,
+    album_id INTEGER REFERENCES albums (id),
+    track_number INTEGER,
+    disc_number INTEGER,
+    duration_ms INTEGER,
+    isrc TEXT,
+    ean TEXT,
+    upc TEXT,
+    spotify_url TEXT,
+    youtube_url TEXT,
+    youtube_url_validated INTEGER NOT NULL DEFAULT 0,
+    youtube_url_permanently_skip INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tracks_spotify_url ON tracks (spotify_url);
+CREATE INDEX IF NOT EXISTS tracks_isrc ON tracks (isrc);
+CREATE INDEX IF NOT EXISTS tracks_unvalidated ON tracks (spotify_url) WHERE youtube_url_validated = 0;
+CREATE TABLE IF NOT EXISTS playlists (
+    position INTEGER PRIMARY KEY,
+    id TEXT,
+    name TEXT,
+    description TEXT,
+    total INTEGER,
+    spotify_playlist_url TEXT,
+    owner_spotify_id TEXT,
+    snapshot_id TEXT
+);
+CREATE INDEX IF NOT EXISTS playlists_id ON playlists (id);
+CREATE TABLE IF NOT EXISTS playlist_tracks (
+    playlist_position INTEGER NOT NULL REFERENCES playlists (position),
+    position INTEGER NOT NULL,
+    track_id TEXT NOT NULL REFERENCES tracks (id),
+    added_at TEXT,
+    PRIMARY KEY (playlist_position, position)
+);
+CREATE INDEX IF NOT EXISTS playlist_tracks_track_id ON playlist_tracks (track_id);
+"""
+
+TRACK_COLUMNS = ("id, name, artists, album_id, track_number, disc_number, duration_ms, isrc, ean, upc, spotify_url, "
+                 "youtube_url, youtube_url_validated, youtube_url_permanently_skip")
+TRACK_SELECT_COLUMNS = ", ".join(f"tracks.{column}" for column in TRACK_COLUMNS.split(", "))
+# Everything that tells apart songs sharing a track id, the Youtube URL columns are updated in place
+TRACK_CONTENT_COLUMNS = ("name, artists, album_id, track_number, disc_number, duration_ms, isrc, ean, upc, "
+                         "spotify_url")
+
+# Downloading again into a store keeps the Youtube URLs saved by `validate youtube-urls --store`: a validated URL is
+# only replaced by another validated one and a download without Youtube URLs keeps the stored ones. The validated and
+# permanently skipped flags are never cleared
+STORED_YOUTUBE_URL = ("CASE WHEN excluded.youtube_url_validated THEN excluded.youtube_url "
+                      "WHEN tracks.youtube_url_validated THEN tracks.youtube_url "
+                      "ELSE coalesce(excluded.youtube_url, tracks.youtube_url) END")
+
+
+def get_store_path(store: str) -> str:
+    # sqlite:///library.db is relative to the current directory, sqlite:////home/user/library.db is absolute
+    if not store.startswith(SQLITE_STORE_PREFIX) or len(store) == len(SQLITE_STORE_PREFIX):
+        raise ValueError(f"Unsupported store '{store}', expected '{SQLITE_STORE_PREFIX}<path>'")
+    return store[len(SQLITE_STORE_PREFIX):]
+
+
+class LibraryStore:
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(STORE_SCHEMA)
+        self.track_ids: Dict[Tuple, str] = {}
+        self.written_track_ids: Set[str] = set()
+        self.album_ids: Dict[str, int] = {}
+        self.num_playlists_written = 0
+
+    def __enter__(self) -> "LibraryStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def write_album(self, album: Album) -> int:
+        key = dumps_sorted(album)
+        album_id = self.album_ids.get(key)
+        if album_id is None:
+            self.connection.execute(
+                "INSERT INTO albums (key, name, artists, release_date, images) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO NOTHING",
+                (key, album.name, json.dumps(album.artists), album.release_date, dumps_sorted(album.images))
+            )
+            album_id = self.connection.execute("SELECT id FROM albums WHERE key = ?", (key,)).fetchone()[0]
+            self.album_ids[key] = album_id
+        return album_id
+
+    def find_track_id(self, base_id: str, content: Tuple, youtube_url: Optional[str]) -> str:
+        # Songs sharing a track id are kept apart with a suffix like in the version 2 export. The suffixes are given
+        # out against the rows already in the store, so a row is only ever updated with the same song, preferably the
+        # row with the same Youtube URL. Every row is used by one song of a download at most
+        rows = self.connection.execute(
+            f"SELECT id, youtube_url, {TRACK_CONTENT_COLUMNS} FROM tracks WHERE id = ? OR (id > ? AND id < ?) "
+            f"ORDER BY id",
+            (base_id, f"{base_id}#", f"{base_id}$")
+        ).fetchall()
+        matching_rows = [row for row in rows if row[2:] == content and row[0] not in self.written_track_ids]
+        for row in matching_rows:
+            if row[1] == youtube_url:
+                return row[0]
+        if len(matching_rows) > 0:
+            return matching_rows[0][0]
+        used_ids = {row[0] for row in rows}
+        track_id = base_id
+        suffix = 1
+        while track_id in used_ids:
+            suffix += 1
+            track_id = f"{base_id}#{suffix}"
+        return track_id
+
+    def write_track(self, song: Song) -> str:
+        # Every track is written once per download
+        album_id = self.write_album(song.album) if song.album is not None else None
+        external_ids = song.external_ids if song.external_ids is not None else ExternalIds(None, None, None)
+        content = (song.name, json.dumps(song.artists), album_id, song.track_number, song.disc_number,
+                   song.duration_ms, external_ids.isrc, external_ids.ean, external_ids.upc, song.spotify_url)
+        key = content + (song.youtube_url, song.youtube_url_validated, song.youtube_url_permanently_skip)
+        track_id = self.track_ids.get(key)
+        if track_id is not None:
+            return track_id
+
+        track_id = self.find_track_id(get_track_id(song), content, song.youtube_url)
+        self.connection.execute(
+            f"INSERT INTO tracks ({TRACK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT (id) DO UPDATE SET name = excluded.name, artists = excluded.artists, "
+            f"album_id = excluded.album_id, track_number = excluded.track_number, "
+            f"disc_number = excluded.disc_number, duration_ms = excluded.duration_ms, isrc = excluded.isrc, "
+            f"ean = excluded.ean, upc = excluded.upc, spotify_url = excluded.spotify_url, "
+            f"youtube_url = {STORED_YOUTUBE_URL}, "
+            f"youtube_url_validated = max(tracks.youtube_url_validated, excluded.youtube_url_validated), "
+            f"youtube_url_permanently_skip = max(tracks.youtube_url_permanently_skip, "
+            f"excluded.youtube_url_permanently_skip)",
+            (track_id,) + key
+        )
+        self.track_ids[key] = track_id
+        self.written_track_ids.add(track_id)
+        return track_id
+
+    def write_playlist(self, playlist: PlaylistWithSongs) -> None:
+        # One transaction per playlist, an interrupted download keeps every playlist written before it. Playlists
+        # are kept in the order of the download, which also keeps apart playlists sharing an id
+        position = self.num_playlists_written
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO playlists (position, id, name, description, total, spotify_playlist_url, "
+                "owner_spotify_id, snapshot_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (position) DO UPDATE SET id = excluded.id, name = excluded.name, "
+                "description = excluded.description, total = excluded.total, "
+                "spotify_playlist_url = excluded.spotify_playlist_url, "
+                "owner_spotify_id = excluded.owner_spotify_id, snapshot_id = excluded.snapshot_id",
+                (position, playlist.id, playlist.name, playlist.description, playlist.total,
+                 playlist.spotify_playlist_url, playlist.owner_spotify_id, playlist.snapshot_id)
+            )
+            self.connection.execute("DELETE FROM playlist_tracks WHERE playlist_position = ?", (position,))
+            self.connection.executemany(
+                "INSERT INTO playlist_tracks (playlist_position, position, track_id, added_at) VALUES (?, ?, ?, ?)",
+                [(position, song_position, self.write_track(song), song.added_at)
+                 for song_position, song in enumerate(playlist.songs)]
+            )
+        self.num_playlists_written += 1
+
+    def remove_unwritten(self) -> None:
+        # Playlists left over from a previous, longer download, and the tracks and albums only they used, are removed
+        with self.connection:
+            self.connection.execute("DELETE FROM playlist_tracks WHERE playlist_position >= ?",
+                                    (self.num_playlists_written,))
+            self.connection.execute("DELETE FROM playlists WHERE position >= ?", (self.num_playlists_written,))
+            self.connection.execute("DELETE FROM tracks WHERE id NOT IN (SELECT track_id FROM playlist_tracks)")
+            self.connection.execute(
+                "DELETE FROM albums WHERE id NOT IN (SELECT album_id FROM tracks WHERE album_id IS NOT NULL)")
+
+    def load_songs(self, where: str = "", parameters: Tuple = ()) -> Dict[str, Song]:
+        # Only the albums of the selected tracks are read, each of them is decoded once and shared by its tracks
+        albums: Dict[int, Album] = {}
+        songs = {}
+        for row in self.connection.execute(
+                f"SELECT {TRACK_SELECT_COLUMNS}, albums.name, albums.artists, albums.release_date, albums.images "
+                f"FROM tracks LEFT JOIN albums ON albums.id = tracks.album_id {where}", parameters):
+            (track_id, name, artists, album_id, track_number, disc_number, duration_ms, isrc, ean, upc, spotify_url,
+             youtube_url, youtube_url_validated, youtube_url_permanently_skip,
+             album_name, album_artists, album_release_date, album_images) = row
+            album = albums.get(album_id)
+            if album is None and album_id is not None:
+                album = Album(
+                    name=album_name,
+                    artists=json.loads(album_artists),
+                    release_date=album_release_date,
+                    images=[AlbumImage(url=image.get("url"), height=image.get("height"), width=image.get("width"))
+                            for image in json.loads(album_images)]
+                )
+                albums[album_id] = album
+            external_ids = None
+            if isrc is not None or ean is not None or upc is not None:
+                external_ids = ExternalIds(isrc=isrc, ean=ean, upc=upc)
+            songs[track_id] = Song(
+                name=name,
+                artists=json.loads(artists),
+                album=album,
+                track_number=track_number,
+                disc_number=disc_number,
+                duration_ms=duration_ms,
+                external_ids=external_ids,
+                spotify_url=spotify_url,
+                youtube_url=youtube_url,
+                youtube_url_validated=bool(youtube_url_validated),
+                youtube_url_permanently_skip=bool(youtube_url_permanently_skip)
+            )
+        return songs
+
+    def load_playlists(self) -> List[PlaylistWithSongs]:
+        # Songs without an added_at share the Song object of their track like in the version 2 export
+        tracks = self.load_songs()
+        playlists = {}
+        for row in self.connection.execute(
+                "SELECT position, id, name, description, total, spotify_playlist_url, owner_spotify_id, snapshot_id "
+                "FROM playlists ORDER BY position"):
+            position, playlist_id, name, description, total, spotify_playlist_url, owner_spotify_id, snapshot_id = row
+            playlists[position] = PlaylistWithSongs(PlaylistNoSongs(
+                id=playlist_id,
+                name=name,
+                description=description,
+                total=total,
+                spotify_playlist_url=spotify_playlist_url,
+                owner_spotify_id=owner_spotify_id,
+                snapshot_id=snapshot_id
+            ), [])
+        for playlist_position, track_id, added_at in self.connection.execute(
+                "SELECT playlist_position, track_id, added_at FROM playlist_tracks "
+                "ORDER BY playlist_position, position"):
+            playlists[playlist_position].songs.append(get_entry_song(tracks[track_id], added_at))
+        return list(playlists.values())
+
+    def get_songs_by_spotify_url(self, spotify_url: str) -> List[Song]:
+        return list(self.load_songs("WHERE tracks.spotify_url = ?", (spotify_url,)).values())
+
+    def get_songs_by_isrc(self, isrc: str) -> List[Song]:
+        return list(self.load_songs("WHERE tracks.isrc = ?", (isrc,)).values())
+
+    def get_songs_to_validate(self, include_permanently_skipped: bool) -> Dict[str, Song]:
+        # The same songs as for a file, a track for every spotify url that hasn't been validated. Only those rows are
+        # read through the index of unvalidated tracks, which hands them out in the order of their spotify url
+        where = ("WHERE tracks.youtube_url_validated = 0 AND tracks.spotify_url IS NOT NULL "
+                 "AND trim(tracks.spotify_url) != ''")
+        if not include_permanently_skipped:
+            where += " AND tracks.youtube_url_permanently_skip = 0"
+        songs = {}
+        for song in self.load_songs(where).values():
+            songs.setdefault(song.spotify_url, song)
+        return songs
+
+    def update_validated_song(self, spotify_url: str, youtube_url: str) -> int:
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE tracks SET youtube_url = ?, youtube_url_validated = 1 WHERE spotify_url = ?",
+                (youtube_url, spotify_url)
+            )
+        return cursor.rowcount
+
+    def update_permanently_skipped_song(self, spotify_url: str) -> int:
+        with self.connection:
+            cursor = self.connection.execute(
+                "UPDATE tracks SET youtube_url_permanently_skip = 1 "
+                "WHERE spotify_url = ? AND youtube_url IS NOT NULL AND trim(youtube_url) != ''",
+                (spotify_url,)
+            )
+        return cursor.rowcount
+
+
+def write_playlists_to_store(store: str, playlists: Iterable[PlaylistWithSongs]) -> int:
+    with LibraryStore(get_store_path(store)) as library_store:
+        for playlist in playlists:
+            library_store.write_playlist(playlist)
+        library_store.remove_unwritten()
+        return library_store.num_playlists_written
+
+
+def load_playlists_from_store(store: str) -> List[PlaylistWithSongs]:
+    with LibraryStore(get_store_path(store)) as library_store:
+        return library_store.load_playlists()
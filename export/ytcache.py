@@ -0,0 +1,100 @@
+import json
+import os
+import time
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Tuple
+from export.decoder import YoutubeUrlCacheEntry
+from helpers import gc_paused, open_atomic
+from log import logger
+from sptfy import PlaylistWithSongs
+
+YTCACHE_EXTENSION = ".ytcache"
+YTCACHE_VERSION = 1
+
+# Both flags of an entry are kept in a single number
+YTCACHE_VALIDATED = 1
+YTCACHE_PERMANENTLY_SKIP = 2
+
+
+def get_ytcache_filename(filename: str) -> str:
+    return f"{filename}{YTCACHE_EXTENSION}"
+
+
+def is_ytcache_path(path: str) -> bool:
+    return path.endswith(YTCACHE_EXTENSION) or os.path.isdir(path)
+
+
+def get_ytcache_flags(youtube_url_validated: bool, youtube_url_permanently_skip: bool) -> int:
+    return (YTCACHE_VALIDATED if youtube_url_validated else 0) | \
+        (YTCACHE_PERMANENTLY_SKIP if youtube_url_permanently_skip else 0)
+
+
+def get_ytcache_entries(playlists: Iterable[PlaylistWithSongs]) -> Dict[str, Tuple[str, int, Optional[str]]]:
+    # Once per song, songs without a Youtube URL are not worth preloading
+    entries = {}
+    for playlist in playlists:
+        for song in playlist.songs:
+            if song.spotify_url is None or song.youtube_url is None:
+                continue
+            entries[song.spotify_url] = (song.youtube_url,
+                                         get_ytcache_flags(song.youtube_url_validated, song.youtube_url_permanently_skip),
+                                         song.external_ids.isrc if song.external_ids is not None else None)
+    return entries
+
+
+def write_ytcache(filename: str, playlists: Iterable[PlaylistWithSongs]) -> int:
+    # One array per field instead of one object per entry, reading it back only creates strings and numbers
+    entries = get_ytcache_entries(playlists)
+    document = {
+        "version": YTCACHE_VERSION,
+        "written_at": time.time(),
+        "spotify_urls": list(entries.keys()),
+        "youtube_urls": [youtube_url for youtube_url, _, _ in entries.values()],
+        "flags": [flags for _, flags, _ in entries.values()],
+        "isrcs": [isrc for _, _, isrc in entries.values()],
+    }
+    with open_atomic(filename) as file:
+        json.dump(document, file, separators=(",", ":"))
+    return len(entries)
+
+
+def read_ytcache(filename: str) -> Tuple[float, Dict]:
+    with open(filename, "rb") as file:
+        document = json.loads(file.read())
+    if not isinstance(document, dict) or document.get("version") != YTCACHE_VERSION:
+        raise ValueError(f"'{filename}' is not a youtube url cache of version {YTCACHE_VERSION}")
+    written_at = document.get("written_at")
+    if written_at is None:
+        written_at = os.path.getmtime(filename)
+    return written_at, document
+
+
+def get_ytcache_filenames(path: str) -> List[str]:
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(YTCACHE_EXTENSION))
+
+
+def merge_ytcaches(caches: List[Tuple[float, Dict]]) -> Dict[str, Tuple[str, int, Optional[str]]]:
+    # Applied oldest first so newer entries replace older ones, except a validated URL is never replaced by one
+    # that hasn't been validated. Sidecars written before ISRCs were added have no `isrcs`
+    merged = {}
+    for _, document in sorted(caches, key=lambda cache: cache[0]):
+        isrcs = document.get("isrcs") or repeat(None)
+        for spotify_url, youtube_url, flags, isrc in zip(document["spotify_urls"], document["youtube_urls"],
+                                                         document["flags"], isrcs):
+            previous = merged.get(spotify_url)
+            if previous is not None and previous[1] & YTCACHE_VALIDATED and not flags & YTCACHE_VALIDATED:
+                continue
+            merged[spotify_url] = (youtube_url, flags, isrc)
+    return merged
+
+
+def load_ytcache_entries(path: str) -> List[YoutubeUrlCacheEntry]:
+    filenames = get_ytcache_filenames(path)
+    logger.debug(f"Merging {len(filenames)} youtube url cache file(s) from '{path}'")
+    with gc_paused():
+        merged = merge_ytcaches([read_ytcache(filename) for filename in filenames])
+        return [YoutubeUrlCacheEntry(spotify_url, youtube_url, bool(flags & YTCACHE_VALIDATED),
+                                     bool(flags & YTCACHE_PERMANENTLY_SKIP), isrc)
+                for spotify_url, (youtube_url, flags, isrc) in merged.items()]
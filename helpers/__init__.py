@@ -1,3 +1,4 @@
+import gc
 import os
 import getpass
 import sys
@@ -5,10 +6,12 @@ import __main__
 import time
 from pathlib import Path
 from dotenv import load_dotenv
-from typing import Dict, List, Callable
+from typing import Dict, List, Callable, Iterable, Iterator, Any, IO, TextIO
 from dataclasses import dataclass
 from log import logger
 from functools import wraps
+from contextlib import contextmanager
+from serializer import to_dict, get_backend, SerializerBackend, JSON_BACKEND
 
 
 SPOTIFY_CLIENT_ID_ENV_VARIABLE_STR = "SPOTIFY_CLIENT_ID"
@@ -39,7 +42,66 @@ class EnvironmentVariables:
 
 
 def get_obj_dict(obj) -> Dict:
-    return obj.__dict__
+    return to_dict(obj)
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    # While many objects without cycles are built at once, collections only walk over everything already in memory
+    # again and again, e.g. every song of the playlists downloaded so far
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+@contextmanager
+def open_atomic(filename: str, binary: bool = False) -> Iterator[IO]:
+    # The file is written to a temporary file in the same directory first and then renamed, so an interrupted write
+    # never leaves a partial file behind
+    directory = os.path.dirname(os.path.abspath(filename))
+    temp_filename = os.path.join(directory, f".{os.path.basename(filename)}.{os.getpid()}.tmp")
+    try:
+        with (open(temp_filename, "wb") if binary else open(temp_filename, "w", encoding="utf-8")) as file:
+            yield file
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+def write_json_items(file: TextIO, items: Iterable[Any], backend: SerializerBackend, compact: bool,
+                     level: int = 0) -> int:
+    # Writes the same output as the serializer backend would for list(items) nested `level` deep, but one item at a
+    # time, so the whole string never has to be in memory
+    outer_indent = " " * (backend.indent * level)
+    indent = outer_indent + " " * backend.indent
+    count = 0
+    for item in items:
+        if compact:
+            file.write("," if count > 0 else "[")
+            file.write(backend.dumps(item, True))
+        else:
+            file.write(f",\n{indent}" if count > 0 else f"[\n{indent}")
+            file.write(backend.dumps(item, False).replace("\n", f"\n{indent}"))
+        count += 1
+
+    if count == 0:
+        file.write("[]")
+    else:
+        file.write("]" if compact else f"\n{outer_indent}]")
+    return count
+
+
+def write_json_array(filename: str, items: Iterable[Any], compact: bool = False,
+                     serializer_backend: str = JSON_BACKEND) -> int:
+    backend = get_backend(serializer_backend)
+    with open_atomic(filename) as file:
+        return write_json_items(file, items, backend, compact)
 
 
 def null_or_empty(response: str, env_var_name) -> bool:
@@ -125,6 +187,13 @@ def get_cache_file_path() -> str:
     return cache_abs_filepath
 
 
+def get_youtube_url_cache_file_path() -> str:
+    cache_filepath = os.path.join(str(Path.home()), ".config", "spotilistcli", "youtube_url_cache.db")
+    cache_abs_filepath = os.path.abspath(cache_filepath)
+
+    return cache_abs_filepath
+
+
 def login_required(func) -> Callable:
     @wraps(func)
     def wrapper(*args, **kwargs) -> None:
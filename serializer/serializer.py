@@ -0,0 +1,79 @@
+import json
+from dataclasses import dataclass, fields, is_dataclass
+from operator import attrgetter
+from typing import Any, Callable, Dict, Tuple, Type
+from log import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+JSON_BACKEND = "json"
+ORJSON_BACKEND = "orjson"
+
+# One converter per class, built the first time an object of that class is serialized
+converters: Dict[Type, Callable[[Any], Dict]] = {}
+
+
+def get_attribute_names(cls: Type) -> Tuple[str, ...]:
+    if is_dataclass(cls):
+        return tuple(field.name for field in fields(cls))
+    # Base class slots come first to match the attribute order
+    return tuple(name for base in reversed(cls.__mro__) for name in getattr(base, "__slots__", ()))
+
+
+def make_converter(cls: Type) -> Callable[[Any], Dict]:
+    names = get_attribute_names(cls)
+    if len(names) == 0:
+        return lambda obj: obj.__dict__
+    if len(names) == 1:
+        name = names[0]
+        return lambda obj: {name: getattr(obj, name)}
+
+    getter = attrgetter(*names)
+    return lambda obj: dict(zip(names, getter(obj)))
+
+
+def to_dict(obj: Any) -> Dict:
+    converter = converters.get(type(obj))
+    if converter is None:
+        converter = converters.setdefault(type(obj), make_converter(type(obj)))
+    return converter(obj)
+
+
+def dumps_sorted(obj: Any) -> str:
+    return json.dumps(obj, default=to_dict, sort_keys=True)
+
+
+def dumps_json(obj: Any, compact: bool) -> str:
+    if compact:
+        return json.dumps(obj, separators=(",", ":"), default=to_dict)
+    return json.dumps(obj, indent=4, default=to_dict)
+
+
+def dumps_orjson(obj: Any, compact: bool) -> str:
+    # orjson serializes dataclasses natively and only supports an indentation of 2 spaces
+    option = 0 if compact else orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=to_dict, option=option).decode("utf-8")
+
+
+@dataclass
+class SerializerBackend:
+    name: str
+    indent: int
+    dumps: Callable[[Any, bool], str]
+
+
+BACKENDS = {
+    JSON_BACKEND: SerializerBackend(name=JSON_BACKEND, indent=4, dumps=dumps_json),
+    ORJSON_BACKEND: SerializerBackend(name=ORJSON_BACKEND, indent=2, dumps=dumps_orjson),
+}
+
+
+def get_backend(name: str) -> SerializerBackend:
+    if name == ORJSON_BACKEND and orjson is None:
+        logger.warning(f"'{ORJSON_BACKEND}' is not installed, falling back to '{JSON_BACKEND}'")
+        return BACKENDS[JSON_BACKEND]
+    return BACKENDS[name]
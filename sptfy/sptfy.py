@@ -1,16 +1,34 @@
+import concurrent.futures
 import spotipy
-import json
 import sys
+import threading
 from spotipy import SpotifyException
 from spotipy.oauth2 import SpotifyOAuth, CacheFileHandler
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+from dataclasses import dataclass, replace
+from typing import List, Dict, Optional, Callable, Iterator
 from log import logger
 from helpers import get_cache_file_path, get_required_environment_variables
+from serializer import dumps_sorted
 
 
 spotify = None
 
+LIKED_SONGS_PLAYLIST_ID = "liked_songs"
+
+# Maximum number of pages of a single collection that are requested at the same time
+MAX_PAGE_WORKERS = 3
+
+# Field projections for `playlist_items`, only the fields read by the parsers below are requested. `total` and `next`
+# are always needed for pagination. The other collection endpoints do not support the `fields` parameter.
+FIELDS_PROFILE_MINIMAL = "minimal"
+FIELDS_PROFILE_FULL = "full"
+PLAYLIST_ITEMS_FIELDS = {
+    FIELDS_PROFILE_MINIMAL: "items(track(id,name,artists(name),external_urls(spotify))),next,total",
+    FIELDS_PROFILE_FULL: "items(track(id,name,artists(name),album(id,name,release_date,artists(name),"
+                         "images(url,height,width)),track_number,disc_number,duration_ms,external_urls(spotify),"
+                         "external_ids(isrc,ean,upc))),next,total",
+}
+
 
 @dataclass
 class User:
@@ -19,11 +37,7 @@ class User:
     url: str
 
     def to_json(self) -> str:
-        return json.dumps(
-            self,
-            default=lambda o: o.__dict__,
-            sort_keys=True
-        )
+        return dumps_sorted(self)
 
     def __repr__(self):
         return f"{self.name}"
@@ -34,28 +48,20 @@ class Artist:
     name: str
 
     def to_json(self) -> str:
-        return json.dumps(
-            self,
-            default=lambda o: o.__dict__,
-            sort_keys=True
-        )
+        return dumps_sorted(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class AlbumImage:
     url: str
     height: int
     width: int
 
     def to_json(self) -> str:
-        return json.dumps(
-            self,
-            default=lambda o: o.__dict__,
-            sort_keys=True
-        )
+        return dumps_sorted(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Album:
     name: str
     artists: List[str]
@@ -63,27 +69,19 @@ class Album:
     images: List[AlbumImage]
 
     def to_json(self) -> str:
-        return json.dumps(
-            self,
-            default=lambda o: o.__dict__,
-            sort_keys=True
-        )
+        return dumps_sorted(self)
 
-@dataclass
+@dataclass(slots=True)
 class ExternalIds:
     isrc: str
     ean: str
     upc: str
 
     def to_json(self) -> str:
-        return json.dumps(
-            self,
-            default=lambda o: o.__dict__,
-            sort_keys=True
-        )
+        return dumps_sorted(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Song:
     name: str
     artists: List[str]
@@ -96,19 +94,16 @@ class Song:
     youtube_url: Optional[str] = None
     youtube_url_validated: bool = False
     youtube_url_permanently_skip: bool = False
+    added_at: Optional[str] = None
 
     def to_json(self) -> str:
-        return json.dumps(
-            self,
-            default=lambda o: o.__dict__,
-            sort_keys=True
-        )
+        return dumps_sorted(self)
 
     def __repr__(self):
         return f"{self.name}"
 
 
-@dataclass
+@dataclass(slots=True)
 class PlaylistNoSongs:
     id: str
     name: str
@@ -116,12 +111,13 @@ class PlaylistNoSongs:
     total: int
     spotify_playlist_url: str
     owner_spotify_id: str
+    snapshot_id: Optional[str] = None
 
     def __repr__(self) -> str:
         return f"{self.name}"
 
 
-@dataclass
+@dataclass(init=False, slots=True)
 class PlaylistWithSongs(PlaylistNoSongs):
     songs: List[Song]
 
@@ -132,14 +128,52 @@ class PlaylistWithSongs(PlaylistNoSongs):
         self.total = playlist.total
         self.spotify_playlist_url = playlist.spotify_playlist_url
         self.owner_spotify_id = playlist.owner_spotify_id
+        self.snapshot_id = playlist.snapshot_id
         self.songs = songs
 
     def to_json(self) -> str:
-        return json.dumps(
-            self,
-            default=lambda o: o.__dict__,
-            sort_keys=True
-        )
+        return dumps_sorted(self)
+
+
+class TrackRegistry:
+    # Every occurrence of the same track shares one Song, and songs from the same album share one Album. Songs are
+    # keyed by their track id alone, Liked Songs entries carry the date they were saved so they get a copy of the
+    # shared Song with their own `added_at` that still refers to the same track data. Items without an id, like local
+    # files, are not shared.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.songs: Dict[str, Song] = {}
+        self.albums: Dict[str, Album] = {}
+        self.songs_seen = 0
+        self.albums_seen = 0
+
+    def intern_song(self, item: Dict, song: Song) -> Song:
+        track_id = item["track"].get("id")
+        if track_id is None:
+            return song
+
+        with self.lock:
+            self.songs_seen += 1
+            track = self.songs.get(track_id)
+            if track is None:
+                album = item["track"].get("album")
+                if song.album is not None and album is not None and album.get("id") is not None:
+                    self.albums_seen += 1
+                    song.album = self.albums.setdefault(album["id"], song.album)
+                track = song if song.added_at is None else replace(song, added_at=None)
+                self.songs[track_id] = track
+
+        if song.added_at is None:
+            return track
+        return replace(track, added_at=song.added_at)
+
+    def log_dedup_ratios(self) -> None:
+        for name, seen, unique in [("songs", self.songs_seen, len(self.songs)),
+                                   ("albums", self.albums_seen, len(self.albums))]:
+            if seen == 0:
+                continue
+            duplicates = seen - unique
+            logger.info(f"Unique {name}: {unique}/{seen}, {round(duplicates / seen * 100, 2)}% were duplicates")
 
 
 def get_artists(song: Dict) -> List[str]:
@@ -153,7 +187,7 @@ def get_artists(song: Dict) -> List[str]:
 
 def get_spotify_url(song: Dict) -> str:
     spotify_url = 'None'
-    if 'spotify' not in song['track']['external_urls']:
+    if 'external_urls' not in song['track'] or 'spotify' not in song['track']['external_urls']:
         return spotify_url
     spotify_url = song['track']['external_urls']["spotify"]
     return spotify_url
@@ -181,18 +215,18 @@ def get_album(song: Dict) -> Album:
                     )
                 )
             except:
-                logger.warning(f"Couldn't process image from album '{album["name"]}'")
+                logger.warning(f"Couldn't process image from album '{album.get("name")}'")
 
     return Album(
-        name=album["name"],
+        name=album.get("name"),
         artists=artists,
-        release_date=album["release_date"],
+        release_date=album.get("release_date"),
         images=images
     )
 
 
 def get_external_ids(song: Dict) -> Optional[ExternalIds]:
-    if "external_ids" not in song["track"]:
+    if "external_ids" not in song["track"] or song["track"]["external_ids"] is None:
         return None
     
     external_ids_dict = song["track"]["external_ids"]
@@ -207,6 +241,60 @@ def get_external_ids(song: Dict) -> Optional[ExternalIds]:
     )
 
 
+def get_playlist_track(item: Dict) -> Song:
+    artists = get_artists(item)
+    spotify_url = get_spotify_url(item)
+    spotify_url = spotify_url if spotify_url != "None" else item["track"]["name"] + "---" + ", ".join(artists)
+    return Song(
+        name=item["track"]["name"],
+        artists=artists,
+        album=get_album(item),
+        track_number=item["track"].get("track_number"),
+        disc_number=item["track"].get("disc_number"),
+        duration_ms=item["track"].get("duration_ms"),
+        external_ids=get_external_ids(item),
+        spotify_url=spotify_url,
+        youtube_url=None
+    )
+
+
+def get_saved_track(item: Dict) -> Song:
+    return Song(
+        name=item["track"]["name"],
+        artists=get_artists(item),
+        album=get_album(item),
+        track_number=item["track"].get("track_number"),
+        disc_number=item["track"].get("disc_number"),
+        duration_ms=item["track"].get("duration_ms"),
+        external_ids=get_external_ids(item),
+        spotify_url=get_spotify_url(item),
+        youtube_url=None,
+        added_at=item.get("added_at")
+    )
+
+
+def iter_pages(get_page: Callable[[int], Dict], limit: int, offset: int = 0,
+               max_workers: int = MAX_PAGE_WORKERS) -> Iterator[Dict]:
+    # The first page tells us the total number of items, the remaining pages are then requested concurrently and
+    # yielded back in offset order. Responses without a total fall back to following the `next` links one at a time.
+    query = get_page(offset)
+
+    if query["next"] is None or query.get("total") is None:
+        yield query
+        while query["next"] is not None:
+            offset += limit
+            query = get_page(offset)
+            yield query
+        return
+
+    remaining_offsets = range(offset + limit, query["total"], limit)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Requested before the first page is handed back, so they are retrieved while the first page is processed
+        remaining_pages = executor.map(get_page, remaining_offsets)
+        yield query
+        yield from remaining_pages
+
+
 class Sptfy:
     def __init__(self, spotify_client_id, spotify_client_secret, spotify_redirect_uri):
         logger.info(f"Authenticating with spotify")
@@ -224,6 +312,7 @@ class Sptfy:
         self.spotify = spotipy.Spotify(
             auth_manager=auth_manager
         )
+        self.track_registry = TrackRegistry()
 
     def auth(self) -> bool:
         self.spotify.current_user()
@@ -231,13 +320,16 @@ class Sptfy:
 
     def get_all_playlists_no_songs(self, limit=50, offset=0) -> List[PlaylistNoSongs]:
         logger.info(f"Retrieving all playlists")
-        playlists = []
+        return list(self.iter_all_playlists_no_songs(limit=limit, offset=offset))
 
-        while True:
-            query = self.spotify.current_user_playlists(
+    def iter_all_playlists_no_songs(self, limit=50, offset=0) -> Iterator[PlaylistNoSongs]:
+        def get_page(page_offset: int) -> Dict:
+            return self.spotify.current_user_playlists(
                 limit=limit,
-                offset=offset
+                offset=page_offset
             )
+
+        for query in iter_pages(get_page, limit, offset):
             for item in query['items']:
                 playlist = PlaylistNoSongs(
                     id=item['id'],
@@ -245,62 +337,83 @@ class Sptfy:
                     description=item['description'],
                     total=item['tracks']['total'],
                     spotify_playlist_url=item['external_urls']['spotify'],
-                    owner_spotify_id= item["owner"]["id"]
+                    owner_spotify_id= item["owner"]["id"],
+                    snapshot_id=item.get("snapshot_id")
                 )
-                playlists.append(playlist)
-            if query['next'] is not None:
-                offset += limit
-            else:
-                break
-        return playlists
+                yield playlist
 
-    def get_playlist_content(self, playlist_id: str, limit=100, offset=0) -> List[Song]:
+    def get_playlist_content(self, playlist_id: str, limit=100, offset=0,
+                             fields_profile=FIELDS_PROFILE_FULL) -> List[Song]:
         logger.debug(f"Retrieving contents for playlist '{playlist_id}'")
-        songs = []
-        while True:
-            query = self.spotify.playlist_items(
+        return list(self.iter_playlist_content(playlist_id, limit=limit, offset=offset, fields_profile=fields_profile))
+
+    def iter_playlist_content(self, playlist_id: str, limit=100, offset=0,
+                              fields_profile=FIELDS_PROFILE_FULL) -> Iterator[Song]:
+        def get_page(page_offset: int) -> Dict:
+            return self.spotify.playlist_items(
                 playlist_id=playlist_id,
                 limit=limit,
-                offset=offset,
-                # fields="items(track(name,artists(name),album(name,release_date,artists(name),images),track_number,disc_number,duration_ms,external_urls(spotify),external_ids(isrc,ean,upc))),next"
+                offset=page_offset,
+                fields=PLAYLIST_ITEMS_FIELDS[fields_profile]
             )
 
+        for query in iter_pages(get_page, limit, offset):
             for item in query["items"]:
                 if item is None or item["track"] is None:
                     continue
-                artists = get_artists(item)
-                album = get_album(item)
-                track_number = item["track"]["track_number"]
-                disc_number = item["track"]["disc_number"]
-                duration_ms = item["track"]["duration_ms"]
-                spotify_url = get_spotify_url(item)
-                spotify_url = spotify_url if spotify_url != "None" else item["track"]["name"] + "---" + ", ".join(artists)
-                external_ids = get_external_ids(item)
-                song = Song(
-                    name=item["track"]["name"],
-                    artists=artists,
-                    album=album,
-                    track_number=track_number,
-                    disc_number=disc_number,
-                    duration_ms=duration_ms,
-                    external_ids=external_ids,
-                    spotify_url=spotify_url,
-                    youtube_url=None
-                )
-                songs.append(song)
-
-            if query['next'] is not None:
-                offset += limit
-            else:
-                break
-        return songs
+                yield self.track_registry.intern_song(item, get_playlist_track(item))
 
-    def get_saved_tracks_as_playlist(self, limit=20, offset=0) -> PlaylistWithSongs:
+    def get_saved_tracks_as_playlist(self, limit=50, offset=0,
+                                     previous_liked_songs: Optional[PlaylistWithSongs] = None) -> PlaylistWithSongs:
         logger.debug(f"Retrieving saved tracks for user")
 
         user_id = self.get_user_id()
 
-        songs = []
+        songs = None
+        if previous_liked_songs is not None:
+            songs = self.get_saved_tracks_since(previous_liked_songs.songs, limit=limit)
+        if songs is None:
+            songs = self.get_saved_tracks(limit=limit, offset=offset)
+
+        playlist = PlaylistWithSongs(
+            PlaylistNoSongs(
+                id=LIKED_SONGS_PLAYLIST_ID,
+                name="Liked Songs",
+                description="Liked Songs",
+                total=len(songs),
+                spotify_playlist_url="None",
+                owner_spotify_id=user_id
+            ),
+            songs=songs
+        )
+        return playlist
+
+    def get_saved_tracks(self, limit=50, offset=0) -> List[Song]:
+        return list(self.iter_saved_tracks(limit=limit, offset=offset))
+
+    def iter_saved_tracks(self, limit=50, offset=0) -> Iterator[Song]:
+        def get_page(page_offset: int) -> Dict:
+            return self.spotify.current_user_saved_tracks(
+                limit=limit,
+                offset=page_offset,
+            )
+
+        for query in iter_pages(get_page, limit, offset):
+            for item in query["items"]:
+                if item is None or item["track"] is None:
+                    continue
+                yield self.track_registry.intern_song(item, get_saved_track(item))
+
+    def get_saved_tracks_since(self, previous_songs: List[Song], limit=50) -> Optional[List[Song]]:
+        # Saved tracks are returned newest first, so only the tracks saved before the first already known one are new.
+        # Returns None when the previous songs can't be reused and every saved track has to be retrieved again.
+        known_songs = {(song.spotify_url, song.added_at) for song in previous_songs if song.added_at is not None}
+        if len(known_songs) == 0:
+            logger.debug(f"Previous liked songs have no `added_at`, retrieving all saved tracks")
+            return None
+
+        new_songs = []
+        offset = 0
         while True:
             query = self.spotify.current_user_saved_tracks(
                 limit=limit,
@@ -310,44 +423,26 @@ class Sptfy:
             for item in query["items"]:
                 if item is None or item["track"] is None:
                     continue
+                song = get_saved_track(item)
+                if (song.spotify_url, song.added_at) not in known_songs:
+                    new_songs.append(self.track_registry.intern_song(item, song))
+                    continue
 
-                artists = get_artists(item)
-                album = get_album(item)
-                track_number = item["track"]["track_number"]
-                disc_number = item["track"]["disc_number"]
-                duration_ms = item["track"]["duration_ms"]
-                external_ids = get_external_ids(item)
-                spotify_url = get_spotify_url(item)
-                song = Song(
-                    name=item["track"]["name"],
-                    artists=artists,
-                    album=album,
-                    track_number=track_number,
-                    disc_number=disc_number,
-                    duration_ms=duration_ms,
-                    external_ids=external_ids,
-                    spotify_url=spotify_url,
-                    youtube_url=None
-                )
-                songs.append(song)
+                songs = new_songs + previous_songs
+                if len(songs) != query.get("total"):
+                    logger.info(f"Liked songs were removed since the previous file, retrieving all saved tracks")
+                    return None
+                logger.debug(f"Found {len(new_songs)} new saved tracks since the previous file")
+                return songs
 
             if query['next'] is not None:
                 offset += limit
             else:
                 break
 
-        playlist = PlaylistWithSongs(
-            PlaylistNoSongs(
-                id="liked_songs",
-                name="Liked Songs",
-                description="Liked Songs",
-                total=len(songs),
-                spotify_playlist_url="None",
-                owner_spotify_id=user_id
-            ),
-            songs=songs
-        )
-        return playlist
+        # None of the previous songs are still saved, every saved track has been retrieved already
+        logger.debug(f"None of the previous liked songs are still saved")
+        return new_songs
 
     def get_user_id(self) -> str:
         query = self.spotify.me()
@@ -0,0 +1,504 @@
+import gzip
+import json
+import os
+import pytest
+import export
+import sptfy
+from click.testing import CliRunner
+from commands.convert import convert
+from commands.validate.youtube_urls import update_validated_song
+
+
+def test_load_playlists_builds_models():
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+
+    assert len(playlists) == 119
+    assert all(isinstance(playlist, sptfy.PlaylistWithSongs) for playlist in playlists)
+    songs = [song for playlist in playlists for song in playlist.songs]
+    assert len(songs) == 386
+    assert all(isinstance(song, sptfy.Song) for song in songs)
+    assert all(isinstance(song.album, sptfy.Album) for song in songs)
+    assert all(isinstance(song.external_ids, sptfy.ExternalIds) for song in songs)
+    assert all(isinstance(image, sptfy.AlbumImage) for song in songs for image in song.album.images)
+
+
+def test_decode_playlists_tolerates_missing_fields():
+    data = b'[{"id": "1", "name": "Playlist", "spotify_playlist_url": "https://example.invalid", "songs": [' \
+           b'{"name": "Song", "artists": ["Artist"], "spotify_url": "https://example.invalid/1"}]}]'
+
+    playlists = export.decode_playlists(data)
+
+    assert playlists[0].description == ""
+    assert playlists[0].total == 1
+    assert playlists[0].owner_spotify_id is None
+    assert playlists[0].snapshot_id is None
+    song = playlists[0].songs[0]
+    assert song.album == sptfy.Album(name="", artists=[], release_date="", images=[])
+    assert song.external_ids is None
+    assert song.youtube_url is None
+    assert song.youtube_url_validated is False
+    assert song.youtube_url_permanently_skip is False
+    assert song.added_at is None
+
+
+def test_load_playlists_matches_written_export(tmp_path):
+    song = sptfy.Song(
+        name="A Song",
+        artists=["Artist"],
+        album=sptfy.Album(name="An Album", artists=["Artist"], release_date="2001-01-01",
+                          images=[sptfy.AlbumImage(url="https://example.invalid/image", height=640, width=640)]),
+        track_number=1,
+        disc_number=1,
+        duration_ms=244000,
+        external_ids=sptfy.ExternalIds("isrc", None, None),
+        spotify_url="https://example.invalid/song",
+        youtube_url="https://music.youtube.com/watch?v=1",
+        youtube_url_validated=True,
+        added_at="2024-01-01T00:00:00Z"
+    )
+    playlist = sptfy.PlaylistWithSongs(sptfy.PlaylistNoSongs(
+        id="1",
+        name="Playlist",
+        description="",
+        total=1,
+        spotify_playlist_url="https://example.invalid/playlist",
+        owner_spotify_id="user",
+        snapshot_id="snapshot"
+    ), [song])
+    filename = str(tmp_path / "playlists.json")
+    with open(filename, "w") as file:
+        file.write(f"[{playlist.to_json()}]")
+
+    assert export.load_playlists(filename) == [playlist]
+
+
+def test_load_youtube_url_cache_entries():
+    entries = export.load_youtube_url_cache_entries("tests/files/preload_youtube_url_cache.json.test")
+
+    assert len(entries) == 3
+    assert all(isinstance(entry, export.YoutubeUrlCacheEntry) for entry in entries)
+    assert [(entry.spotify_url, entry.youtube_url) for entry in entries] == [
+        ("https://example3.invalid", None),
+        ("https://example2.invalid", "https://music.youtube.com/watch?v=1234"),
+        ("https://example.invalid", "https://music.youtube.com/watch?v=wxyz"),
+    ]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_write_playlists_version_2_round_trips(tmp_path, compact):
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / "playlists.json")
+
+    count = export.write_playlists(filename, playlists, export.EXPORT_VERSION_2, compact=compact)
+
+    assert count == 119
+    with open(filename, "r") as file:
+        document = json.load(file)
+    assert document["version"] == export.EXPORT_VERSION_2
+    assert len(document["playlists"]) == 119
+    assert all("track" in entry for playlist in document["playlists"] for entry in playlist["songs"])
+    actual, export_version = export.load_export(filename)
+    assert export_version == export.EXPORT_VERSION_2
+    assert actual == playlists
+
+
+def test_write_playlists_version_2_is_smaller(tmp_path):
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename_v1 = str(tmp_path / "playlists_v1.json")
+    filename_v2 = str(tmp_path / "playlists_v2.json")
+
+    export.write_playlists(filename_v1, playlists, export.EXPORT_VERSION_1)
+    export.write_playlists(filename_v2, playlists, export.EXPORT_VERSION_2)
+
+    assert os.path.getsize(filename_v2) < os.path.getsize(filename_v1) / 2
+
+
+def test_write_playlists_version_2_keeps_different_songs_with_the_same_track_id(tmp_path):
+    first = sptfy.Song(name="Song", artists=["Artist"], album=None, track_number=1, disc_number=1, duration_ms=1,
+                       external_ids=None, spotify_url="https://open.spotify.com/track/abc")
+    second = sptfy.Song(name="Other Song", artists=["Artist"], album=None, track_number=2, disc_number=1,
+                        duration_ms=1, external_ids=None, spotify_url="https://open.spotify.com/track/abc",
+                        added_at="2024-01-01T00:00:00Z")
+    playlist = sptfy.PlaylistWithSongs(sptfy.PlaylistNoSongs(
+        id="1", name="Playlist", description="", total=3, spotify_playlist_url="https://example.invalid",
+        owner_spotify_id="user"
+    ), [first, second, first])
+    filename = str(tmp_path / "playlists.json")
+
+    export.write_playlists(filename, [playlist], export.EXPORT_VERSION_2)
+
+    with open(filename, "r") as file:
+        document = json.load(file)
+    assert list(document["tracks"].keys()) == ["abc", "abc#2"]
+    assert document["playlists"][0]["songs"] == [
+        {"track": "abc"},
+        {"track": "abc#2", "added_at": "2024-01-01T00:00:00Z"},
+        {"track": "abc"},
+    ]
+    assert export.load_playlists(filename) == [playlist]
+
+
+def test_load_export_shares_songs_between_playlists(tmp_path):
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / "playlists.json")
+    export.write_playlists(filename, playlists, export.EXPORT_VERSION_2)
+
+    actual = export.load_playlists(filename)
+
+    songs = [song for playlist in actual for song in playlist.songs]
+    assert len({id(song) for song in songs}) < len(songs)
+
+
+def test_load_export_unsupported_version(tmp_path):
+    filename = str(tmp_path / "playlists.json")
+    with open(filename, "w") as file:
+        file.write('{"version": 99, "playlists": [], "tracks": {}}')
+
+    with pytest.raises(ValueError):
+        export.load_export(filename)
+
+
+def test_load_youtube_url_cache_entries_version_2(tmp_path):
+    playlists = export.load_playlists("tests/files/preload_youtube_url_cache.json.test")
+    filename = str(tmp_path / "playlists.json")
+    export.write_playlists(filename, playlists, export.EXPORT_VERSION_2)
+
+    expected = export.load_youtube_url_cache_entries("tests/files/preload_youtube_url_cache.json.test")
+    assert export.load_youtube_url_cache_entries(filename) == expected
+
+
+def test_update_validated_song_keeps_export_version(tmp_path):
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / "playlists.json")
+    export.write_playlists(filename, playlists, export.EXPORT_VERSION_2)
+    playlists, export_version = export.load_export(filename)
+
+    update_validated_song(playlists, "https://example01.invalid", "https://music.youtube.com/watch?v=1", filename,
+                          export_version)
+
+    actual, actual_export_version = export.load_export(filename)
+    assert actual_export_version == export.EXPORT_VERSION_2
+    validated = [song for playlist in actual for song in playlist.songs
+                 if song.spotify_url == "https://example01.invalid"]
+    assert len(validated) > 0
+    assert all(song.youtube_url_validated for song in validated)
+
+
+def test_convert_both_ways(tmp_path):
+    filename_v2 = str(tmp_path / "playlists_v2.json")
+    filename_v1 = str(tmp_path / "playlists_v1.json")
+    runner = CliRunner()
+
+    result = runner.invoke(convert, ["--input-filename", "tests/files/validate_youtube_urls_input.json.test",
+                                     "--output-filename", filename_v2, "--export-version", "2"])
+    assert result.exit_code == 0
+    result = runner.invoke(convert, ["--input-filename", filename_v2, "--output-filename", filename_v1,
+                                     "--export-version", "1"])
+    assert result.exit_code == 0
+
+    assert export.load_export(filename_v1) == export.load_export("tests/files/validate_youtube_urls_input.json.test")
+
+
+@pytest.mark.parametrize("extension", [".json.gz", ".json.zst"])
+@pytest.mark.parametrize("export_version", [export.EXPORT_VERSION_1, export.EXPORT_VERSION_2])
+def test_write_playlists_compressed_round_trips(tmp_path, extension, export_version):
+    if extension.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / f"playlists{extension}")
+    uncompressed_filename = str(tmp_path / "playlists.json")
+
+    export.write_playlists(filename, playlists, export_version)
+    export.write_playlists(uncompressed_filename, playlists, export_version)
+
+    assert os.path.getsize(filename) < os.path.getsize(uncompressed_filename)
+    assert export.load_export(filename) == (playlists, export_version)
+    assert export.load_youtube_url_cache_entries(filename) == \
+        export.load_youtube_url_cache_entries(uncompressed_filename)
+    with export.open_export_reader(filename) as file, open(uncompressed_filename, "rb") as uncompressed_file:
+        assert file.read() == uncompressed_file.read()
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
+
+
+def test_gzip_export_can_be_read_by_gzip(tmp_path):
+    playlists = export.load_playlists("tests/files/preload_youtube_url_cache.json.test")
+    filename = str(tmp_path / "playlists.json.gz")
+
+    export.write_playlists(filename, playlists)
+
+    with gzip.open(filename, "rt", encoding="utf-8") as file:
+        assert len(json.load(file)) == len(playlists)
+
+
+def test_zstd_not_installed(monkeypatch):
+    monkeypatch.setattr(export.compression, "zstandard", None)
+
+    assert export.is_export_filename("playlists.json.gz")
+    assert not export.is_export_filename("playlists.json.zst")
+    assert "zstandard" in export.get_export_filename_error("playlists.json.zst")
+    with pytest.raises(ValueError):
+        export.load_playlists("playlists.json.zst")
+
+
+def test_is_export_filename():
+    assert export.is_export_filename("playlists.json")
+    assert export.is_export_filename("playlists.json.gz")
+    assert not export.is_export_filename("playlists.gz")
+    assert not export.is_export_filename("playlists.txt")
+
+
+def test_write_ndjson_playlists(tmp_path):
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / "playlists.ndjson")
+
+    count = export.write_playlists(filename, playlists)
+
+    assert count == 119
+    with open(filename, "r") as file:
+        records = [json.loads(line) for line in file]
+    assert len(records) == len(playlists) + sum(len(playlist.songs) for playlist in playlists)
+    assert records[0]["type"] == "playlist"
+    assert "songs" not in records[0]
+    assert records[1]["type"] == "song"
+    assert records[1]["playlist_id"] == records[0]["id"]
+    assert export.load_export(filename) == (playlists, export.EXPORT_VERSION_1)
+    assert list(export.iter_ndjson_playlists(filename)) == playlists
+
+
+@pytest.mark.parametrize("num_ranges", [1, 2, 7, 64])
+def test_ndjson_byte_ranges_read_every_line_once(tmp_path, num_ranges):
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / "playlists.ndjson")
+    export.write_playlists(filename, playlists)
+
+    byte_ranges = export.get_byte_ranges(os.path.getsize(filename), num_ranges)
+    chunks = [export.decode_ndjson_byte_range(filename, start, end) for start, end in byte_ranges]
+
+    assert byte_ranges[0][0] == 0
+    assert byte_ranges[-1][1] == os.path.getsize(filename)
+    assert export.merge_ndjson_chunks(chunks) == playlists
+
+
+def test_load_ndjson_playlists_in_parallel(tmp_path):
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / "playlists.ndjson")
+    export.write_playlists(filename, playlists)
+
+    assert export.load_ndjson_playlists(filename, max_workers=3, min_parallel_bytes=0) == playlists
+
+
+def test_load_ndjson_playlists_starting_with_a_song(tmp_path):
+    filename = str(tmp_path / "playlists.ndjson")
+    with open(filename, "w") as file:
+        file.write('{"type": "song", "playlist_id": "1", "name": "Song", "artists": [], '
+                   '"spotify_url": "https://example.invalid"}\n')
+
+    with pytest.raises(ValueError):
+        export.load_playlists(filename)
+
+
+@pytest.mark.parametrize("extension", [".ndjson", ".ndjson.gz"])
+def test_load_ndjson_youtube_url_cache_entries(tmp_path, extension):
+    playlists = export.load_playlists("tests/files/preload_youtube_url_cache.json.test")
+    filename = str(tmp_path / f"playlists{extension}")
+    export.write_playlists(filename, playlists)
+
+    expected = export.load_youtube_url_cache_entries("tests/files/preload_youtube_url_cache.json.test")
+    assert export.load_youtube_url_cache_entries(filename) == expected
+    assert export.load_playlists(filename) == playlists
+
+
+def test_get_export_format():
+    assert export.get_export_format("playlists.json") == export.JSON_FORMAT
+    assert export.get_export_format("playlists.json.gz") == export.JSON_FORMAT
+    assert export.get_export_format("playlists.ndjson") == export.NDJSON_FORMAT
+    assert export.get_export_format("playlists.ndjson.zst") == export.NDJSON_FORMAT
+    assert export.is_export_filename("playlists.ndjson", export.NDJSON_FORMAT)
+    assert not export.is_export_filename("playlists.json", export.NDJSON_FORMAT)
+
+
+@pytest.mark.parametrize("export_version, compact, serializer_backend", [
+    (export.EXPORT_VERSION_1, False, "json"),
+    (export.EXPORT_VERSION_1, False, "orjson"),
+    (export.EXPORT_VERSION_1, True, "json"),
+    (export.EXPORT_VERSION_2, False, "json"),
+])
+def test_load_export_in_parallel(tmp_path, export_version, compact, serializer_backend):
+    if serializer_backend == "orjson":
+        pytest.importorskip("orjson")
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / "playlists.json")
+    export.write_playlists(filename, playlists, export_version, compact=compact, serializer_backend=serializer_backend)
+
+    actual = export.load_export(filename, max_workers=3, min_parallel_bytes=0)
+
+    assert actual == (playlists, export_version)
+
+
+def test_load_playlists_in_parallel_only_splits_indented_arrays(tmp_path):
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / "playlists.json")
+
+    export.write_playlists(filename, playlists)
+    assert export.load_playlists_in_parallel(filename, max_workers=2) == playlists
+
+    export.write_playlists(filename, playlists, compact=True)
+    assert export.load_playlists_in_parallel(filename, max_workers=2) is None
+
+    export.write_playlists(filename, playlists, export.EXPORT_VERSION_2)
+    assert export.load_playlists_in_parallel(filename, max_workers=2) is None
+
+
+@pytest.mark.parametrize("offsets, end, num_groups, expected", [
+    ([2, 10, 20, 30], 40, 1, [(2, 40)]),
+    ([2, 10, 20, 30], 40, 2, [(2, 30), (30, 40)]),
+    ([2, 10, 20, 30], 40, 4, [(2, 20), (20, 30), (30, 40)]),
+    ([2], 40, 4, [(2, 40)]),
+])
+def test_group_offsets(offsets, end, num_groups, expected):
+    assert export.group_offsets(offsets, end, num_groups) == expected
+
+
+def test_should_load_in_parallel(tmp_path):
+    filename = str(tmp_path / "playlists.json")
+    with open(filename, "w") as file:
+        file.write("[]")
+
+    assert export.should_load_in_parallel(filename, max_workers=2, min_parallel_bytes=2)
+    assert not export.should_load_in_parallel(filename, max_workers=2, min_parallel_bytes=3)
+    assert not export.should_load_in_parallel(filename, max_workers=1, min_parallel_bytes=0)
+
+
+@pytest.fixture
+def playlists_with_ids():
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    for index, playlist in enumerate(playlists):
+        playlist.id = f"playlist{index}"
+    return playlists
+
+
+@pytest.mark.parametrize("extension, serializer_backend", [
+    (".json", "json"),
+    (".json", "orjson"),
+    (".ndjson", "json"),
+])
+def test_load_indexed_playlist(tmp_path, playlists_with_ids, extension, serializer_backend):
+    if serializer_backend == "orjson":
+        pytest.importorskip("orjson")
+    filename = str(tmp_path / f"playlists{extension}")
+    export.write_playlists(filename, playlists_with_ids, serializer_backend=serializer_backend)
+
+    for playlist in [playlists_with_ids[0], playlists_with_ids[57], playlists_with_ids[-1]]:
+        assert export.load_indexed_playlist(filename, playlist.id) == playlist
+    assert export.load_indexed_playlist(filename, "missing") is None
+
+    with open(export.get_index_filename(filename), "r") as file:
+        index = json.load(file)
+    assert [playlist[0] for playlist in index["playlists"]] == [playlist.id for playlist in playlists_with_ids]
+
+
+def test_load_indexed_playlist_reuses_index(tmp_path, monkeypatch, playlists_with_ids):
+    filename = str(tmp_path / "playlists.json")
+    export.write_playlists(filename, playlists_with_ids)
+    export.load_indexed_playlist(filename, "playlist1")
+
+    def fail(filename):
+        raise AssertionError("The index should not be rebuilt")
+    monkeypatch.setattr(export.index, "build_playlist_index", fail)
+
+    assert export.load_indexed_playlist(filename, "playlist2") == playlists_with_ids[2]
+
+
+def test_load_indexed_playlist_rebuilds_stale_index(tmp_path, playlists_with_ids):
+    filename = str(tmp_path / "playlists.json")
+    export.write_playlists(filename, playlists_with_ids)
+    export.load_indexed_playlist(filename, "playlist1")
+
+    export.write_playlists(filename, playlists_with_ids[1:])
+
+    assert export.load_indexed_playlist(filename, "playlist1") == playlists_with_ids[1]
+    assert export.load_indexed_playlist(filename, "playlist0") is None
+
+
+@pytest.mark.parametrize("extension, export_version, compact", [
+    (".json", export.EXPORT_VERSION_1, True),
+    (".json", export.EXPORT_VERSION_2, False),
+    (".json.gz", export.EXPORT_VERSION_1, False),
+])
+def test_load_indexed_playlist_without_index(tmp_path, playlists_with_ids, extension, export_version, compact):
+    filename = str(tmp_path / f"playlists{extension}")
+    export.write_playlists(filename, playlists_with_ids, export_version, compact=compact)
+
+    assert export.load_indexed_playlist(filename, "playlist3") == playlists_with_ids[3]
+    assert not os.path.exists(export.get_index_filename(filename))
+
+
+def write_ytcache_document(filename, written_at, entries):
+    with open(filename, "w") as file:
+        json.dump({
+            "version": export.YTCACHE_VERSION,
+            "written_at": written_at,
+            "spotify_urls": list(entries.keys()),
+            "youtube_urls": [youtube_url for youtube_url, _, _ in entries.values()],
+            "flags": [export.get_ytcache_flags(validated, skip) for _, validated, skip in entries.values()],
+        }, file)
+
+
+def test_write_ytcache_round_trips(tmp_path):
+    playlists = export.load_playlists("tests/files/preload_youtube_url_cache.json.test")
+    filename = str(tmp_path / "playlists.json.ytcache")
+
+    export.write_ytcache(filename, playlists)
+
+    entries = export.load_youtube_url_cache_entries(filename)
+    assert [(entry.spotify_url, entry.youtube_url) for entry in entries] == [
+        ("https://example2.invalid", "https://music.youtube.com/watch?v=1234"),
+        ("https://example.invalid", "https://music.youtube.com/watch?v=wxyz"),
+    ]
+
+
+def test_load_ytcache_directory_merges_newest_and_validated(tmp_path):
+    write_ytcache_document(str(tmp_path / "old.json.ytcache"), 1, {
+        "https://example.invalid/1": ["https://music.youtube.com/watch?v=old1", True, False],
+        "https://example.invalid/2": ["https://music.youtube.com/watch?v=old2", False, False],
+        "https://example.invalid/3": ["https://music.youtube.com/watch?v=old3", False, False],
+    })
+    # Named so it is listed first, the order comes from when it was written
+    write_ytcache_document(str(tmp_path / "a-new.json.ytcache"), 2, {
+        "https://example.invalid/1": ["https://music.youtube.com/watch?v=new1", False, False],
+        "https://example.invalid/2": ["https://music.youtube.com/watch?v=new2", False, True],
+    })
+    (tmp_path / "playlists.json").write_text("[]")
+
+    entries = export.load_youtube_url_cache_entries(str(tmp_path))
+
+    assert sorted(entries, key=lambda entry: entry.spotify_url) == [
+        export.YoutubeUrlCacheEntry("https://example.invalid/1", "https://music.youtube.com/watch?v=old1", True, False),
+        export.YoutubeUrlCacheEntry("https://example.invalid/2", "https://music.youtube.com/watch?v=new2", False, True),
+        export.YoutubeUrlCacheEntry("https://example.invalid/3", "https://music.youtube.com/watch?v=old3", False, False),
+    ]
+
+
+def test_load_ytcache_unsupported_version(tmp_path):
+    filename = tmp_path / "playlists.json.ytcache"
+    filename.write_text('{"version": 99, "entries": {}}')
+
+    with pytest.raises(ValueError):
+        export.load_youtube_url_cache_entries(str(filename))
+
+
+@pytest.mark.parametrize("extension", [".json", ".ndjson", ".json.ytcache"])
+def test_youtube_url_cache_entries_keep_isrc(tmp_path, extension):
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    filename = str(tmp_path / f"playlists{extension}")
+    if extension == ".json.ytcache":
+        export.write_ytcache(filename, playlists)
+    else:
+        export.write_playlists(filename, playlists)
+
+    entries = export.load_youtube_url_cache_entries(filename)
+
+    isrcs = {song.spotify_url: song.external_ids.isrc for playlist in playlists for song in playlist.songs
+             if song.external_ids is not None and song.youtube_url is not None}
+    assert isrcs
+    assert all(entry.isrc == isrcs[entry.spotify_url] for entry in entries if entry.spotify_url in isrcs)
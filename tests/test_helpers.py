@@ -1,5 +1,9 @@
+import json
+import os
+import tempfile
 import helpers
 import pytest
+import sptfy
 from unittest.mock import mock_open, patch, call
 
 
@@ -141,6 +145,64 @@ def test_get_obj_dict():
     assert helpers.get_obj_dict(env_vars) == expected
 
 
+def test_get_obj_dict_slots():
+    playlist = sptfy.PlaylistWithSongs(sptfy.PlaylistNoSongs(
+        id="1234",
+        name="a playlist",
+        description="something something",
+        total=0,
+        spotify_playlist_url="https://example.invalid",
+        owner_spotify_id="111111111111"
+    ), songs=[])
+
+    actual = helpers.get_obj_dict(playlist)
+
+    assert not hasattr(playlist, "__dict__")
+    assert list(actual.keys()) == ["id", "name", "description", "total", "spotify_playlist_url", "owner_spotify_id",
+                                   "snapshot_id", "songs"]
+
+
+@pytest.mark.parametrize("items", [
+    [],
+    [helpers.EnvironmentVariables("something", "something", "something")],
+    [{"a": [1, 2, {"b": None}], "c": "line\nbreak"}, [], {}, "string", helpers.EnvironmentVariables("a", "b", "c")],
+])
+@pytest.mark.parametrize("compact", [True, False])
+def test_write_json_array(items, compact):
+    tmpdir = tempfile.mkdtemp()
+    temp_file = os.path.join(tmpdir, "test.json")
+
+    count = helpers.write_json_array(temp_file, iter(items), compact=compact)
+
+    with open(temp_file) as file:
+        actual = file.read()
+    if compact:
+        expected = json.dumps(items, separators=(",", ":"), default=helpers.get_obj_dict)
+    else:
+        expected = json.dumps(items, indent=4, default=helpers.get_obj_dict)
+    assert actual == expected
+    assert count == len(items)
+    assert os.listdir(tmpdir) == ["test.json"]
+
+
+def test_write_json_array_interrupted():
+    tmpdir = tempfile.mkdtemp()
+    temp_file = os.path.join(tmpdir, "test.json")
+    with open(temp_file, "w") as file:
+        file.write("[]")
+
+    def items():
+        yield {"a": 1}
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        helpers.write_json_array(temp_file, items())
+
+    with open(temp_file) as file:
+        assert file.read() == "[]"
+    assert os.listdir(tmpdir) == ["test.json"]
+
+
 def test_environment_variables_class_write_to_file():
     filepath = "sptfy_temp/test_file.path"
     env_vars = helpers.EnvironmentVariables(
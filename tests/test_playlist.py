@@ -1,4 +1,5 @@
 import threading
+import time
 import pytest
 import tempfile
 
@@ -11,6 +12,7 @@ import os
 import ytmusic
 from datetime import datetime
 import commands
+import export
 from commands.auth import current_user
 from commands.playlist.download import get_filename, get_playlist_with_songs
 from commands.playlist.shared import filter_playlists
@@ -21,6 +23,15 @@ from tests_shared import patch_spotipy_me
 FROZEN_TIME = datetime(2024, 4, 3, 21, 2, 0)
 
 
+@pytest.fixture(autouse=True)
+def patch_youtube_url_cache_file_path(monkeypatch, tmp_path):
+    # Downloads never read or keep Youtube URLs in the configuration directory of whoever runs the tests
+    youtube_url_cache_file_path = str(tmp_path / "youtube_url_cache.db")
+    monkeypatch.setattr(commands.playlist.download, "get_youtube_url_cache_file_path",
+                        lambda: youtube_url_cache_file_path)
+    return youtube_url_cache_file_path
+
+
 @pytest.fixture
 def sptfy_mock(monkeypatch):
     sptfy_obj = sptfy.Sptfy(
@@ -63,7 +74,7 @@ def test_get_playlist_with_songs(monkeypatch, sptfy_mock):
 
     monkeypatch.setattr(
         spotipy.Spotify, "playlist_items",
-        lambda self, playlist_id, limit, offset: next(data_iter)
+        lambda self, playlist_id, limit, offset, fields: next(data_iter)
     )
 
     playlist_no_song = sptfy.PlaylistNoSongs(
@@ -80,6 +91,190 @@ def test_get_playlist_with_songs(monkeypatch, sptfy_mock):
     assert actual.total == 347
 
 
+def test_get_or_reuse_playlist_with_songs(monkeypatch, sptfy_mock):
+    fetched_playlist_ids = []
+
+    def mocked_get_playlist_with_songs(playlist, sptfy_arg):
+        fetched_playlist_ids.append(playlist.id)
+        return sptfy.PlaylistWithSongs(playlist=playlist, songs=[])
+
+    monkeypatch.setattr(commands.playlist.download, "get_playlist_with_songs", mocked_get_playlist_with_songs)
+
+    previous_songs = [sptfy.Song(
+        name="A Song",
+        artists=["Artist"],
+        album=None,
+        track_number=1,
+        disc_number=1,
+        duration_ms=244000,
+        external_ids=None,
+        spotify_url="https://example.invalid"
+    )]
+    previous_playlists = {
+        playlist_id: sptfy.PlaylistWithSongs(playlist=PlaylistNoSongs(
+            id=playlist_id,
+            name="A Playlist",
+            description="something something",
+            total=1,
+            spotify_playlist_url="https://example.invalid",
+            owner_spotify_id="111111111111",
+            snapshot_id="snapshot1"
+        ), songs=previous_songs)
+        for playlist_id in ["unchanged", "changed", "no_snapshot"]
+    }
+
+    playlists_no_songs = [
+        PlaylistNoSongs(
+            id=playlist_id,
+            name="A Playlist",
+            description="something something",
+            total=1,
+            spotify_playlist_url="https://example.invalid",
+            owner_spotify_id="111111111111",
+            snapshot_id=snapshot_id
+        )
+        for playlist_id, snapshot_id in [("unchanged", "snapshot1"), ("changed", "snapshot2"),
+                                         ("no_snapshot", None), ("new", "snapshot1")]
+    ]
+
+    actual = [
+        commands.playlist.download.get_or_reuse_playlist_with_songs(playlist, sptfy_mock, previous_playlists)
+        for playlist in playlists_no_songs
+    ]
+
+    assert fetched_playlist_ids == ["changed", "no_snapshot", "new"]
+    assert actual[0].songs == previous_songs
+    assert actual[0].snapshot_id == "snapshot1"
+    assert [playlist.id for playlist in actual] == ["unchanged", "changed", "no_snapshot", "new"]
+
+
+def test_get_playlists_with_songs_liked_songs_concurrently(monkeypatch, sptfy_mock):
+    liked_songs_started = threading.Event()
+    liked_songs = sptfy.PlaylistWithSongs(PlaylistNoSongs(
+        id=sptfy.LIKED_SONGS_PLAYLIST_ID,
+        name="Liked Songs",
+        description="Liked Songs",
+        total=0,
+        spotify_playlist_url="None",
+        owner_spotify_id="111111111111"
+    ), songs=[])
+
+    def mocked_get_saved_tracks_as_playlist(self, previous_liked_songs):
+        liked_songs_started.set()
+        return liked_songs
+
+    def mocked_get_playlist_with_songs(playlist, sptfy_arg):
+        # Only completes if liked songs are being retrieved at the same time as the playlists
+        assert liked_songs_started.wait(timeout=5)
+        return sptfy.PlaylistWithSongs(playlist=playlist, songs=[])
+
+    monkeypatch.setattr(sptfy.Sptfy, "get_saved_tracks_as_playlist", mocked_get_saved_tracks_as_playlist)
+    monkeypatch.setattr(commands.playlist.download, "get_playlist_with_songs", mocked_get_playlist_with_songs)
+
+    playlists_no_songs = [
+        PlaylistNoSongs(
+            id=f"playlist{index}",
+            name="A Playlist",
+            description="something something",
+            total=1,
+            spotify_playlist_url="https://example.invalid",
+            owner_spotify_id="111111111111"
+        )
+        for index in range(5)
+    ]
+    actual = commands.playlist.download.get_playlists_with_songs(
+        num_playlists=len(playlists_no_songs) + 1,
+        playlists_no_songs=playlists_no_songs,
+        sptfy=sptfy_mock,
+        show_progress=False
+    )
+
+    assert [playlist.id for playlist in actual] == [f"playlist{index}" for index in range(5)] + ["liked_songs"]
+
+
+def test_get_playlists_with_songs_largest_first(monkeypatch, sptfy_mock):
+    dispatched_playlist_ids = []
+    dispatch_lock = threading.Lock()
+
+    def mocked_get_playlist_with_songs(playlist, sptfy_arg):
+        with dispatch_lock:
+            dispatched_playlist_ids.append(playlist.id)
+        return sptfy.PlaylistWithSongs(playlist=playlist, songs=[])
+
+    monkeypatch.setattr(sptfy.Sptfy, "get_saved_tracks_as_playlist", lambda self, previous_liked_songs: None)
+    monkeypatch.setattr(commands.playlist.download, "get_playlist_with_songs", mocked_get_playlist_with_songs)
+    monkeypatch.setattr(commands.playlist.download, "PLAYLIST_DOWNLOAD_WORKERS", 1)
+
+    totals = [5, 10000, 20, 300, 1]
+    playlists_no_songs = [
+        PlaylistNoSongs(
+            id=f"playlist{total}",
+            name="A Playlist",
+            description="something something",
+            total=total,
+            spotify_playlist_url="https://example.invalid",
+            owner_spotify_id="111111111111"
+        )
+        for total in totals
+    ]
+    actual = commands.playlist.download.get_playlists_with_songs(
+        num_playlists=len(playlists_no_songs) + 1,
+        playlists_no_songs=playlists_no_songs,
+        sptfy=sptfy_mock,
+        show_progress=False
+    )
+
+    assert dispatched_playlist_ids == [f"playlist{total}" for total in sorted(totals, reverse=True)]
+    assert [playlist.id for playlist in actual[:-1]] == [f"playlist{total}" for total in totals]
+
+
+def test_iter_playlists_with_songs_logs_makespans_in_songs(monkeypatch, sptfy_mock):
+    debug_messages = []
+    monkeypatch.setattr(commands.playlist.download.logger, "debug", lambda message: debug_messages.append(message))
+    monkeypatch.setattr(sptfy.Sptfy, "get_saved_tracks_as_playlist", lambda self, previous_liked_songs: None)
+    monkeypatch.setattr(commands.playlist.download, "get_playlist_with_songs",
+                        lambda playlist, sptfy_arg: sptfy.PlaylistWithSongs(playlist=playlist, songs=[]))
+    monkeypatch.setattr(commands.playlist.download, "PLAYLIST_DOWNLOAD_WORKERS", 3)
+
+    totals = [5, 10000, 20, 300, 1]
+    playlists_no_songs = [
+        PlaylistNoSongs(
+            id=f"playlist{total}",
+            name="A Playlist",
+            description="something something",
+            total=total,
+            spotify_playlist_url="https://example.invalid",
+            owner_spotify_id="111111111111"
+        )
+        for total in totals
+    ]
+    # Handling the playlists handed back is not part of the actual makespan
+    for _ in commands.playlist.download.iter_playlists_with_songs(
+        num_playlists=len(playlists_no_songs) + 1,
+        playlists_no_songs=playlists_no_songs,
+        sptfy=sptfy_mock,
+        show_progress=False
+    ):
+        time.sleep(0.2)
+
+    assert "Predicted makespan: 10000 songs on the busiest worker, 10326 songs in total" in debug_messages
+    actual_makespan = next(message for message in debug_messages if message.startswith("Actual makespan: "))
+    songs, _, seconds = actual_makespan.removeprefix("Actual makespan: ").partition(" songs on the busiest worker, "
+                                                                                    "the playlists were downloaded in ")
+    assert 10000 <= int(songs) <= 10326
+    assert float(seconds.removesuffix(" seconds")) < 0.5
+
+
+@pytest.mark.parametrize("costs, num_workers, expected", [
+    ([], 3, 0),
+    ([10000, 20, 300, 1], 1, 10321),
+    ([10000, 20, 300, 1], 2, 10000),
+    ([7, 7, 6, 6, 5, 5], 2, 18),
+])
+def test_get_predicted_makespan(costs, num_workers, expected):
+    assert commands.playlist.download.get_predicted_makespan(costs, num_workers) == expected
+
+
 @pytest.mark.parametrize("args_list, playlist_found, expected_outputs, exit_expected, expected_exit_code", [
     (
         ["--playlist-id", "somethingAb1234Af9D9Cb"],
@@ -127,7 +322,7 @@ def test_show_playlist(monkeypatch, capfd, sptfy_mock,
 
     monkeypatch.setattr(
         spotipy.Spotify, "playlist_items",
-        lambda self, playlist_id, limit, offset: next(data_iter)
+        lambda self, playlist_id, limit, offset, fields: next(data_iter)
     )
 
     monkeypatch.setattr(
@@ -145,6 +340,28 @@ def test_show_playlist(monkeypatch, capfd, sptfy_mock,
             assert expected_output in result.stdout
 
 
+@pytest.mark.parametrize("args_list, expected_exit_code, expected_num_lines", [
+    (["--playlist-id", "somethingAb1234Af9D9Cb"], 0, 3),
+    (["--playlist-id", "somethingAb1234Af9D9Cb", "--show-url", "--show-artists"], 0, 3),
+    (["--playlist-id", "does_not_exist"], 1, 2),
+])
+def test_show_playlist_from_file(monkeypatch, args_list, expected_exit_code, expected_num_lines):
+    monkeypatch.setattr(sptfy, "get_sptfy", lambda: pytest.fail("Spotify should not be contacted"))
+    tmpdir = tempfile.mkdtemp()
+    temp_file = os.path.join(tmpdir, "test.json")
+    with open("tests/files/validate_youtube_urls_input.json.test", "rb") as source, open(temp_file, "wb") as file:
+        file.write(source.read())
+    runner = CliRunner()
+
+    result = runner.invoke(commands.playlist.show.show, args_list + ["--from-file", temp_file])
+
+    assert result.exit_code == expected_exit_code
+    assert len(result.stdout.split("\n")) == expected_num_lines
+    if expected_exit_code == 0:
+        assert "A Song" in result.stdout
+        assert os.path.exists(f"{temp_file}.index.json")
+
+
 @pytest.mark.parametrize("args_list, expected_outputs", [
     (
         [],
@@ -293,6 +510,72 @@ def test_download_playlists(monkeypatch, capfd, sptfy_mock,
     assert actual == expected
 
 
+def test_download_playlists_to_store(monkeypatch, capfd, sptfy_mock,
+                                     patch_get_all_playlists_no_songs, patch_get_playlist_with_songs,
+                                     patch_get_saved_tracks_as_playlist, patch_spotipy_me):
+    runner = CliRunner()
+    tmpdir = tempfile.mkdtemp()
+    store = f"sqlite:///{os.path.join(tmpdir, 'library.db')}"
+    temp_file = os.path.join(tmpdir, "test.json")
+
+    result = runner.invoke(commands.playlist.download.download, ["--store", store])
+    assert result.exit_code == 0
+    result = runner.invoke(commands.export.export, ["--store", store, "--filename", temp_file])
+    assert result.exit_code == 0
+
+    with open(temp_file) as file:
+        actual = json.load(file)
+
+    with open("tests/files/expected_download_playlist.json.test") as file:
+        expected = json.load(file)
+
+    assert actual == expected
+
+
+def test_download_playlists_ndjson(monkeypatch, capfd, sptfy_mock,
+                                   patch_get_all_playlists_no_songs, patch_get_playlist_with_songs,
+                                   patch_get_saved_tracks_as_playlist, patch_spotipy_me):
+    runner = CliRunner()
+    tmpdir = tempfile.mkdtemp()
+    temp_file = os.path.join(tmpdir, "test.ndjson")
+
+    result = runner.invoke(commands.playlist.download.download, ["--format", "ndjson", "--filename", temp_file])
+    assert result.exit_code == 0
+
+    with open(temp_file) as file:
+        records = [json.loads(line) for line in file]
+
+    with open("tests/files/expected_download_playlist.json.test") as file:
+        expected = json.load(file)
+
+    actual = []
+    for record in records:
+        record_type = record.pop("type")
+        if record_type == "playlist":
+            actual.append({**record, "songs": []})
+        else:
+            assert record.pop("playlist_id") == actual[-1]["id"]
+            actual[-1]["songs"].append(record)
+    assert actual == expected
+
+
+def test_download_playlists_ndjson_fail_filename(sptfy_mock):
+    runner = CliRunner()
+    args_list = ["--format", "ndjson", "--filename", "test.json"]
+
+    result = runner.invoke(commands.playlist.download.download, args_list)
+    assert result.exit_code == 1
+
+
+def test_download_playlists_fail_filename_and_store(sptfy_mock):
+    runner = CliRunner()
+    args_list = ["--filename", "test.json", "--store", "sqlite:///library.db"]
+
+    result = runner.invoke(commands.playlist.download.download, args_list)
+    assert result.exit_code == 1
+    assert not os.path.exists("library.db")
+
+
 @pytest.mark.parametrize("test_case", [
     {
         "youtube_url_validated": False,
@@ -697,7 +980,7 @@ def test_download_playlists(monkeypatch, capfd, sptfy_mock,
         ]),
     }
 ])
-def test_add_youtube_url_to_songs(monkeypatch, ytm_mock, test_case):
+def test_modify_playlists_with_songs_youtube_url(monkeypatch, test_case):
     playlist_input = test_case["playlist"]
     youtube_url_validated = test_case["youtube_url_validated"]
     expected = test_case["expected"]
@@ -705,13 +988,86 @@ def test_add_youtube_url_to_songs(monkeypatch, ytm_mock, test_case):
                                                                song: YTMusicCache("https://music.youtube.com/watch?v=wxyz",
                                                                                   youtube_url_validated,
                                                                                   False))
-    monkeypatch.setattr(threading.Event, "is_set", lambda self: False)
-    event = threading.Event()
-    commands.playlist.download.add_youtube_url_to_songs(playlist_input, ytm_mock, event)
+    commands.playlist.download.modify_playlists_with_songs_youtube_url([playlist_input], False, None, False)
 
     assert playlist_input == expected
 
 
+def make_playlist_with_songs(playlist_id, spotify_urls):
+    return sptfy.PlaylistWithSongs(playlist=PlaylistNoSongs(
+        id=playlist_id,
+        name="A Playlist",
+        description="something something",
+        total=len(spotify_urls),
+        spotify_playlist_url="https://example.invalid",
+        owner_spotify_id="111111111111",
+        snapshot_id="snapshot1"
+    ), songs=[sptfy.Song(
+        name=f"Song {spotify_url}",
+        artists=["Artist"],
+        album=None,
+        track_number=1,
+        disc_number=1,
+        duration_ms=244000,
+        external_ids=None,
+        spotify_url=spotify_url
+    ) for spotify_url in spotify_urls])
+
+
+def test_group_songs_by_track():
+    playlists = [
+        make_playlist_with_songs("large", ["https://example.invalid/1", "https://example.invalid/2",
+                                           "https://example.invalid/1"]),
+        make_playlist_with_songs("small", ["https://example.invalid/2", "https://example.invalid/3"]),
+    ]
+
+    actual = commands.playlist.download.group_songs_by_track(playlists)
+
+    assert list(actual.keys()) == ["https://example.invalid/1", "https://example.invalid/2", "https://example.invalid/3"]
+    assert [len(songs) for songs in actual.values()] == [2, 2, 1]
+    assert actual["https://example.invalid/2"] == [playlists[0].songs[1], playlists[1].songs[0]]
+
+
+def test_group_tracks_by_isrc():
+    playlists = [make_playlist_with_songs("playlist", [f"https://example.invalid/{index}" for index in range(4)])]
+    isrcs = ["ISRC1", None, "ISRC1", "ISRC2"]
+    for song, isrc in zip(playlists[0].songs, isrcs):
+        song.external_ids = sptfy.ExternalIds(isrc, None, None) if isrc is not None else None
+
+    tracks = commands.playlist.download.group_songs_by_track(playlists)
+    actual = commands.playlist.download.group_tracks_by_isrc(tracks.values())
+
+    assert [[songs[0].spotify_url for songs in recording] for recording in actual] == [
+        ["https://example.invalid/0", "https://example.invalid/2"],
+        ["https://example.invalid/1"],
+        ["https://example.invalid/3"],
+    ]
+
+
+def test_modify_playlists_with_songs_youtube_url_searches_every_track_once(monkeypatch):
+    playlists = [
+        make_playlist_with_songs("large", [f"https://example.invalid/{index}" for index in range(50)]),
+        make_playlist_with_songs("small", ["https://example.invalid/0", "https://example.invalid/49"]),
+        make_playlist_with_songs("empty", []),
+    ]
+
+    searched = []
+    lock = threading.Lock()
+    def mocked_func(self, name, artists):
+        with lock:
+            searched.append(name)
+        return f"https://music.youtube.com/watch?v={name}"
+
+    monkeypatch.setattr(ytmusic.YTM, "search_youtube_music", mocked_func)
+    commands.playlist.download.modify_playlists_with_songs_youtube_url(playlists, False, None, False)
+
+    assert sorted(searched) == sorted(f"Song https://example.invalid/{index}" for index in range(50))
+    for playlist in playlists:
+        for song in playlist.songs:
+            assert song.youtube_url == f"https://music.youtube.com/watch?v=Song {song.spotify_url}"
+            assert song.youtube_url_validated is False
+
+
 def test_download_playlists_with_youtube_url(monkeypatch, sptfy_mock,
                             patch_get_all_playlists_no_songs, patch_get_playlist_with_songs,
                             patch_get_saved_tracks_as_playlist, patch_spotipy_me):
@@ -790,6 +1146,135 @@ def test_download_playlists_with_youtube_url_with_preloaded_cache(monkeypatch, s
     assert actual == expected
 
 
+def test_download_playlists_with_youtube_url_writes_ytcache(monkeypatch, sptfy_mock, ytm_mock,
+                            patch_get_all_playlists_no_songs, patch_get_playlist_with_songs,
+                            patch_get_saved_tracks_as_playlist, patch_spotipy_me):
+    runner = CliRunner()
+    tmpdir = tempfile.mkdtemp()
+    temp_file = os.path.join(tmpdir, "test.json")
+    args_list = ["--filename", temp_file, "--with-youtube-url"]
+
+    monkeypatch.setattr(ytmusic.YTM, "get_youtube_url", lambda self,
+                                                               song: YTMusicCache("https://music.youtube.com/watch?v=wxyz", True, False))
+
+    result = runner.invoke(commands.playlist.download.download, args_list)
+
+    assert result.exit_code == 0
+    assert os.path.exists(f"{temp_file}.ytcache")
+
+    commands.playlist.download.preload_youtube_url_cache(ytm_mock, tmpdir, False)
+
+    assert ytm_mock.cache == {
+        "https://example.invalid": YTMusicCache("https://music.youtube.com/watch?v=wxyz", True, False),
+    }
+
+
+def test_download_playlists_with_youtube_url_reports_youtube_url_cache(monkeypatch, sptfy_mock,
+                            patch_get_all_playlists_no_songs, patch_get_playlist_with_songs,
+                            patch_get_saved_tracks_as_playlist, patch_spotipy_me,
+                            patch_youtube_url_cache_file_path):
+    runner = CliRunner()
+    tmpdir = tempfile.mkdtemp()
+    temp_file = os.path.join(tmpdir, "test.json")
+    args_list = ["--filename", temp_file, "--with-youtube-url"]
+
+    with ytmusic.YoutubeUrlCache(patch_youtube_url_cache_file_path) as youtube_url_cache:
+        youtube_url_cache.put("https://example.invalid", YTMusicCache("https://music.youtube.com/watch?v=wxyz", True, False))
+    monkeypatch.setattr(ytmusic.YTM, "search_youtube_music", lambda self, name, artists: None)
+
+    result = runner.invoke(commands.playlist.download.download, args_list)
+
+    assert result.exit_code == 0
+    # Every song of the test files shares the same url, songs without one are never kept in the cache
+    assert "Youtube URL cache: 1 hits, 0 misses (0 expired)" in result.output
+
+
+def test_download_playlists_incremental_with_youtube_url_keeps_validated_urls(monkeypatch, sptfy_mock,
+                                                                             patch_spotipy_me):
+    tmpdir = tempfile.mkdtemp()
+    previous_file = os.path.join(tmpdir, "previous.json")
+    temp_file = os.path.join(tmpdir, "test.json")
+    unchanged = make_playlist_with_songs("unchanged", ["https://example.invalid/validated"])
+    unchanged.songs[0].youtube_url = "https://music.youtube.com/watch?v=validated"
+    unchanged.songs[0].youtube_url_validated = True
+    new = make_playlist_with_songs("new", ["https://example.invalid/new"])
+    export.write_playlists(previous_file, [unchanged])
+
+    searched = []
+
+    def mocked_func(self, name, artists):
+        searched.append(name)
+        return "https://music.youtube.com/watch?v=searched"
+
+    monkeypatch.setattr(sptfy.Sptfy, "get_all_playlists_no_songs", lambda self: [unchanged, new])
+    monkeypatch.setattr(commands.playlist.download, "get_playlist_with_songs",
+                        lambda playlist, sptfy_arg: make_playlist_with_songs(playlist.id,
+                                                                             ["https://example.invalid/new"]))
+    monkeypatch.setattr(sptfy.Sptfy, "get_saved_tracks_as_playlist",
+                        lambda self, previous_liked_songs: make_playlist_with_songs("liked_songs", []))
+    monkeypatch.setattr(ytmusic.YTM, "search_youtube_music", mocked_func)
+
+    result = CliRunner().invoke(commands.playlist.download.download,
+                                ["--filename", temp_file, "--incremental-from", previous_file, "--with-youtube-url"])
+
+    assert result.exit_code == 0
+    actual = {playlist.id: playlist.songs[0] for playlist in export.load_playlists(temp_file) if playlist.songs}
+    assert actual["unchanged"].youtube_url == "https://music.youtube.com/watch?v=validated"
+    assert actual["unchanged"].youtube_url_validated is True
+    assert actual["new"].youtube_url == "https://music.youtube.com/watch?v=searched"
+    assert actual["new"].youtube_url_validated is False
+    assert searched == ["Song https://example.invalid/new"]
+
+
+def test_download_playlists_incremental_liked_songs_with_youtube_url_keeps_validated_urls(monkeypatch, sptfy_mock,
+                                                                                         patch_spotipy_me):
+    with open("tests/files/sptfy_playlist_items_queries.json.test", "r") as file:
+        track = json.load(file)[0]["items"][0]["track"]
+
+    def saved_track(name, second):
+        return {"added_at": f"2024-01-01T00:00:{second:02}Z",
+                "track": dict(track, name=name, external_ids=None,
+                              external_urls={"spotify": f"https://example.invalid/{name}"})}
+
+    tmpdir = tempfile.mkdtemp()
+    previous_file = os.path.join(tmpdir, "previous.json")
+    temp_file = os.path.join(tmpdir, "test.json")
+    previous_song = sptfy.get_saved_track(saved_track("validated", 0))
+    previous_song.youtube_url = "https://music.youtube.com/watch?v=validated"
+    previous_song.youtube_url_validated = True
+    export.write_playlists(previous_file, [sptfy.PlaylistWithSongs(PlaylistNoSongs(
+        id=sptfy.LIKED_SONGS_PLAYLIST_ID,
+        name="Liked Songs",
+        description="Liked Songs",
+        total=1,
+        spotify_playlist_url="None",
+        owner_spotify_id="111111111111"
+    ), songs=[previous_song])])
+    library = [saved_track("new", 1), saved_track("validated", 0)]
+
+    searched = []
+
+    def mocked_func(self, name, artists):
+        searched.append(name)
+        return "https://music.youtube.com/watch?v=searched"
+
+    monkeypatch.setattr(sptfy.Sptfy, "get_all_playlists_no_songs", lambda self: [])
+    monkeypatch.setattr(spotipy.Spotify, "current_user_saved_tracks",
+                        lambda self, limit, offset: {"items": library, "next": None, "total": len(library)})
+    monkeypatch.setattr(ytmusic.YTM, "search_youtube_music", mocked_func)
+
+    result = CliRunner().invoke(commands.playlist.download.download,
+                                ["--filename", temp_file, "--incremental-from", previous_file, "--with-youtube-url"])
+
+    assert result.exit_code == 0
+    new_song, validated_song = export.load_playlists(temp_file)[0].songs
+    assert validated_song.youtube_url == "https://music.youtube.com/watch?v=validated"
+    assert validated_song.youtube_url_validated is True
+    assert new_song.youtube_url == "https://music.youtube.com/watch?v=searched"
+    assert new_song.youtube_url_validated is False
+    assert searched == ["new"]
+
+
 def test_preload_youtube_url_cache_file_not_found(ytm_mock):
     test_case = "doesn't exist"
     expected_exit_code = 1
@@ -821,6 +1306,33 @@ def test_preload_youtube_url_cache_with_unvalidated_urls(ytm_mock):
     assert ytm_mock.cache == expected
 
 
+@pytest.mark.parametrize("use_unvalidated_url, expected", [
+    (False, {
+        "https://example.invalid/preloaded": YTMusicCache("https://music.youtube.com/watch?v=preloaded", False, False),
+        "https://example.invalid/validated": YTMusicCache("https://music.youtube.com/watch?v=validated", True, False),
+    }),
+    (True, {
+        "https://example.invalid/preloaded": YTMusicCache("https://music.youtube.com/watch?v=preloaded", False, False),
+        "https://example.invalid/validated": YTMusicCache("https://music.youtube.com/watch?v=validated", True, False),
+        "https://example.invalid/unvalidated": YTMusicCache("https://music.youtube.com/watch?v=unvalidated", False,
+                                                            False),
+    }),
+])
+def test_seed_youtube_url_cache(ytm_mock, use_unvalidated_url, expected):
+    playlist = make_playlist_with_songs("reused", ["https://example.invalid/preloaded", "https://example.invalid/validated",
+                                                   "https://example.invalid/unvalidated", "https://example.invalid/none"])
+    for song, youtube_url_validated in zip(playlist.songs[:3], [False, True, False]):
+        song.youtube_url = f"https://music.youtube.com/watch?v={song.spotify_url.rsplit('/', 1)[1]}"
+        song.youtube_url_validated = youtube_url_validated
+    playlist.songs[0].youtube_url = "https://music.youtube.com/watch?v=reused"
+    ytm_mock.add_to_cache("https://example.invalid/preloaded", "https://music.youtube.com/watch?v=preloaded", False,
+                          False)
+
+    commands.playlist.download.seed_youtube_url_cache(ytm_mock, [playlist], use_unvalidated_url)
+
+    assert ytm_mock.cache == expected
+
+
 @pytest.mark.parametrize("test_case", [
     {
         "playlists": [
@@ -0,0 +1,99 @@
+import json
+import pytest
+import serializer
+import sptfy
+from helpers import EnvironmentVariables, write_json_array
+
+
+@pytest.fixture
+def song():
+    return sptfy.Song(
+        name="A Song",
+        artists=["Artist"],
+        album=sptfy.Album(
+            name="An Album",
+            artists=["Artist"],
+            release_date="2001-01-01",
+            images=[
+                sptfy.AlbumImage(
+                    url="https://example.invalid",
+                    height=640,
+                    width=640
+                )
+            ]
+        ),
+        track_number=1,
+        disc_number=1,
+        duration_ms=244000,
+        external_ids=sptfy.ExternalIds("something", None, None),
+        spotify_url="https://example.invalid",
+        youtube_url=None
+    )
+
+
+def test_to_dict(song):
+    assert serializer.to_dict(song) == {
+        "name": "A Song",
+        "artists": ["Artist"],
+        "album": song.album,
+        "track_number": 1,
+        "disc_number": 1,
+        "duration_ms": 244000,
+        "external_ids": song.external_ids,
+        "spotify_url": "https://example.invalid",
+        "youtube_url": None,
+        "youtube_url_validated": False,
+        "youtube_url_permanently_skip": False,
+        "added_at": None,
+    }
+    assert serializer.to_dict(sptfy.Artist(name="Artist")) == {"name": "Artist"}
+    assert serializer.to_dict(EnvironmentVariables("a", "b", "c")) == {
+        "spotify_client_id": "a",
+        "spotify_client_secret": "b",
+        "spotify_redirect_uri": "c"
+    }
+    assert sptfy.Song in serializer.converters
+
+
+def test_to_json(song):
+    actual = json.loads(song.to_json())
+
+    assert list(actual.keys()) == sorted(actual.keys())
+    assert actual["album"]["images"] == [{"height": 640, "url": "https://example.invalid", "width": 640}]
+
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_backends_same_content(song, compact):
+    pytest.importorskip("orjson")
+    playlist = sptfy.PlaylistWithSongs(sptfy.PlaylistNoSongs(
+        id="1234",
+        name="a playlist",
+        description="something something",
+        total=1,
+        spotify_playlist_url="https://example.invalid",
+        owner_spotify_id="111111111111"
+    ), songs=[song])
+
+    json_output = serializer.get_backend(serializer.JSON_BACKEND).dumps([playlist], compact)
+    orjson_output = serializer.get_backend(serializer.ORJSON_BACKEND).dumps([playlist], compact)
+
+    assert json.loads(json_output) == json.loads(orjson_output)
+    if compact:
+        assert json_output == orjson_output
+
+
+def test_get_backend_orjson_not_installed(monkeypatch):
+    monkeypatch.setattr(serializer.serializer, "orjson", None)
+
+    assert serializer.get_backend(serializer.ORJSON_BACKEND).name == serializer.JSON_BACKEND
+
+
+def test_write_json_array_orjson(tmp_path, song):
+    orjson = pytest.importorskip("orjson")
+    filename = str(tmp_path / "test.json")
+    items = [song, {"a": None}, song]
+
+    write_json_array(filename, iter(items), serializer_backend=serializer.ORJSON_BACKEND)
+
+    with open(filename, "rb") as file:
+        assert file.read() == orjson.dumps(items, default=serializer.to_dict, option=orjson.OPT_INDENT_2)
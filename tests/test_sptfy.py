@@ -68,6 +68,22 @@ def test_get_all_playlists_no_songs(monkeypatch, sptfy_mock):
     assert len(playlists) == 118
 
 
+def test_iter_all_playlists_no_songs(monkeypatch, sptfy_mock):
+    with open("tests/files/sptfy_current_user_playlists_queries.json.test", "r") as file:
+        data = json.load(file)
+    pages = {}
+    for query in data:
+        items = [dict(item, id=f"playlist{query['offset'] + index}") for index, item in enumerate(query["items"])]
+        pages[query["offset"]] = dict(query, items=items)
+
+    monkeypatch.setattr(spotipy.Spotify, "current_user_playlists", lambda self, limit, offset: pages[offset])
+    playlists = sptfy_mock.iter_all_playlists_no_songs()
+
+    expected_ids = [f"playlist{index}" for index in range(118)]
+    assert next(playlists).id == expected_ids[0]
+    assert [playlist.id for playlist in playlists] == expected_ids[1:]
+
+
 def test_get_playlist_content(monkeypatch, sptfy_mock):
     with open("tests/files/sptfy_playlist_items_queries.json.test", "r") as file:
         data = json.load(file)
@@ -75,7 +91,7 @@ def test_get_playlist_content(monkeypatch, sptfy_mock):
 
     monkeypatch.setattr(
         spotipy.Spotify, "playlist_items",
-        lambda self, playlist_id, limit, offset: next(data_iter)
+        lambda self, playlist_id, limit, offset, fields: next(data_iter)
     )
     playlist_items = sptfy_mock.get_playlist_content("something")
 
@@ -84,6 +100,80 @@ def test_get_playlist_content(monkeypatch, sptfy_mock):
     assert len(playlist_items) == 150
 
 
+@pytest.mark.parametrize("method, args, spotipy_method", [
+    ("iter_playlist_content", ["something"], "playlist_items"),
+    ("iter_saved_tracks", [], "current_user_saved_tracks"),
+])
+def test_iter_songs_page_by_page(monkeypatch, sptfy_mock, method, args, spotipy_method):
+    with open("tests/files/sptfy_playlist_items_queries.json.test", "r") as file:
+        data = json.load(file)
+    data_iter = iter(data)
+    calls = 0
+
+    def mocked_func(self, **kwargs):
+        nonlocal calls
+        calls += 1
+        return next(data_iter)
+
+    monkeypatch.setattr(spotipy.Spotify, spotipy_method, mocked_func)
+    songs = getattr(sptfy_mock, method)(*args)
+
+    assert calls == 0
+    assert type(next(songs)) is sptfy.Song
+    assert calls == 1
+    assert len(list(songs)) == 149
+    assert calls == 2
+
+
+def test_get_playlist_content_parallel_pages(monkeypatch, sptfy_mock):
+    with open("tests/files/sptfy_playlist_items_queries.json.test", "r") as file:
+        data = json.load(file)
+    item = data[0]["items"][0]
+    limit = 100
+    total = 950
+
+    def playlist_items(self, playlist_id, limit, offset, fields):
+        items = []
+        for index in range(offset, min(offset + limit, total)):
+            track = dict(item["track"], name=f"Track {index}")
+            items.append({"track": track})
+        next_page = "https://example.invalid" if offset + limit < total else None
+        return {"items": items, "next": next_page, "total": total, "offset": offset, "limit": limit}
+
+    monkeypatch.setattr(spotipy.Spotify, "playlist_items", playlist_items)
+    playlist_items = sptfy_mock.get_playlist_content("something", limit=limit)
+
+    assert [song.name for song in playlist_items] == [f"Track {index}" for index in range(total)]
+
+
+def test_get_playlist_content_minimal_fields_profile(monkeypatch, sptfy_mock):
+    requested_fields = []
+
+    def playlist_items(self, playlist_id, limit, offset, fields):
+        requested_fields.append(fields)
+        return {
+            "items": [{"track": {"name": "A Track", "artists": [{"name": "artist"}],
+                                 "external_urls": {"spotify": "https://example.invalid"}}}],
+            "next": None,
+            "total": 1
+        }
+
+    monkeypatch.setattr(spotipy.Spotify, "playlist_items", playlist_items)
+    playlist_items = sptfy_mock.get_playlist_content("something", fields_profile=sptfy.FIELDS_PROFILE_MINIMAL)
+
+    assert requested_fields == [sptfy.PLAYLIST_ITEMS_FIELDS[sptfy.FIELDS_PROFILE_MINIMAL]]
+    assert playlist_items == [sptfy.Song(
+        name="A Track",
+        artists=["artist"],
+        album=None,
+        track_number=None,
+        disc_number=None,
+        duration_ms=None,
+        external_ids=None,
+        spotify_url="https://example.invalid"
+    )]
+
+
 def test_get_saved_tracks_as_playlist(monkeypatch, sptfy_mock, patch_spotipy_me):
     with open("tests/files/sptfy_playlist_items_queries.json.test", "r") as file:
         data = json.load(file)
@@ -98,6 +188,106 @@ def test_get_saved_tracks_as_playlist(monkeypatch, sptfy_mock, patch_spotipy_me)
     assert liked_song_playlist.total == 150
 
 
+@pytest.mark.parametrize("removed_songs, expected_calls", [
+    (0, 2),
+    (1, 12),
+])
+def test_get_saved_tracks_as_playlist_incremental(monkeypatch, sptfy_mock, patch_spotipy_me,
+                                                  removed_songs, expected_calls):
+    with open("tests/files/sptfy_playlist_items_queries.json.test", "r") as file:
+        data = json.load(file)
+    item = data[0]["items"][0]
+
+    def saved_track(index):
+        track = dict(item["track"], name=f"Track {index}", external_urls={"spotify": f"https://example.invalid/{index}"})
+        return {"added_at": f"2024-01-01T00:00:{index:02}Z", "track": track}
+
+    previous_library = [saved_track(index) for index in reversed(range(45))]
+    previous_liked_songs = sptfy.PlaylistWithSongs(
+        sptfy.PlaylistNoSongs(
+            id=sptfy.LIKED_SONGS_PLAYLIST_ID,
+            name="Liked Songs",
+            description="Liked Songs",
+            total=len(previous_library),
+            spotify_playlist_url="None",
+            owner_spotify_id="111111111111"
+        ),
+        songs=[sptfy.get_saved_track(saved) for saved in previous_library]
+    )
+    library = [saved_track(index) for index in reversed(range(45, 50))] + previous_library[removed_songs:]
+
+    calls = 0
+
+    def current_user_saved_tracks(self, limit, offset):
+        nonlocal calls
+        calls += 1
+        next_page = "https://example.invalid" if offset + limit < len(library) else None
+        return {"items": library[offset:offset + limit], "next": next_page, "total": len(library)}
+
+    monkeypatch.setattr(spotipy.Spotify, "current_user_saved_tracks", current_user_saved_tracks)
+    liked_songs = sptfy_mock.get_saved_tracks_as_playlist(limit=5, previous_liked_songs=previous_liked_songs)
+
+    assert [song.name for song in liked_songs.songs] == [saved["track"]["name"] for saved in library]
+    assert liked_songs.total == len(library)
+    assert calls == expected_calls
+
+
+def test_track_registry(monkeypatch, sptfy_mock):
+    with open("tests/files/sptfy_playlist_items_queries.json.test", "r") as file:
+        data = json.load(file)
+    track = data[0]["items"][0]["track"]
+    album = dict(track["album"], id="album1")
+    items = [
+        {"track": dict(track, id="track1", album=album)},
+        {"track": dict(track, id="track2", album=album)},
+        {"track": dict(track, id="track1", album=album)},
+        {"track": dict(track, id=None, album=album)},
+    ]
+
+    monkeypatch.setattr(
+        spotipy.Spotify, "playlist_items",
+        lambda self, playlist_id, limit, offset, fields: {"items": items, "next": None, "total": len(items)}
+    )
+    first_playlist = sptfy_mock.get_playlist_content("something")
+    second_playlist = sptfy_mock.get_playlist_content("something else")
+
+    assert first_playlist[0] is first_playlist[2]
+    assert first_playlist[0] is second_playlist[0]
+    assert first_playlist[0] is not first_playlist[1]
+    assert first_playlist[0].album is first_playlist[1].album
+    assert first_playlist[3] is not second_playlist[3]
+    assert len(sptfy_mock.track_registry.songs) == 2
+    assert sptfy_mock.track_registry.songs_seen == 6
+    assert len(sptfy_mock.track_registry.albums) == 1
+
+
+def test_track_registry_liked_songs_and_playlist(monkeypatch, sptfy_mock):
+    with open("tests/files/sptfy_playlist_items_queries.json.test", "r") as file:
+        data = json.load(file)
+    track = dict(data[0]["items"][0]["track"], id="track1", album=dict(data[0]["items"][0]["track"]["album"], id="album1"))
+    saved_items = [{"added_at": "2024-01-01T00:00:00Z", "track": track}]
+
+    monkeypatch.setattr(
+        spotipy.Spotify, "current_user_saved_tracks",
+        lambda self, limit, offset: {"items": saved_items, "next": None, "total": len(saved_items)}
+    )
+    monkeypatch.setattr(
+        spotipy.Spotify, "playlist_items",
+        lambda self, playlist_id, limit, offset, fields: {"items": [{"track": track}], "next": None, "total": 1}
+    )
+    liked_song = sptfy_mock.get_saved_tracks()[0]
+    playlist_song = sptfy_mock.get_playlist_content("something")[0]
+
+    assert liked_song.added_at == "2024-01-01T00:00:00Z"
+    assert playlist_song.added_at is None
+    assert playlist_song is sptfy_mock.track_registry.songs["track1"]
+    assert liked_song.album is playlist_song.album
+    assert liked_song.artists is playlist_song.artists
+    assert liked_song.external_ids is playlist_song.external_ids
+    assert len(sptfy_mock.track_registry.songs) == 1
+    assert sptfy_mock.track_registry.songs_seen == 2
+
+
 def test_get_user_id(monkeypatch, sptfy_mock):
     expected_query_return = {
         "display_name": "First Last",
@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import pytest
+import export
+from click.testing import CliRunner
+from dataclasses import replace
+from commands.export import export as export_command
+from commands.validate.youtube_urls import get_songs_to_validate, update_validated_song, update_permanently_skipped_song
+from sptfy import PlaylistWithSongs
+
+
+@pytest.fixture
+def playlists():
+    return export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return f"sqlite:///{tmp_path / 'library.db'}"
+
+
+def test_get_store_path():
+    assert export.get_store_path("sqlite:///library.db") == "library.db"
+    assert export.get_store_path("sqlite:////home/user/library.db") == "/home/user/library.db"
+    with pytest.raises(ValueError):
+        export.get_store_path("library.db")
+    with pytest.raises(ValueError):
+        export.get_store_path("sqlite:///")
+
+
+def test_write_playlists_to_store_round_trips(playlists, store):
+    count = export.write_playlists_to_store(store, playlists)
+
+    assert count == 119
+    assert export.load_playlists_from_store(store) == playlists
+
+
+def test_write_playlists_to_store_shares_albums_and_tracks(playlists, store):
+    export.write_playlists_to_store(store, playlists)
+
+    connection = sqlite3.connect(export.get_store_path(store))
+    num_songs = sum(len(playlist.songs) for playlist in playlists)
+    num_entries = connection.execute("SELECT count(*) FROM playlist_tracks").fetchone()[0]
+    num_tracks = connection.execute("SELECT count(*) FROM tracks").fetchone()[0]
+    num_albums = connection.execute("SELECT count(*) FROM albums").fetchone()[0]
+    connection.close()
+    assert num_entries == num_songs
+    assert num_tracks < num_songs
+    assert num_albums == 1
+
+
+def test_write_playlists_to_store_keeps_written_playlists_when_interrupted(playlists, store):
+    def iter_playlists():
+        yield playlists[0]
+        yield playlists[1]
+        raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        export.write_playlists_to_store(store, iter_playlists())
+
+    assert export.load_playlists_from_store(store) == playlists[:2]
+
+
+def test_write_playlists_to_store_removes_playlists_no_longer_downloaded(playlists, store):
+    export.write_playlists_to_store(store, playlists)
+
+    export.write_playlists_to_store(store, playlists[:3])
+
+    assert export.load_playlists_from_store(store) == playlists[:3]
+    connection = sqlite3.connect(export.get_store_path(store))
+    track_ids = {row[0] for row in connection.execute("SELECT id FROM tracks")}
+    used_track_ids = {row[0] for row in connection.execute("SELECT track_id FROM playlist_tracks")}
+    connection.close()
+    assert track_ids == used_track_ids
+
+
+def test_get_songs_by_spotify_url_and_isrc(playlists, store):
+    export.write_playlists_to_store(store, playlists)
+
+    with export.LibraryStore(export.get_store_path(store)) as library_store:
+        songs = library_store.get_songs_by_spotify_url("https://example01.invalid")
+        assert len(songs) > 0
+        assert all(song.spotify_url == "https://example01.invalid" for song in songs)
+        assert len(library_store.get_songs_by_isrc("something")) > 0
+        assert library_store.get_songs_by_isrc("missing") == []
+
+
+def test_update_validated_song_with_store(playlists, store, tmp_path):
+    export.write_playlists_to_store(store, playlists)
+    spotify_url = "https://example01.invalid"
+    youtube_url = "https://music.youtube.com/watch?v=1"
+
+    with export.LibraryStore(export.get_store_path(store)) as library_store:
+        original_playlists = library_store.load_playlists()
+        update_validated_song(original_playlists, spotify_url, youtube_url, None, store=library_store)
+        update_permanently_skipped_song(original_playlists, spotify_url, None, store=library_store)
+
+    assert os.listdir(tmp_path) == ["library.db"]
+    actual = [song for playlist in export.load_playlists_from_store(store) for song in playlist.songs
+              if song.spotify_url == spotify_url]
+    assert len(actual) > 0
+    assert all(song.youtube_url == youtube_url for song in actual)
+    assert all(song.youtube_url_validated for song in actual)
+    assert all(song.youtube_url_permanently_skip for song in actual)
+
+
+@pytest.mark.parametrize("youtube_url", [None, "https://music.youtube.com/watch?v=unvalidated"])
+def test_download_again_keeps_validated_songs(store, youtube_url):
+    spotify_url = "https://example01.invalid"
+    validated_youtube_url = "https://music.youtube.com/watch?v=V"
+    export.write_playlists_to_store(store, export.load_playlists("tests/files/validate_youtube_urls_input.json.test"))
+    with export.LibraryStore(export.get_store_path(store)) as library_store:
+        update_validated_song([], spotify_url, validated_youtube_url, None, store=library_store)
+        update_permanently_skipped_song([], spotify_url, None, store=library_store)
+
+    playlists = export.load_playlists("tests/files/validate_youtube_urls_input.json.test")
+    for playlist in playlists:
+        for song in playlist.songs:
+            song.youtube_url = youtube_url
+            song.youtube_url_validated = False
+            song.youtube_url_permanently_skip = False
+    export.write_playlists_to_store(store, playlists)
+
+    songs = [song for playlist in export.load_playlists_from_store(store) for song in playlist.songs]
+    validated = [song for song in songs if song.spotify_url == spotify_url]
+    assert len(validated) > 0
+    assert all((song.youtube_url, song.youtube_url_validated, song.youtube_url_permanently_skip) ==
+               (validated_youtube_url, True, True) for song in validated)
+    others = [song for song in songs if song.spotify_url != spotify_url and song.youtube_url_validated is False]
+    assert len(others) > 0
+    if youtube_url is not None:
+        assert all(song.youtube_url == youtube_url for song in others)
+
+
+def test_download_again_keeps_variants_of_a_track_apart(playlists, store):
+    # Both versions share a track id, the second download meets the new version first
+    song = playlists[0].songs[0]
+    version_a = replace(song, name="Version A", youtube_url="https://music.youtube.com/watch?v=A",
+                        youtube_url_validated=True, youtube_url_permanently_skip=False)
+    version_b = replace(song, name="Version B", youtube_url=None, youtube_url_validated=False,
+                        youtube_url_permanently_skip=False)
+    export.write_playlists_to_store(store, [PlaylistWithSongs(playlists[0], [version_a])])
+
+    export.write_playlists_to_store(store, [
+        PlaylistWithSongs(playlists[1], [version_b]),
+        PlaylistWithSongs(playlists[0], [replace(version_a, youtube_url=None, youtube_url_validated=False)]),
+    ])
+
+    assert export.load_playlists_from_store(store) == [PlaylistWithSongs(playlists[1], [version_b]),
+                                                       PlaylistWithSongs(playlists[0], [version_a])]
+
+
+def test_export_command(playlists, store, tmp_path):
+    export.write_playlists_to_store(store, playlists)
+    filename = str(tmp_path / "playlists.json")
+
+    result = CliRunner().invoke(export_command, ["--store", store, "--filename", filename])
+
+    assert result.exit_code == 0
+    assert export.load_export(filename) == (playlists, export.EXPORT_VERSION_1)
+
+
+def test_export_command_store_does_not_exist(tmp_path):
+    result = CliRunner().invoke(export_command, ["--store", f"sqlite:///{tmp_path / 'missing.db'}",
+                                                 "--filename", str(tmp_path / "playlists.json")])
+
+    assert result.exit_code == 1
+    assert not os.path.exists(tmp_path / "missing.db")
+
+
+@pytest.mark.parametrize("include_permanently_skipped", [False, True])
+def test_get_songs_to_validate_from_store(playlists, store, include_permanently_skipped):
+    export.write_playlists_to_store(store, playlists)
+    with export.LibraryStore(export.get_store_path(store)) as library_store:
+        update_validated_song([], "https://example01.invalid", "https://music.youtube.com/watch?v=1", None,
+                              store=library_store)
+        update_permanently_skipped_song([], "https://example02.invalid", None, store=library_store)
+        actual = library_store.get_songs_to_validate(include_permanently_skipped)
+
+    expected = get_songs_to_validate(export.load_playlists_from_store(store), include_permanently_skipped)
+    assert sorted(actual.keys()) == sorted(expected.keys())
+    assert "https://example01.invalid" not in actual
+    assert ("https://example02.invalid" in actual) == include_permanently_skipped
+
+
+@pytest.mark.parametrize("where, index", [
+    ("WHERE tracks.spotify_url = 'x'", "tracks_spotify_url"),
+    ("WHERE tracks.isrc = 'x'", "tracks_isrc"),
+    ("WHERE tracks.youtube_url_validated = 0 AND tracks.spotify_url IS NOT NULL", "tracks_unvalidated"),
+])
+def test_store_song_lookups_use_an_index(store, where, index):
+    with export.LibraryStore(export.get_store_path(store)) as library_store:
+        plan = library_store.connection.execute(
+            f"EXPLAIN QUERY PLAN SELECT {export.store.TRACK_SELECT_COLUMNS} FROM tracks "
+            f"LEFT JOIN albums ON albums.id = tracks.album_id {where}").fetchall()
+
+    assert any(f"USING INDEX {index}" in row[-1] for row in plan)
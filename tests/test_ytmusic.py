@@ -1,3 +1,7 @@
+import concurrent.futures
+import threading
+import time
+import requests
 import ytmusic
 import pytest
 import ytmusicapi
@@ -220,3 +224,230 @@ def test_add_to_cache(ytm_mock, test_case):
     ytm_mock.add_to_cache(input_spotify_url, input_youtube_url, input_youtube_url_validated, input_youtube_url_permanently_skip)
 
     assert ytm_mock.cache == expected
+
+
+def make_song(spotify_url, isrc=None):
+    return sptfy.Song(
+        name="A Song",
+        artists=["Artist"],
+        album=sptfy.Album(name="An Album", artists=["Artist"], release_date="2001-01-01", images=[]),
+        track_number=1,
+        disc_number=1,
+        duration_ms=244000,
+        external_ids=sptfy.ExternalIds(isrc, None, None) if isrc is not None else None,
+        spotify_url=spotify_url,
+        youtube_url=None
+    )
+
+
+def test_get_youtube_url_with_youtube_url_cache(monkeypatch, tmp_path):
+    calls = 0
+    def mocked_func(self, query, filter, limit):
+        nonlocal calls
+        calls += 1
+        return [{"title": "a song", "videoId": "1234"}]
+
+    monkeypatch.setattr(ytmusicapi.YTMusic, "search", mocked_func)
+    path = str(tmp_path / "youtube_url_cache.db")
+    with ytmusic.YoutubeUrlCache(path) as youtube_url_cache:
+        ytmusic.YTM(youtube_url_cache).get_youtube_url(make_song("https://example.invalid/1"))
+    assert (youtube_url_cache.hits, youtube_url_cache.misses) == (0, 1)
+
+    with ytmusic.YoutubeUrlCache(path) as youtube_url_cache:
+        actual = ytmusic.YTM(youtube_url_cache).get_youtube_url(make_song("https://example.invalid/1"))
+
+    assert actual == YTMusicCache("https://music.youtube.com/watch?v=1234", False, False)
+    assert calls == 1
+    assert (youtube_url_cache.hits, youtube_url_cache.misses) == (1, 0)
+
+
+@pytest.mark.parametrize("value, age, expected", [
+    (YTMusicCache("https://music.youtube.com/watch?v=1234", False, False), 10, True),
+    (YTMusicCache("https://music.youtube.com/watch?v=1234", False, False), 1, False),
+    (YTMusicCache(None, False, False), 10, True),
+    (YTMusicCache("https://music.youtube.com/watch?v=1234", True, False), 10, False),
+    (YTMusicCache("https://music.youtube.com/watch?v=1234", False, True), 10, False),
+])
+def test_youtube_url_cache_ttl(monkeypatch, tmp_path, value, age, expected):
+    path = str(tmp_path / "youtube_url_cache.db")
+    now = 1_000_000.0
+    monkeypatch.setattr(ytmusic.cache.time, "time", lambda: now)
+    with ytmusic.YoutubeUrlCache(path, ttl_seconds=5) as youtube_url_cache:
+        youtube_url_cache.put("https://example.invalid/1", value)
+
+    now += age
+    with ytmusic.YoutubeUrlCache(path, ttl_seconds=5) as youtube_url_cache:
+        actual = youtube_url_cache.get("https://example.invalid/1")
+
+    assert actual == (None if expected else value)
+    assert youtube_url_cache.expired == (1 if expected else 0)
+
+
+def test_youtube_url_cache_evicts_least_recently_used(monkeypatch, tmp_path):
+    path = str(tmp_path / "youtube_url_cache.db")
+    now = 1_000_000.0
+    monkeypatch.setattr(ytmusic.cache.time, "time", lambda: now)
+    with ytmusic.YoutubeUrlCache(path, max_entries=2) as youtube_url_cache:
+        for index in range(3):
+            now += 1
+            youtube_url_cache.put(f"https://example.invalid/{index}",
+                                  YTMusicCache(f"https://music.youtube.com/watch?v={index}", True, False))
+        youtube_url_cache.flush()
+        now += 1
+        youtube_url_cache.get("https://example.invalid/0")
+
+    with ytmusic.YoutubeUrlCache(path, max_entries=2) as youtube_url_cache:
+        assert len(youtube_url_cache) == 2
+        assert youtube_url_cache.get("https://example.invalid/0") is not None
+        assert youtube_url_cache.get("https://example.invalid/1") is None
+        assert youtube_url_cache.get("https://example.invalid/2") is not None
+
+
+def test_get_youtube_url_waits_on_lookup_in_flight(monkeypatch, ytm_mock):
+    started = threading.Event()
+    release = threading.Event()
+    calls = 0
+    def mocked_func(self, name, artists):
+        nonlocal calls
+        calls += 1
+        started.set()
+        release.wait(5)
+        return "https://music.youtube.com/watch?v=1234"
+
+    monkeypatch.setattr(ytmusic.YTM, "search_youtube_music", mocked_func)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(ytm_mock.get_youtube_url, make_song("https://example.invalid/1"))
+        started.wait(5)
+        second = executor.submit(ytm_mock.get_youtube_url, make_song("https://example.invalid/1"))
+        while ytm_mock.suppressed_lookups == 0 and not second.done():
+            time.sleep(0.001)
+        release.set()
+
+    expected = YTMusicCache("https://music.youtube.com/watch?v=1234", False, False)
+    assert first.result() == expected
+    assert second.result() == expected
+    assert calls == 1
+    assert ytm_mock.suppressed_lookups == 1
+    assert ytm_mock.in_flight == {}
+
+
+def test_get_youtube_url_lookup_in_flight_fails(monkeypatch, ytm_mock):
+    def mocked_func(self, name, artists):
+        raise ConnectionError("no connection")
+
+    monkeypatch.setattr(ytmusic.YTM, "search_youtube_music", mocked_func)
+
+    with pytest.raises(ConnectionError):
+        ytm_mock.get_youtube_url(make_song("https://example.invalid/1"))
+    assert ytm_mock.in_flight == {}
+    assert ytm_mock.cache == {}
+
+
+def test_ytmusic_client_pool_is_created_lazily(monkeypatch):
+    ytm = ytmusic.YTM(num_clients=3)
+    assert ytm.client_pool.get_stats() == []
+
+    monkeypatch.setattr(ytmusicapi.YTMusic, "search", lambda self, query, filter, limit: [])
+    ytm.search_youtube_music("A Song", ["Artist"])
+    ytm.search_youtube_music("Another Song", ["Artist"])
+
+    stats = ytm.client_pool.get_stats()
+    assert [(stats.client, stats.searches) for stats in stats] == [(0, 2)]
+
+
+def test_ytmusic_client_pool_never_shares_a_client(monkeypatch):
+    lock = threading.Lock()
+    clients_in_use = set()
+    clients_used = set()
+    max_in_use = 0
+    def mocked_func(self, query, filter, limit):
+        nonlocal max_in_use
+        with lock:
+            assert id(self) not in clients_in_use
+            clients_in_use.add(id(self))
+            clients_used.add(id(self))
+            max_in_use = max(max_in_use, len(clients_in_use))
+        time.sleep(0.002)
+        with lock:
+            clients_in_use.remove(id(self))
+        return [{"videoId": "1234"}]
+
+    monkeypatch.setattr(ytmusicapi.YTMusic, "search", mocked_func)
+    ytm = ytmusic.YTM(num_clients=2)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda index: ytm.search_youtube_music(f"Song {index}", ["Artist"]), range(20)))
+
+    assert results == ["https://music.youtube.com/watch?v=1234"] * 20
+    assert len(clients_used) <= 2
+    assert max_in_use <= 2
+    assert sum(stats.searches for stats in ytm.client_pool.get_stats()) == 20
+    assert all(stats.slowest_seconds >= 0.002 for stats in ytm.client_pool.get_stats())
+
+
+def test_ytmusic_client_pool_size():
+    with pytest.raises(ValueError):
+        ytmusic.YTMusicClientPool(0)
+
+
+@pytest.mark.parametrize("search_result, expected_calls, expected_isrc_hits", [
+    ([{"title": "a song", "videoId": "1234"}], 1, 1),
+    # A song that couldn't be found is searched again under its other spotify url
+    ([], 2, 0),
+])
+def test_get_youtube_url_by_isrc(monkeypatch, ytm_mock, search_result, expected_calls, expected_isrc_hits):
+    calls = 0
+    def mocked_func(self, query, filter, limit):
+        nonlocal calls
+        calls += 1
+        return search_result
+
+    monkeypatch.setattr(ytmusicapi.YTMusic, "search", mocked_func)
+    single = ytm_mock.get_youtube_url(make_song("https://example.invalid/single", "ISRC1"))
+    album = ytm_mock.get_youtube_url(make_song("https://example.invalid/album", "ISRC1"))
+
+    assert album == single
+    assert calls == expected_calls
+    assert ytm_mock.isrc_hits == expected_isrc_hits
+    assert set(ytm_mock.cache.keys()) == {"https://example.invalid/single", "https://example.invalid/album"}
+
+
+def test_get_youtube_url_propagates_validated_match_by_isrc(monkeypatch, ytm_mock):
+    monkeypatch.setattr(ytmusicapi.YTMusic, "search", lambda self, query, filter, limit: [{"videoId": "search"}])
+    ytm_mock.add_to_cache("https://example.invalid/album", "https://music.youtube.com/watch?v=unvalidated", False, False)
+    ytm_mock.add_to_cache("https://example.invalid/skipped", "https://music.youtube.com/watch?v=skipped", False, True)
+    ytm_mock.add_to_cache("https://example.invalid/single", "https://music.youtube.com/watch?v=1234", True, False, "ISRC1")
+
+    expected = YTMusicCache("https://music.youtube.com/watch?v=1234", True, False)
+    assert ytm_mock.get_youtube_url(make_song("https://example.invalid/album", "ISRC1")) == expected
+    assert ytm_mock.get_youtube_url(make_song("https://example.invalid/compilation", "ISRC1")) == expected
+    assert ytm_mock.get_youtube_url(make_song("https://example.invalid/skipped", "ISRC1")) == \
+        YTMusicCache("https://music.youtube.com/watch?v=skipped", False, True)
+    assert ytm_mock.get_youtube_url(make_song("https://example.invalid/other", "ISRC2")) == \
+        YTMusicCache("https://music.youtube.com/watch?v=search", False, False)
+    assert ytm_mock.isrc_hits == 2
+
+
+def test_get_youtube_url_validated_match_replaces_unvalidated_isrc_match(ytm_mock):
+    ytm_mock.add_to_cache("https://example.invalid/album", "https://music.youtube.com/watch?v=unvalidated", False, False, "ISRC1")
+    ytm_mock.add_to_cache("https://example.invalid/single", "https://music.youtube.com/watch?v=1234", True, False, "ISRC1")
+    ytm_mock.add_to_cache("https://example.invalid/other", "https://music.youtube.com/watch?v=other", False, False, "ISRC1")
+
+    assert ytm_mock.isrc_cache == {"ISRC1": YTMusicCache("https://music.youtube.com/watch?v=1234", True, False)}
+
+
+def test_ytmusic_client_pool_sets_a_timeout(monkeypatch):
+    timeouts = []
+    def mocked_request(self, method, url, **kwargs):
+        timeouts.append(kwargs.get("timeout"))
+        raise requests.ConnectionError("no connection")
+
+    monkeypatch.setattr(requests.Session, "request", mocked_request)
+    pool = ytmusic.YTMusicClientPool(1)
+    with pool.client() as client:
+        with pytest.raises(requests.ConnectionError):
+            client._session.get("https://music.youtube.com")
+        with pytest.raises(requests.ConnectionError):
+            client._session.post("https://music.youtube.com")
+
+    assert timeouts == [ytmusic.YTMUSIC_TIMEOUT_SECONDS] * 2
+    assert pool.get_stats()[0].searches == 1
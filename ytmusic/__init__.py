@@ -1 +1,3 @@
 from .ytmusic import *
+from .cache import *
+from .pool import *
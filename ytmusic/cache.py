@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from log import logger
+from ytmusic.ytmusic import YTMusicCache
+
+# Validated and permanently skipped entries are kept until they are evicted, any other entry is searched again once
+# it is older than this
+YOUTUBE_URL_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+YOUTUBE_URL_CACHE_MAX_ENTRIES = 500_000
+# Number of new entries kept in memory before they are written in a single transaction
+YOUTUBE_URL_CACHE_FLUSH_SIZE = 1000
+
+YOUTUBE_URL_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS youtube_urls (
+    spotify_url TEXT PRIMARY KEY,
+    youtube_url TEXT,
+    youtube_url_validated INTEGER NOT NULL DEFAULT 0,
+    youtube_url_permanently_skip INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS youtube_urls_accessed_at ON youtube_urls (accessed_at);
+"""
+
+
+class YoutubeUrlCache:
+    # Youtube Music searches kept between runs, keyed by the spotify url of the song like the in-memory cache of YTM.
+    # One connection is shared by the threads adding Youtube URLs, every access goes through the lock
+    def __init__(self, path: str, ttl_seconds: float = YOUTUBE_URL_CACHE_TTL_SECONDS,
+                 max_entries: int = YOUTUBE_URL_CACHE_MAX_ENTRIES):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.lock = threading.Lock()
+        self.pending: Dict[str, Tuple] = {}
+        self.accessed: Dict[str, float] = {}
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(YOUTUBE_URL_CACHE_SCHEMA)
+
+    def __enter__(self) -> "YoutubeUrlCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def is_expired(self, created_at: float, youtube_url: Optional[str], youtube_url_validated: bool,
+                   youtube_url_permanently_skip: bool, now: float) -> bool:
+        if youtube_url is not None and (youtube_url_validated or youtube_url_permanently_skip):
+            return False
+        return now - created_at > self.ttl_seconds
+
+    def get(self, spotify_url: str) -> Optional[YTMusicCache]:
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT youtube_url, youtube_url_validated, youtube_url_permanently_skip, created_at FROM youtube_urls "
+                "WHERE spotify_url = ?", (spotify_url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            youtube_url, youtube_url_validated, youtube_url_permanently_skip, created_at = row
+            if self.is_expired(created_at, youtube_url, bool(youtube_url_validated),
+                               bool(youtube_url_permanently_skip), now):
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Access times only matter for eviction, they are written with the next flush
+            self.accessed[spotify_url] = now
+            return YTMusicCache(youtube_url, bool(youtube_url_validated), bool(youtube_url_permanently_skip))
+
+    def put(self, spotify_url: str, value: YTMusicCache) -> None:
+        now = time.time()
+        with self.lock:
+            self.pending[spotify_url] = (spotify_url, value.youtube_url, int(value.youtube_url_validated),
+                                         int(value.youtube_url_permanently_skip), now, now)
+            if len(self.pending) >= YOUTUBE_URL_CACHE_FLUSH_SIZE:
+                self.write_pending()
+
+    def write_pending(self) -> None:
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO youtube_urls (spotify_url, youtube_url, youtube_url_validated, "
+                "youtube_url_permanently_skip, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                self.pending.values()
+            )
+            self.connection.executemany(
+                "UPDATE youtube_urls SET accessed_at = ? WHERE spotify_url = ?",
+                [(accessed_at, spotify_url) for spotify_url, accessed_at in self.accessed.items()]
+            )
+        self.pending = {}
+        self.accessed = {}
+
+    def evict(self) -> int:
+        # Least recently used entries go first once there are more than the maximum
+        with self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM youtube_urls WHERE spotify_url IN (SELECT spotify_url FROM youtube_urls "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+            )
+        return cursor.rowcount
+
+    def flush(self) -> None:
+        with self.lock:
+            self.write_pending()
+
+    def close(self) -> None:
+        with self.lock:
+            self.write_pending()
+            evicted = self.evict()
+            if evicted > 0:
+                logger.info(f"Evicted {evicted} least recently used entries from the youtube url cache '{self.path}'")
+            self.connection.close()
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM youtube_urls").fetchone()[0]
@@ -0,0 +1,92 @@
+import functools
+import queue
+import threading
+import time
+import requests
+from contextlib import contextmanager
+from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from typing import Iterator, List, Tuple
+from ytmusicapi import YTMusic
+
+YTMUSIC_CLIENTS = 6
+# The same as ytmusicapi uses for the sessions it creates
+YTMUSIC_TIMEOUT_SECONDS = 30
+
+
+@dataclass
+class YTMusicClientStats:
+    client: int
+    searches: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.searches += 1
+        self.total_seconds += seconds
+        self.slowest_seconds = max(self.slowest_seconds, seconds)
+
+    def get_average_seconds(self) -> float:
+        return self.total_seconds / self.searches if self.searches > 0 else 0.0
+
+
+class YTMusicClientPool:
+    # A YTMusic client and its session are only ever used by one thread at a time. Clients are created the first time
+    # every existing one is in use, so there are never more than there are threads searching at once
+    def __init__(self, size: int = YTMUSIC_CLIENTS):
+        if size < 1:
+            raise ValueError(f"a client pool needs at least 1 client, not {size}")
+        self.size = size
+        self.lock = threading.Lock()
+        self.idle: queue.LifoQueue = queue.LifoQueue()
+        self.stats: List[YTMusicClientStats] = []
+        # Clients that couldn't be created are created again by the next thread
+        self.free_indexes: List[int] = []
+
+    def create_client(self) -> YTMusic:
+        # One kept-alive connection per client, its requests are never concurrent
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        # ytmusicapi only sets its timeout on sessions it creates itself, without one a stalled search would keep its
+        # worker and client forever
+        session.request = functools.partial(session.request, timeout=YTMUSIC_TIMEOUT_SECONDS)
+        return YTMusic(requests_session=session)
+
+    def acquire(self) -> Tuple[int, YTMusic]:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.free_indexes:
+                index = self.free_indexes.pop()
+            elif len(self.stats) < self.size:
+                index = len(self.stats)
+                self.stats.append(YTMusicClientStats(index))
+            else:
+                index = None
+        if index is None:
+            return self.idle.get()
+        try:
+            return index, self.create_client()
+        except BaseException:
+            with self.lock:
+                self.free_indexes.append(index)
+            raise
+
+    @contextmanager
+    def client(self) -> Iterator[YTMusic]:
+        index, client = self.acquire()
+        start = time.perf_counter()
+        try:
+            yield client
+        finally:
+            # Only the thread holding the client updates its stats
+            self.stats[index].add(time.perf_counter() - start)
+            self.idle.put((index, client))
+
+    def get_stats(self) -> List[YTMusicClientStats]:
+        with self.lock:
+            return list(self.stats)
@@ -1,5 +1,7 @@
+import threading
+from concurrent.futures import Future
 from dataclasses import dataclass
-from ytmusicapi import YTMusic
+from ytmusic.pool import YTMusicClientPool, YTMUSIC_CLIENTS
 from typing import List, Dict, Optional
 from sptfy import Song
 from log import logger
@@ -14,26 +16,82 @@ class YTMusicCache:
 
 
 class YTM:
-    def __init__(self):
+    def __init__(self, youtube_url_cache=None, num_clients: int = YTMUSIC_CLIENTS):
         self.cache: {str, YTMusicCache} = {}
-        self.yt_music_client = YTMusic()
+        # An optional ytmusic.cache.YoutubeUrlCache, searches are kept there between runs
+        self.youtube_url_cache = youtube_url_cache
+        self.client_pool = YTMusicClientPool(num_clients)
+        # The cache and the lookups in flight are shared by every thread, a song being looked up by one thread is
+        # waited for by the others instead of being searched again
+        self.cache_lock = threading.Lock()
+        self.in_flight: Dict[str, Future] = {}
+        self.suppressed_lookups = 0
+        # Secondary index by ISRC, the same recording released on a single, an album and a compilation has a different
+        # spotify url each time but only has to be searched once. Validated matches replace unvalidated ones
+        self.isrc_cache: Dict[str, YTMusicCache] = {}
+        self.isrc_hits = 0
 
     def get_youtube_url(self, song: Song) -> YTMusicCache:
-        if song.spotify_url in self.cache:
-            return self.cache[song.spotify_url]
+        isrc = get_isrc(song)
+        with self.cache_lock:
+            isrc_match = self.isrc_cache.get(isrc) if isrc is not None else None
+            if song.spotify_url in self.cache:
+                value = self.cache[song.spotify_url]
+                if isrc_match is None or not is_upgraded_by(value, isrc_match):
+                    return value
+            if isrc_match is not None:
+                self.cache[song.spotify_url] = isrc_match
+                self.isrc_hits += 1
+            else:
+                future = self.in_flight.get(song.spotify_url)
+                is_first_lookup = future is None
+                if is_first_lookup:
+                    future = Future()
+                    self.in_flight[song.spotify_url] = future
+                else:
+                    self.suppressed_lookups += 1
+        if isrc_match is not None:
+            if self.youtube_url_cache is not None and song.spotify_url is not None:
+                self.youtube_url_cache.put(song.spotify_url, isrc_match)
+            return isrc_match
+        if not is_first_lookup:
+            return future.result()
+
+        try:
+            value = self.lookup_youtube_url(song)
+        except BaseException as e:
+            with self.cache_lock:
+                del self.in_flight[song.spotify_url]
+            future.set_exception(e)
+            raise
+        with self.cache_lock:
+            self.cache[song.spotify_url] = value
+            self.add_isrc_match(isrc, value)
+            del self.in_flight[song.spotify_url]
+        future.set_result(value)
+        return value
+
+    def lookup_youtube_url(self, song: Song) -> YTMusicCache:
+        if self.youtube_url_cache is not None and song.spotify_url is not None:
+            cached = self.youtube_url_cache.get(song.spotify_url)
+            if cached is not None:
+                return cached
 
         yt_url = self.search_youtube_music(song.name, song.artists)
         if yt_url is None:
             logger.warning(f"couldn't find song: {song.name} by {', '.join(song.artists)} with a spotify url of '{song.spotify_url}'")
-            self.cache[song.spotify_url] = YTMusicCache(None, False, False)
+            value = YTMusicCache(None, False, False)
         else:
-            self.cache[song.spotify_url] = YTMusicCache(yt_url, False, False)
-        return self.cache[song.spotify_url]
+            value = YTMusicCache(yt_url, False, False)
+        if self.youtube_url_cache is not None and song.spotify_url is not None:
+            self.youtube_url_cache.put(song.spotify_url, value)
+        return value
 
     def search_youtube_music(self, name: str, artists: List[str]) -> Optional[str]:
         # logger.debug(f"looking for youtube url for the song {name}")
         query = f"{name} by {', '.join(artists)}"
-        results = self.yt_music_client.search(query, filter="songs", limit=1)
+        with self.client_pool.client() as client:
+            results = client.search(query, filter="songs", limit=1)
 
         if len(results) == 0:
             return None
@@ -47,5 +105,28 @@ class YTM:
 
         return f"https://music.youtube.com/watch?v={top_result["videoId"]}"
 
-    def add_to_cache(self, spotify_url: str, youtube_url: str, youtube_url_validated: bool, youtube_url_permanently_skip: bool) -> None:
-        self.cache[spotify_url] = YTMusicCache(youtube_url=youtube_url, youtube_url_validated=youtube_url_validated, youtube_url_permanently_skip=youtube_url_permanently_skip)
+    def add_to_cache(self, spotify_url: str, youtube_url: str, youtube_url_validated: bool, youtube_url_permanently_skip: bool,
+                     isrc: Optional[str] = None) -> None:
+        value = YTMusicCache(youtube_url=youtube_url, youtube_url_validated=youtube_url_validated, youtube_url_permanently_skip=youtube_url_permanently_skip)
+        with self.cache_lock:
+            self.cache[spotify_url] = value
+            self.add_isrc_match(isrc, value)
+
+    def add_isrc_match(self, isrc: Optional[str], value: YTMusicCache) -> None:
+        # Songs that couldn't be found may still be found under another name, and skipping is decided for each song
+        if isrc is None or value is None or value.youtube_url is None or value.youtube_url_permanently_skip:
+            return
+        previous = self.isrc_cache.get(isrc)
+        if previous is None or (value.youtube_url_validated and not previous.youtube_url_validated):
+            self.isrc_cache[isrc] = value
+
+
+def get_isrc(song: Song) -> Optional[str]:
+    return song.external_ids.isrc if song.external_ids is not None else None
+
+
+def is_upgraded_by(value: Optional[YTMusicCache], isrc_match: YTMusicCache) -> bool:
+    # A validated match of the same recording replaces a cached value that hasn't been validated or skipped
+    if not isrc_match.youtube_url_validated:
+        return False
+    return value is None or not (value.youtube_url_validated or value.youtube_url_permanently_skip)